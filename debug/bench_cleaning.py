@@ -0,0 +1,178 @@
+"""
+Throughput benchmark and parity check for src/cleaning.py.
+
+Compares every cleaning profile with the sequential implementations it
+replaces (copied below as ``legacy_*``) on synthetic page corpora: spaced
+tokens, rule fragments glued to words (removing one token can create
+another), and the glued pages in NFD (entities next to decomposed diacritics).
+
+    python -m debug.bench_cleaning [--pages 2000] [--repeat 3]
+"""
+
+import argparse
+import html
+import random
+import re
+import time
+import unicodedata
+
+from src.cleaning import get_profile
+
+# ──────────────── LEGACY IMPLEMENTATIONS ────────────────
+
+def normalize(s: str) -> str:
+    return unicodedata.normalize("NFC", s.strip())
+
+def legacy_remove_html_entities_quot(text):
+    """remove_html_entities from parse_namhoakinh_songngu.py / parse_nam_hoa_kinh.py."""
+    try:
+        text = html.unescape(text)
+    except:
+        pass
+    text = text.replace("&quot;", "")
+    text = text.replace("&quot", "")
+    text = text.replace("quot;", "")
+    text = text.replace("&QUOT;", "")
+    text = text.replace("&Quot;", "")
+    html_entities = {
+        "&amp;": "&", "&lt;": "<", "&gt;": ">", "&apos;": "'", "&nbsp;": " ",
+        "&hellip;": "...", "&mdash;": "—", "&ndash;": "–",
+        "&ldquo;": "", "&rdquo;": "", "&lsquo;": "", "&rsquo;": "",
+    }
+    for entity, replacement in html_entities.items():
+        text = text.replace(entity, replacement)
+        text = text.replace(entity.upper(), replacement)
+    text = re.sub(r"&[a-zA-Z]+;", "", text)
+    text = re.sub(r"&[a-zA-Z]+", "", text)
+    return text
+
+def legacy_remove_html_entities_quote(text):
+    """remove_html_entities from vietnamese_parser_simple.py / ocr_image_processor.py / test_paddle_ocr.py."""
+    try:
+        text = html.unescape(text)
+    except:
+        pass
+    text = text.replace("&quot;", "")
+    text = text.replace("&quot", "")
+    text = text.replace("&quote;", "")
+    text = text.replace("&quote", "")
+    text = text.replace("quot;", "")
+    text = text.replace("quote;", "")
+    html_entities = {
+        "&amp;": "&", "&lt;": "<", "&gt;": ">", "&apos;": "'",
+        "&nbsp;": " ", "&hellip;": "...", "&mdash;": "—", "&ndash;": "–"
+    }
+    for entity, replacement in html_entities.items():
+        text = text.replace(entity, replacement)
+    text = re.sub(r"&[a-zA-Z]+;?", "", text)
+    return text
+
+def legacy_clean_text_songngu(text, clean_patterns=("999", "F.F.F", "***", "---", "___")):
+    text = legacy_remove_html_entities_quot(text)
+    text = normalize(text)
+    for pattern in clean_patterns:
+        text = text.replace(pattern, "")
+    text = re.sub(r"[\u200b\u200e\u202a\u202c\ufeff]+", "", text)
+    text = re.sub(r"\s+", " ", text)
+    text = text.replace('⸈', '')
+    return text.strip()
+
+def legacy_clean_text_nam_hoa_kinh(text):
+    return legacy_clean_text_songngu(text, ("999", "F.F.F", "***", "---", "___", "A.", "B.", "C."))
+
+def legacy_clean_text_quote(text, clean_patterns):
+    text = normalize(text)
+    text = legacy_remove_html_entities_quote(text)
+    for pattern in clean_patterns:
+        text = text.replace(pattern, "")
+    text = re.sub(r"[\u200b\u200e\u202a\u202c\ufeff]+", "", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+LEGACY = {
+    "nam_hoa_kinh_songngu": (legacy_remove_html_entities_quot, legacy_clean_text_songngu),
+    "nam_hoa_kinh": (legacy_remove_html_entities_quot, legacy_clean_text_nam_hoa_kinh),
+    "vietnamese": (legacy_remove_html_entities_quote, lambda t: legacy_clean_text_quote(t, ("***", "---", "___"))),
+    "ocr": (legacy_remove_html_entities_quote, lambda t: legacy_clean_text_quote(t, ("***", "---", "___", "..."))),
+}
+
+# ──────────────── CORPUS ────────────────
+
+WORDS = (
+    "Trang Tử nói rằng bậc chí nhân không có mình , thần nhân không có công ,"
+    " thánh nhân không có danh . 莊 子 曰 ： 「 天 下 」 。 Nam Hoa Kinh Huệ Thi"
+).split()
+NOISE = [
+    "&quot;", "&quot", "quot;", "&QUOT;", "&amp;", "&lt;", "&gt;", "&nbsp;", "&hellip;",
+    "&ldquo;", "&rdquo;", "&foo;", "&bar", "***", "---", "___", "999", "F.F.F", "...",
+    "A.", "\u200b", "\ufeff", "⸈", "\n", "\n\n", "  ", "&#39;", "&amp;quot;",
+]
+
+# Pieces of rules: glued together they form (or break up) entities and artifacts
+FRAGMENTS = [
+    "&", "&a", "&amp", "amp;", "&q", "quot", "quot;", "&quot", "e;", ";", "*", "**", "-", "--",
+    "_", "__", "9", "99", "F.", ".F", "F.F", ".", "..", "A", "B.", "ạ", "ộ", "\u200b", " ", "\n",
+]
+
+def make_page(rng: random.Random, n_words: int = 400) -> str:
+    tokens = []
+    for _ in range(n_words):
+        tokens.append(rng.choice(NOISE) if rng.random() < 0.05 else rng.choice(WORDS))
+    return " ".join(tokens)
+
+def make_glued_page(rng: random.Random, n_pieces: int = 400) -> str:
+    pieces = [rng.choice(FRAGMENTS + NOISE) if rng.random() < 0.5 else rng.choice(WORDS) for _ in range(n_pieces)]
+    return "".join(pieces)
+
+def bench(fn, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            fn(page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pages = [make_page(rng) for _ in range(args.pages)]
+    n_bytes = sum(len(p.encode("utf-8")) for p in pages)
+    glued = [make_glued_page(rng) for _ in range(args.pages)]
+    corpora = {
+        "spaced": pages,
+        "glued": glued,
+        # Entities glued to decomposed diacritics, e.g. NFD("&amp;bạn")
+        "nfd": [unicodedata.normalize("NFD", p) for p in glued],
+    }
+    print(f"📄 {len(pages)} synthetic pages per corpus ({', '.join(corpora)}), {n_bytes / 1e6:.1f} MB spaced")
+
+    failed = False
+    for name, (legacy_entities, legacy_clean) in LEGACY.items():
+        profile = get_profile(name)
+        mismatches = {
+            corpus: sum(
+                1 for p in corpus_pages
+                if profile.clean_text(p) != legacy_clean(p)
+                or profile.remove_html_entities(p) != legacy_entities(p)
+            )
+            for corpus, corpus_pages in corpora.items()
+        }
+        failed = failed or any(mismatches.values())
+        old = bench(legacy_clean, pages, args.repeat)
+        new = bench(profile.clean_text, pages, args.repeat)
+        print(
+            f"{name:<22} legacy {n_bytes / old / 1e6:6.1f} MB/s | "
+            f"engine {n_bytes / new / 1e6:6.1f} MB/s | x{old / new:4.2f} | mismatches "
+            + ", ".join(f"{corpus} {n}/{len(pages)}" for corpus, n in mismatches.items())
+        )
+    if failed:
+        raise SystemExit("💥 Engine output differs from the legacy cleaners")
+
+if __name__ == "__main__":
+    main()
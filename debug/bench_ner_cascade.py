@@ -0,0 +1,86 @@
+"""
+Cost/quality benchmark of ``NERCascade`` against its most expensive tier.
+
+Runs the cascade over the sentences and reports per-tier texts, calls,
+escalations and time, then runs the last tier alone on every sentence and
+reports the time saved and the entity-level agreement (precision/recall/F1 of
+``(type, start, end)`` spans, last tier as reference).
+
+    python -m debug.bench_ner_cascade --tiers underthesea-crf huggingface openai --openai-base-url https://api.groq.com/openai/v1
+    python -m debug.bench_ner_cascade --tiers underthesea-crf openai --stub-openai [--min-score 0.9] [--no-agreement]
+"""
+
+import argparse
+import os
+import time
+
+from debug.bench_ner_hf import load_sentences
+from debug.bench_ner_onnx import agreement
+from src.ner.cascade import NERCascade, normalize_entities
+from src.ner.server import BACKENDS, load_model
+
+def build_tier(name: str, args):
+    if name == "openai":
+        from src.ner.openai import NEROpenAI
+
+        return NEROpenAI(
+            api_key=os.getenv("OPENAI_API_KEY", "stub"),
+            base_url=args.openai_base_url,
+            model_name=args.openai_model,
+            pack_tokens=args.pack_tokens,
+        )
+    return load_model(name, args.model)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tiers", nargs="+", choices=BACKENDS + ["openai"], default=["underthesea-crf", "underthesea", "openai"])
+    parser.add_argument("--model", default=None, help="HF model name or ONNX directory for those tiers")
+    parser.add_argument("--openai-base-url", default=os.getenv("OPENAI_BASE_URL", "https://api.groq.com/openai/v1"))
+    parser.add_argument("--openai-model", default="gemma2-9b-it")
+    parser.add_argument("--pack-tokens", type=int, default=None)
+    parser.add_argument("--stub-openai", action="store_true", help="point the openai tier at debug.stub_openai_server")
+    parser.add_argument("--min-score", type=float, default=0.8)
+    parser.add_argument("--no-fragments", action="store_true")
+    parser.add_argument("--no-agreement", action="store_true")
+    parser.add_argument("--file", default=None, help="UTF-8 text file to split into sentences")
+    parser.add_argument("--sentences", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    if args.stub_openai:
+        from debug.stub_openai_server import start_server
+
+        server, args.openai_base_url, _ = start_server(rate_limit=0.0)
+
+    sentences = load_sentences(args.file, args.sentences, args.seed)
+    tiers = [build_tier(name, args) for name in args.tiers]
+    cascade = NERCascade(
+        tiers,
+        min_score=args.min_score,
+        check_fragments=not args.no_fragments,
+        check_agreement=not args.no_agreement,
+        names=args.tiers,
+    )
+    cascade.warm_up()
+    print(f"📄 {len(sentences)} sentences, cascade {' > '.join(args.tiers)} (min score {args.min_score})")
+
+    start = time.perf_counter()
+    results = cascade.predict_batch(sentences)
+    elapsed = time.perf_counter() - start
+    print(cascade.report())
+
+    start = time.perf_counter()
+    reference = [normalize_entities(ents) for ents in tiers[-1].predict_batch(sentences)]
+    alone = time.perf_counter() - start
+    precision, recall, f1 = agreement(reference, results)
+    print(
+        f"⏱️ cascade {elapsed:.2f}s vs {args.tiers[-1]} alone {alone:.2f}s (x{alone / elapsed:.1f}) | "
+        f"{args.tiers[-1]} on {cascade.counters[-1]['texts']}/{len(sentences)} sentences | "
+        f"P {precision:.3f} R {recall:.3f} F1 {f1:.3f}"
+    )
+    if server is not None:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+CPU throughput benchmark for local NERHugginFace inference.
+
+Compares the length-bucketed batched path (``NERHugginFace(mode="local")``)
+with the per-sentence ``transformers`` pipeline it replaces, and counts the
+sentences whose entities differ.
+
+    python -m debug.bench_ner_hf [--file sentences.txt] [--sentences 500] [--batch-size 32] [--threads N]
+"""
+
+import argparse
+import random
+import time
+
+from src.ner.huggingface import NERHugginFace
+from src.ner.tokens import cpu_threads
+from src.sentences import split_sentences
+
+MODEL_NAME = "NlpHUST/ner-vietnamese-electra-base"
+
+# ──────────────── CORPUS ────────────────
+
+SAMPLES = [
+    "Ông Nguyễn Văn Tảo, Phó Giám đốc Công an tỉnh Tiền Giang, cho biết vụ việc đang được điều tra.",
+    "Trang Tử sống vào thời Chiến Quốc, quê ở đất Mông nước Tống.",
+    "Huệ Thi làm tướng nước Lương.",
+    "Đoàn công tác của Bộ Y tế đã đến Hà Nội vào sáng nay để làm việc với Sở Y tế thành phố.",
+    "Nam Hoa Kinh được Nhượng Tống dịch sang tiếng Việt.",
+    "Bậc chí nhân không có mình, thần nhân không có công, thánh nhân không có danh.",
+]
+
+def load_sentences(path: str | None, n: int, seed: int) -> list[str]:
+    if path:
+        with open(path, encoding="utf-8") as f:
+            sentences = split_sentences(f.read())
+        return sentences[:n]
+    rng = random.Random(seed)
+    # Mix short and long sentences so bucketing has something to do
+    return [" ".join(rng.choices(SAMPLES, k=rng.randint(1, 4))) for _ in range(n)]
+
+def entity_key(entities) -> list[tuple]:
+    return [(e["entity_group"], e["start"], e["end"]) for e in entities]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file", default=None, help="UTF-8 text file to split into sentences")
+    parser.add_argument("--sentences", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.file, args.sentences, args.seed)
+    threads = args.threads or cpu_threads()
+    print(f"📄 {len(sentences)} sentences, {MODEL_NAME} on CPU, {threads} threads")
+
+    from transformers import pipeline
+
+    model = NERHugginFace(model_name=MODEL_NAME, mode="local", batch_size=args.batch_size, num_threads=threads)
+    baseline = pipeline("ner", model=MODEL_NAME, aggregation_strategy="simple", device="cpu")
+
+    start = time.perf_counter()
+    legacy = [baseline(sentence) for sentence in sentences]
+    old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = model.predict_batch(sentences)
+    new = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy, batched) if entity_key(a) != entity_key(b))
+    print(
+        f"pipeline {len(sentences) / old:7.1f} sent/s | "
+        f"batched {len(sentences) / new:7.1f} sent/s | x{old / new:4.2f} | "
+        f"mismatches {mismatches}/{len(sentences)}"
+    )
+
+if __name__ == "__main__":
+    main()
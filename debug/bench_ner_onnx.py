@@ -0,0 +1,78 @@
+"""
+CPU benchmark of the ONNX Runtime NER backend against the PyTorch one.
+
+Reports per-sentence latency (p50/p95), batched throughput and entity-level
+agreement (precision/recall/F1 of ``(type, start, end)`` spans, PyTorch as
+reference) for the fp32 and int8 ONNX graphs. Export the model first:
+
+    python -m src.ner.onnx --output models/ner-vietnamese-electra-base-onnx --quantize
+    python -m debug.bench_ner_onnx --model-dir models/ner-vietnamese-electra-base-onnx [--file sentences.txt]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from debug.bench_ner_hf import MODEL_NAME, entity_key, load_sentences
+from src.ner.huggingface import NERHugginFace
+from src.ner.onnx import INT8_FILE, NEROnnx
+from src.ner.tokens import cpu_threads
+
+def latency_ms(model, sentences: list[str]) -> tuple[float, float]:
+    times = []
+    for sentence in sentences:
+        start = time.perf_counter()
+        model.predict(sentence)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(0.95 * (len(times) - 1))]
+
+def throughput(model, sentences: list[str]) -> tuple[float, list[list[dict]]]:
+    start = time.perf_counter()
+    results = model.predict_batch(sentences)
+    return len(sentences) / (time.perf_counter() - start), results
+
+def agreement(reference: list[list[dict]], results: list[list[dict]]) -> tuple[float, float, float]:
+    expected = {(i, *key) for i, ents in enumerate(reference) for key in entity_key(ents)}
+    found = {(i, *key) for i, ents in enumerate(results) for key in entity_key(ents)}
+    common = len(expected & found)
+    precision = common / len(found) if found else 1.0
+    recall = common / len(expected) if expected else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", required=True, help="output directory of src.ner.onnx")
+    parser.add_argument("--file", default=None, help="UTF-8 text file to split into sentences")
+    parser.add_argument("--sentences", type=int, default=500)
+    parser.add_argument("--latency-sentences", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.file, args.sentences, args.seed)
+    threads = args.threads or cpu_threads()
+    print(f"📄 {len(sentences)} sentences, {MODEL_NAME} on CPU, {threads} threads")
+
+    backends = {"pytorch": NERHugginFace(model_name=MODEL_NAME, mode="local", batch_size=args.batch_size, num_threads=threads)}
+    backends["onnx-fp32"] = NEROnnx(args.model_dir, quantized=False, batch_size=args.batch_size, num_threads=threads)
+    if os.path.exists(os.path.join(args.model_dir, INT8_FILE)):
+        backends["onnx-int8"] = NEROnnx(args.model_dir, quantized=True, batch_size=args.batch_size, num_threads=threads)
+
+    reference = None
+    for name, model in backends.items():
+        p50, p95 = latency_ms(model, sentences[: args.latency_sentences])
+        rate, results = throughput(model, sentences)
+        if reference is None:
+            reference = results
+        precision, recall, f1 = agreement(reference, results)
+        print(
+            f"{name:<10} p50 {p50:6.1f} ms | p95 {p95:6.1f} ms | {rate:7.1f} sent/s | "
+            f"P {precision:.3f} R {recall:.3f} F1 {f1:.3f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Import-time budget check for the ``src`` package and the debug parsers.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``.
+Its cumulative import time (best of ``--repeat`` runs) must stay within its
+budget, and none of the ``HEAVY`` libraries may be imported with it: those are
+loaded on first use, or eagerly via ``NERBase.warm_up()``.
+
+    python -m debug.check_import_time [--repeat 3] [--scale 2.0] [--modules src.ner.openai ...]
+
+Exits with status 1 on any failure, so it can gate CI.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+
+# Libraries that take from hundreds of milliseconds to seconds to import
+HEAVY = (
+    "torch",
+    "transformers",
+    "huggingface_hub",
+    "openai",
+    "httpx",
+    "onnxruntime",
+    "underthesea",
+    "paddle",
+    "paddleocr",
+    "cv2",
+    "googletrans",
+)
+
+# Cumulative import time budgets in milliseconds (numpy and pymupdf, which the
+# parsers need anyway, cost about 100 ms each)
+BUDGETS_MS = {
+    "src": 20,
+    "src.cleaning": 60,
+    "src.sentences": 40,
+    "src.sections": 40,
+    "src.headers": 80,
+    "src.parallel": 60,
+    "src.page_cache": 80,
+    "src.routing": 60,
+    "src.script_classifier": 200,
+    "src.utils": 120,
+    "src.ner.base": 20,
+    "src.ner.tokens": 20,
+    "src.ner.retry": 60,
+    "src.ner.cache": 80,
+    "src.ner.client": 80,
+    "src.ner.server": 150,
+    "src.ner.underthesea": 20,
+    "src.ner.huggingface": 60,
+    "src.ner.openai": 80,
+    "src.ner.onnx": 200,
+    "src.ner.entities": 150,
+    "src.ner.windows": 20,
+    "src.ner.cascade": 20,
+    "debug.parse_namhoakinh_songngu": 600,
+    "debug.parse_nam_hoa_kinh": 500,
+    "debug.vietnamese_parser_simple": 600,
+    "debug.test_paddle_ocr": 600,
+}
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def measure(module: str) -> tuple[float, list[str]]:
+    """Cumulative import time of ``module`` in ms and the heavy libraries it pulled in."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        raise RuntimeError(error)
+
+    cumulative_us = None
+    heavy = set()
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match is None:
+            continue
+        name = match.group(4)
+        if name == module:
+            cumulative_us = int(match.group(2))
+        if name.split(".")[0] in HEAVY:
+            heavy.add(name.split(".")[0])
+    return (cumulative_us or 0) / 1000, sorted(heavy)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (slow CI machines)")
+    parser.add_argument("--modules", nargs="*", default=None)
+    args = parser.parse_args()
+
+    failures = 0
+    for module in args.modules or BUDGETS_MS:
+        budget = BUDGETS_MS.get(module, 100) * args.scale
+        try:
+            runs = [measure(module) for _ in range(args.repeat)]
+        except RuntimeError as error:
+            failures += 1
+            print(f"❌ {module:<34} import failed: {error}")
+            continue
+        elapsed = min(ms for ms, _ in runs)
+        heavy = runs[0][1]
+        ok = elapsed <= budget and not heavy
+        failures += not ok
+        note = f" | imports {', '.join(heavy)}" if heavy else ""
+        print(f"{'✅' if ok else '❌'} {module:<34} {elapsed:7.1f} ms / {budget:5.0f} ms{note}")
+
+    if failures:
+        print(f"💥 {failures} module(s) over budget or importing heavy libraries")
+        sys.exit(1)
+    print("✅ All imports within budget")
+
+
+if __name__ == "__main__":
+    main()
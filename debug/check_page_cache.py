@@ -0,0 +1,67 @@
+"""
+Regression check for ``src.page_cache``: pages whose text is only drawn
+through Form XObjects must not share cache entries.
+
+Two pages are placed with ``show_pdf_page``, so both content streams are just
+``q /fzFrm0 Do Q``; each must get its own hash and its own cleaned text back,
+on the first run and on a warm one.
+
+    python -m debug.check_page_cache
+
+Exits with status 1 on any failure, so it can gate CI.
+"""
+
+import os
+import sys
+import tempfile
+
+import pymupdf
+
+from src.page_cache import PageCache, page_content_hash
+
+TEXTS = ["Trang Tử quê ở đất Mông", "Huệ Thi làm tướng nước Lương"]
+
+
+def xobject_only_pdf(path: str):
+    """Write a PDF whose pages each draw one source page as a Form XObject."""
+    source = pymupdf.open()
+    for text in TEXTS:
+        source.new_page().insert_text((72, 72), text, fontname="helv")
+    doc = pymupdf.open()
+    for i in range(len(TEXTS)):
+        page = doc.new_page()
+        page.show_pdf_page(page.rect, source, i)
+    doc.save(path)
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "xobjects.pdf")
+        xobject_only_pdf(pdf_path)
+        doc = pymupdf.open(pdf_path)
+        pages = list(doc)
+
+        if len({page.read_contents() for page in pages}) != 1:
+            failures.append("content streams differ; the check no longer covers XObject-only pages")
+        if len({page_content_hash(page) for page in pages}) != len(pages):
+            failures.append("XObject-only pages share a content hash")
+
+        expected = [page.get_text().strip() for page in pages]
+        for run in ("cold", "warm"):
+            cache = PageCache(os.path.join(tmp, "pages.sqlite"))
+            got = [cache.cleaned_text(page, str.strip, "check_page_cache/1") for page in pages]
+            cache.close()
+            if got != expected:
+                failures.append(f"{run} run returned {got!r}, expected {expected!r}")
+        doc.close()
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ XObject-only pages get their own page cache entries")
+
+
+if __name__ == "__main__":
+    main()
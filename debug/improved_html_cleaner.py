@@ -1,52 +1,18 @@
 import re
-import html
 import unicodedata
 
+from src.cleaning import get_profile
+from src.sentences import sentence_spans
+
+CLEANING = get_profile("nam_hoa_kinh_songngu")
+
 
 def remove_html_entities(text):
     """
     Comprehensive HTML entity removal function that handles all variations of &quot;
     and other HTML entities.
     """
-    # First try html.unescape for standard entities
-    try:
-        text = html.unescape(text)
-    except:
-        pass
-
-    # Aggressive &quot; removal - handle all variations
-    text = text.replace("&quot;", "")
-    text = text.replace("&quot", "")  # Missing semicolon
-    text = text.replace("quot;", "")  # Missing ampersand
-    text = text.replace("&QUOT;", "")  # Uppercase
-    text = text.replace("&Quot;", "")  # Mixed case
-
-    # Handle other common HTML entities
-    html_entities = {
-        "&amp;": "&",
-        "&lt;": "<",
-        "&gt;": ">",
-        "&apos;": "'",
-        "&nbsp;": " ",
-        "&hellip;": "...",
-        "&mdash;": "—",
-        "&ndash;": "–",
-        "&ldquo;": "",
-        "&rdquo;": "",
-        "&lsquo;": "",
-        "&rsquo;": "",
-    }
-
-    for entity, replacement in html_entities.items():
-        text = text.replace(entity, replacement)
-        # Also handle uppercase versions
-        text = text.replace(entity.upper(), replacement)
-
-    # Use regex to catch any remaining HTML entity patterns
-    text = re.sub(r"&[a-zA-Z]+;", "", text)
-    text = re.sub(r"&[a-zA-Z]+", "", text)  # Missing semicolon
-
-    return text
+    return CLEANING.remove_html_entities(text)
 
 
 def clean_text_improved(text, clean_pattern: list[str] = ["&quot;", "***"]):
@@ -96,29 +62,14 @@ def split_sentences_improved(
     """
     Improved sentence splitting with better HTML entity handling
     """
-    sentences = []
-    current_sentence = ""
-
     if is_clean_text:
         text = clean_text_improved(text)  # Use improved cleaning
 
-    for char in text:
-        current_sentence += char
-        if char in delimiters:
-            if current_sentence.strip():
-                normalized_sentence = current_sentence.strip()
-                # Apply HTML entity removal again just in case
-                normalized_sentence = remove_html_entities(normalized_sentence)
-                sentences.append(normalize(normalized_sentence))
-            current_sentence = ""
-
-    if current_sentence.strip():  # Add any remaining text
-        normalized_sentence = current_sentence.strip()
-        # Apply HTML entity removal again just in case
-        normalized_sentence = remove_html_entities(normalized_sentence)
-        sentences.append(normalize(normalized_sentence))
-
-    return sentences
+    # Entities are removed once over the whole text rather than per sentence;
+    # multi-character delimiters like "... " are covered by the ellipsis rule
+    text = normalize(remove_html_entities(text))
+    terminators = "".join(d for d in delimiters if len(d) == 1)
+    return [text[start:end] for start, end in sentence_spans(text, terminators)]
 
 
 # Test function
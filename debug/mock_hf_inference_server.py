@@ -0,0 +1,139 @@
+"""
+Local mock of the Hugging Face token-classification inference endpoint, for
+exercising ``NERHugginFace(mode="client")`` without network access or quota.
+
+``POST /models/<model>`` with ``{"inputs": text}`` answers with the
+capitalized words of the text as PER entities (``entity_group`` format), and
+with one list per text for ``{"inputs": [texts]}`` unless ``--no-lists``. Each
+request waits ``--latency`` seconds; a ``--rate-limit`` fraction gets a 429
+with ``retry-after``, and the first ``--loading`` requests get the 503
+"model is loading" reply with ``estimated_time``.
+
+    python -m debug.mock_hf_inference_server serve [--port 8766]
+    python -m debug.mock_hf_inference_server check [--sentences 300] [--concurrency 16] [--texts-per-request 8]
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.ner.huggingface import NERHugginFace
+
+CAPITALIZED = re.compile(r"\b[A-ZÀ-Ỹ]\w*")
+
+def mock_entities(text: str) -> list[dict]:
+    return [
+        {"entity_group": "PER", "score": 0.99, "word": m.group(), "start": m.start(), "end": m.end()}
+        for m in CAPITALIZED.finditer(text)
+    ]
+
+def make_handler(latency: float, rate_limit: float, loading: int, lists: bool, seed: int):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    counts = {"requests": 0, "rate_limited": 0, "loading": 0, "connections": set()}
+
+    class Handler(BaseHTTPRequestHandler):
+        # HTTP/1.1 so clients can keep connections alive
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                counts["requests"] += 1
+                counts["connections"].add(self.client_address)
+                is_loading = counts["loading"] < loading
+                counts["loading"] += is_loading
+                limited = not is_loading and rng.random() < rate_limit
+                counts["rate_limited"] += limited
+            time.sleep(latency)
+
+            inputs = body["inputs"]
+            if is_loading:
+                self._reply(503, {"error": "Model is currently loading", "estimated_time": 0.05})
+            elif limited:
+                self._reply(429, {"error": "Rate limit reached"}, {"retry-after": "0.05"})
+            elif isinstance(inputs, list) and not lists:
+                self._reply(400, {"error": "inputs must be a string"})
+            elif isinstance(inputs, list):
+                self._reply(200, [mock_entities(text) for text in inputs])
+            else:
+                self._reply(200, mock_entities(inputs))
+
+        def _reply(self, status: int, payload, headers: dict | None = None):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler, counts
+
+def start_server(port: int = 0, latency: float = 0.05, rate_limit: float = 0.05, loading: int = 0, lists: bool = True, seed: int = 0):
+    """Run the mock in a background thread; returns ``(server, base_url, counts)``."""
+    handler, counts = make_handler(latency, rate_limit, loading, lists, seed)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/models", counts
+
+def check(args):
+    server, base_url, counts = start_server(0, args.latency, args.rate_limit, args.loading, not args.no_lists, args.seed)
+    sentences = [f"Câu {i}: Trang Tử gặp Huệ Thi ở nước Lương lần thứ {i}." for i in range(args.sentences)]
+    model = NERHugginFace(
+        api_key="mock",
+        mode="client",
+        endpoint_url=f"{base_url}/mock-ner",
+        max_concurrency=args.concurrency,
+        texts_per_request=args.texts_per_request,
+        backoff=0.05,
+    )
+
+    start = time.perf_counter()
+    results = model.predict_batch(sentences)
+    elapsed = time.perf_counter() - start
+    model.close()
+    server.shutdown()
+
+    in_order = all(result == mock_entities(sentence) for sentence, result in zip(sentences, results))
+    print(
+        f"📨 {len(sentences)} sentences in {elapsed:.2f}s ({len(sentences) / elapsed:.1f} sent/s, "
+        f"one-by-one ≈ {len(sentences) * args.latency:.1f}s) | {counts['requests']} requests over "
+        f"{len(counts['connections'])} connections, {counts['rate_limited']} rate-limited, "
+        f"{counts['loading']} loading | lists: {model.lists_supported} | results in order: {in_order}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["serve", "check"])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rate-limit", type=float, default=0.05, help="fraction of requests answered with 429")
+    parser.add_argument("--loading", type=int, default=2, help="first N requests get 503 model loading")
+    parser.add_argument("--no-lists", action="store_true", help="reject list inputs like a single-text endpoint")
+    parser.add_argument("--sentences", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--texts-per-request", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "check":
+        check(args)
+        return
+    server, base_url, _ = start_server(args.port, args.latency, args.rate_limit, args.loading, not args.no_lists, args.seed)
+    print(f"🧪 Mock HF inference server on {base_url}/<model> (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -4,108 +4,46 @@ from PIL import Image
 import os
 import re
 import unicodedata
-import html
+
+from src.cleaning import get_profile
+from src.extract_images_big import extract_images_from_pdf as extract_images_from_pdf_big
+from src.ocr import rasterize_page, rasterize_page_adaptive
+from src.routing import iter_routed_pages, write_routing_log
+from src.script_classifier import is_vietnamese
+from src.sentences import sentence_spans
 
 def normalize(s: str) -> str:
     return unicodedata.normalize("NFC", s.strip())
 
+CLEANING = get_profile("ocr")
+
 def remove_html_entities(text):
     """Remove HTML entities comprehensively."""
-    try:
-        text = html.unescape(text)
-    except:
-        pass
-    
-    # Remove &quot; and &quote; variations
-    text = text.replace("&quot;", "")
-    text = text.replace("&quot", "")
-    text = text.replace("&quote;", "")
-    text = text.replace("&quote", "")
-    text = text.replace("quot;", "")
-    text = text.replace("quote;", "")
-    
-    # Remove other common entities
-    html_entities = {
-        "&amp;": "&", "&lt;": "<", "&gt;": ">", "&apos;": "'",
-        "&nbsp;": " ", "&hellip;": "...", "&mdash;": "—", "&ndash;": "–"
-    }
-    
-    for entity, replacement in html_entities.items():
-        text = text.replace(entity, replacement)
-    
-    # Clean remaining entities with regex
-    text = re.sub(r"&[a-zA-Z]+;?", "", text)
-    
-    return text
+    return CLEANING.remove_html_entities(text)
 
 def clean_text(text: str) -> str:
     """Clean text comprehensively."""
-    text = normalize(text)
-    text = remove_html_entities(text)
-    
-    clean_patterns = ["***", "---", "___", "..."]
-    for pattern in clean_patterns:
-        text = text.replace(pattern, "")
-    
-    # Remove invisible characters and normalize spaces
-    text = re.sub(r"[\u200b\u200e\u202a\u202c\ufeff]+", "", text)
-    text = re.sub(r"\s+", " ", text)
-    
-    return text.strip()
+    return CLEANING.clean_text(text)
 
-def is_vietnamese(text: str) -> bool:
-    """Check if text contains Vietnamese characters."""
-    vietnamese_pattern = re.compile(r'[àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđĐ]')
-    return bool(vietnamese_pattern.search(text))
+def extract_images_from_pdf(pdf_path, output_dir="extracted_images", workers=None):
+    """
+    Extract all unique images from PDF and save them.
 
-def extract_images_from_pdf(pdf_path, output_dir="extracted_images"):
-    """Extract all images from PDF and save them."""
-    os.makedirs(output_dir, exist_ok=True)
-    doc = pymupdf.open(pdf_path)
-    image_list = []
-    
+    Thin wrapper over ``src.extract_images_big.extract_images_from_pdf``: images
+    repeated across pages are saved once, JPEGs are written without re-encoding
+    and ``manifest.json`` maps pages to images.
+    """
     print(f"🔄 Extracting and saving images from PDF...")
-    
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        image_dict = page.get_images()
-        
-        print(f"📄 Page {page_num+1}: Found {len(image_dict)} images")
-        
-        for img_index, img in enumerate(image_dict):
-            try:
-                xref = img[0]
-                pix = pymupdf.Pixmap(doc, xref)
-                
-                if pix.n - pix.alpha < 4:  # GRAY or RGB
-                    img_filename = f"333_BLOCK{page_num+1:03d}_LINE{img_index+1:03d}.png"
-                    img_path = os.path.join(output_dir, img_filename)
-                    
-                    # Save the image
-                    pix.save(img_path)
-                    
-                    # Verify the image was saved
-                    if os.path.exists(img_path):
-                        file_size = os.path.getsize(img_path)
-                        print(f"💾 Saved: {img_filename} ({pix.width}x{pix.height}, {file_size} bytes)")
-                        
-                        image_list.append({
-                            'page': page_num + 1,
-                            'filename': img_filename,
-                            'path': img_path,
-                            'index': img_index + 1,
-                            'size': f"{pix.width}x{pix.height}",
-                            'file_size': file_size
-                        })
-                    else:
-                        print(f"❌ Failed to save: {img_filename}")
-                
-                pix = None
-                
-            except Exception as e:
-                print(f"⚠️ Error processing image {img_index+1} on page {page_num+1}: {e}")
-    
-    doc.close()
+    image_list = extract_images_from_pdf_big(
+        pdf_path,
+        output_dir,
+        target_count=float("inf"),
+        min_size=None,
+        workers=workers,
+        filename_template="333_BLOCK{page:03d}_LINE{index:03d}.{ext}",
+    )
+    for img_info in image_list:
+        img_info['size'] = img_info['original_size']
     
     print(f"✅ Total images saved: {len(image_list)} in '{output_dir}' folder")
     return image_list
@@ -125,31 +63,49 @@ def ocr_image(image_path, lang='vie'):
         print(f"OCR error for {image_path}: {e}")
         return ""
 
+def ocr_array(img, lang='vie'):
+    """Extract text from an in-memory image array (e.g. from ``src.ocr.rasterize_page``)."""
+    try:
+        custom_config = r'--oem 3 --psm 6'
+        pil_img = Image.fromarray(img)
+        # pytesseract hands the image to tesseract through a temp file in
+        # ``pil_img.format``; BMP skips the PNG compression it defaults to
+        pil_img.format = 'BMP'
+        text = pytesseract.image_to_string(pil_img, lang=lang, config=custom_config)
+        return clean_text(text)
+    except Exception as e:
+        print(f"OCR error for in-memory image: {e}")
+        return ""
+
+def ocr_page(page, scale=3.0, lang='vie'):
+    """Render one PDF page in memory and OCR it."""
+    pix, img = rasterize_page(page, scale=scale)
+    return ocr_array(img, lang=lang)
+
+def extract_pdf_text_routed(pdf_path, routing_log="page_routing.jsonl", **thresholds):
+    """
+    Extract page texts, using OCR only for pages without a usable text layer.
+
+    Mixed PDFs (born-digital front matter + scanned body) keep the fast text
+    layer where it is good. ``thresholds`` go to ``src.routing.route_page``
+    (e.g. ``min_syllable_ratio=0.75`` to also OCR text in legacy Vietnamese
+    font encodings). Per-page decisions are written to ``routing_log``.
+    Returns ``[(page_num, raw_text), ...]``.
+    """
+    print(f"🔄 Extracting text with per-page routing: {pdf_path}")
+    doc = pymupdf.open(pdf_path)
+    decisions = []
+    pages = list(iter_routed_pages(doc, ocr_page, decisions=decisions, **thresholds))
+    doc.close()
+    
+    write_routing_log(decisions, routing_log)
+    return pages
+
 def split_sentences(text: str) -> list[str]:
     """Split text into Vietnamese sentences."""
     text = clean_text(text)
-    
-    # Split by common sentence delimiters
-    sentences = []
-    current_sentence = ""
-    
-    for char in text:
-        current_sentence += char
-        if char in [".", "!", "?", "。", ";", ":"]:
-            if current_sentence.strip():
-                cleaned = clean_text(current_sentence)
-                # Keep both Vietnamese and meaningful text
-                if cleaned and len(cleaned) > 5:
-                    sentences.append(cleaned)
-            current_sentence = ""
-    
-    # Add remaining text
-    if current_sentence.strip():
-        cleaned = clean_text(current_sentence)
-        if cleaned and len(cleaned) > 5:
-            sentences.append(cleaned)
-    
-    return sentences
+    # Keep both Vietnamese and meaningful text
+    return [text[start:end] for start, end in sentence_spans(text, ".!?。;:") if end - start > 5]
 
 def process_images_with_ocr(pdf_path, output_file="ocr_results.txt", start_line=13013):
     """Extract images from PDF and process with OCR, format like your example."""
@@ -190,8 +146,17 @@ def process_images_with_ocr(pdf_path, output_file="ocr_results.txt", start_line=
     
     return results
 
-def process_pdf_pages_ocr(pdf_path, output_file="page_ocr_results.txt", start_line=13013, save_images=True, image_dir="page_images"):
-    """Process entire PDF pages with OCR and optionally save page images."""
+def process_pdf_pages_ocr(pdf_path, output_file="page_ocr_results.txt", start_line=13013, save_images=True, image_dir="page_images",
+                          scale=3.0, target_xheight=None, small_text_share=None):
+    """
+    Process entire PDF pages with OCR and optionally save page images.
+
+    Pages are rendered at ``scale``; with ``target_xheight`` (pixels) each page is
+    instead rendered at the lowest scale that gives its body text (the dominant
+    font size) that x-height, see ``src.ocr.adaptive_scale``. Smaller footnotes
+    then get fewer pixels; ``small_text_share`` (e.g. 0.05) sizes for the
+    smallest font holding that share of the page's characters instead.
+    """
     print(f"🔄 Processing PDF pages with OCR: {pdf_path}")
     
     # Create image directory if saving images
@@ -207,11 +172,14 @@ def process_pdf_pages_ocr(pdf_path, output_file="page_ocr_results.txt", start_li
         for page_num in range(len(doc)):
             page = doc[page_num]
             
-            # Convert page to image with higher resolution
-            mat = pymupdf.Matrix(3.0, 3.0)  # Increase resolution for better OCR
-            pix = page.get_pixmap(matrix=mat)
+            # Render page into memory with higher resolution for better OCR
+            if target_xheight:
+                pix, img, page_scale = rasterize_page_adaptive(page, target_xheight=target_xheight, small_text_share=small_text_share)
+                print(f"🎯 Page {page_num+1}: adaptive scale {page_scale:.2f}x ({pix.width}x{pix.height})")
+            else:
+                pix, img = rasterize_page(page, scale=scale)
             
-            # Save page image permanently if requested
+            # Save page image permanently if requested (side output only)
             if save_images:
                 img_filename = f"page_{page_num+1:03d}.png"
                 img_path = os.path.join(image_dir, img_filename)
@@ -223,12 +191,8 @@ def process_pdf_pages_ocr(pdf_path, output_file="page_ocr_results.txt", start_li
                 else:
                     print(f"❌ Failed to save page image: {img_filename}")
             
-            # Create temporary image for OCR
-            temp_img_path = f"temp_page_{page_num+1}.png"
-            pix.save(temp_img_path)
-            
             print(f"🔍 Processing OCR for page {page_num+1}")
-            ocr_text = ocr_image(temp_img_path)
+            ocr_text = ocr_array(img)
             
             if ocr_text:
                 sentences = split_sentences(ocr_text)
@@ -241,10 +205,7 @@ def process_pdf_pages_ocr(pdf_path, output_file="page_ocr_results.txt", start_li
                         results.append((line_number, result_line))
                         line_number += 1
             
-            # Clean up temp file
-            if os.path.exists(temp_img_path):
-                os.remove(temp_img_path)
-            
+            img = None
             pix = None
     
     doc.close()
@@ -4,56 +4,26 @@ from xml.dom import minidom
 import re
 import unicodedata
 from pathlib import Path
-import html
+from functools import partial
 
-# Import the improved HTML cleaning functions
+from src.cleaning import get_profile
+from src.headers import load_or_learn_boilerplate, with_strip_list
+from src.page_cache import PageCache
+from src.parallel import map_page_ranges
+from src import script_classifier
+from src.script_classifier import classify_texts
+from src.sections import compile_boilerplate, section_matcher
+from src.sentences import split_sentences
+from src.utils import iter_pages
+
+CLEANING = get_profile("nam_hoa_kinh")
 
 def remove_html_entities(text):
     """
     Comprehensive HTML entity removal function that handles all variations of &quot;
     and other HTML entities.
     """
-    # First try html.unescape for standard entities
-    try:
-        text = html.unescape(text)
-    except:
-        pass
-
-    # Aggressive &quot; removal - handle all variations
-    text = text.replace("&quot;", "")
-    text = text.replace("&quot", "")  # Missing semicolon
-    text = text.replace("quot;", "")  # Missing ampersand
-    text = text.replace("&QUOT;", "")  # Uppercase
-    text = text.replace("&Quot;", "")  # Mixed case
-
-    # Handle other common HTML entities
-    html_entities = {
-        "&amp;": "&",
-        "&lt;": "<",
-        "&gt;": ">",
-        "&apos;": "'",
-        "&nbsp;": " ",
-        "&hellip;": "...",
-        "&mdash;": "—",
-        "&ndash;": "–",
-        "&ldquo;": "",
-        "&rdquo;": "",
-        "&lsquo;": "",
-        "&rsquo;": "",
-    }
-
-    for entity, replacement in html_entities.items():
-        text = text.replace(entity, replacement)
-        # Also handle uppercase versions
-        text = text.replace(entity.upper(), replacement)
-
-    # Use regex to catch any remaining HTML entity patterns
-    text = re.sub(r"&[a-zA-Z]+;", "", text)
-    text = re.sub(r"&[a-zA-Z]+", "", text)  # Missing semicolon
-
-    return text
-
-
+    return CLEANING.remove_html_entities(text)
 
 # ──────────────── CONFIGURATION ────────────────
 BOOK_METADATA = {
@@ -72,126 +42,59 @@ KNOWN_SECTIONS = [
     "ĐỨC SUNG PHÙ", "ĐẠI TÔNG SƯ", "ỨNG ĐẾ VƯƠNG"
 ]
 
+# Running headers/footers, removed by clean_page
+BOILERPLATE = compile_boilerplate([
+    r"TRANG TỬ.*NAM HOA KINH.*",  # Existing removal
+    r"Trang \d+",
+])
+PAGE_NUMBER_LINE = re.compile(r"^\d+\s*$", re.MULTILINE)
+JOIN_LINES = re.compile(r"(?<!\n)\n(?!\n)")
+
+# Bump when clean_page / remove_html_entities / KNOWN_SECTIONS change (invalidates the page cache)
+CLEANING_RULES_VERSION = "parse_nam_hoa_kinh/4"
+
 # ──────────────── UTILITY FUNCTIONS ────────────────
 def normalize(s: str) -> str:
     return unicodedata.normalize("NFC", s.strip())
 
+# Kept for scripts importing them from here; batched versions in src.script_classifier
 def is_chinese(text: str) -> bool:
     """Check if text contains Chinese characters."""
-    chinese_chars = sum(1 for c in text if 0x4E00 <= ord(c) <= 0x9FFF)
-    total_chars = len([c for c in text if c.isalnum()])
-    return chinese_chars > 0 and (chinese_chars / max(total_chars, 1)) > 0.3
+    return script_classifier.is_chinese(text)
 
 def is_vietnamese(text: str) -> bool:
     """Check if text contains Vietnamese characters."""
-    vietnamese_pattern = re.compile(r'[àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđĐ]')
-    return bool(vietnamese_pattern.search(text))
+    return script_classifier.is_vietnamese(text)
 
 def classify_text(text: str) -> str:
     """Classify text as Chinese, Vietnamese, or Mixed."""
-    text = normalize(text)
-    has_chinese = is_chinese(text)
-    has_vietnamese = is_vietnamese(text)
-    
-    if has_chinese and has_vietnamese:
-        return "Mixed"
-    elif has_chinese:
-        return "Chinese"
-    elif has_vietnamese:
-        return "Vietnamese"
-    return "Other"
+    return script_classifier.classify_text(text)
 
 def clean_text(text: str) -> str:
     """Clean text with comprehensive HTML entity removal."""
-    # Remove HTML entities first
-    text = remove_html_entities(text)
-    text = normalize(text)
-    
-    # Remove common OCR artifacts
-    clean_patterns = ["999", "F.F.F", "***", "---", "___", "A.", "B.", "C."]
-    for pattern in clean_patterns:
-        text = text.replace(pattern, "")
-    
-    # Remove invisible characters
-    text = re.sub(r"[\u200b\u200e\u202a\u202c\ufeff]+", "", text)
-    
-    # Clean up multiple spaces
-    text = re.sub(r"\s+", " ", text)
-    
-    # Remove the specific characters requested by the user
-    text = text.replace('⸈', '')
-    
-    return text.strip()
+    return CLEANING.clean_text(text)
 
-def clean_page(text: str, known_sections: list[str]) -> str:
+def clean_page(text: str, known_sections: list[str] = KNOWN_SECTIONS) -> str:
     """Clean page OCR text."""
     text = normalize(text)
     text = remove_html_entities(text)
     
-    for section_name in known_sections:  # Detect and preserve titles
-        if section_name in text:
-            preserved_title = section_name
-            text = re.sub(rf'(?i)^{re.escape(section_name)}', preserved_title, text)  # Keep title
-            break  # Only handle the first match
+    # Detect and preserve titles (only the first match is handled)
+    text = section_matcher(tuple(known_sections)).preserve_title(text)
     
-    text = re.sub(r"TRANG TỬ.*NAM HOA KINH.*", "", text, flags=re.I)  # Existing removal
-    text = re.sub(r"Trang \d+", "", text, flags=re.I)
-    text = re.sub(r"^\d+\s*$", "", text, flags=re.MULTILINE)
-    text = re.sub(r"(?<!\n)\n(?!\n)", " ", text)
+    # Remove unwanted sections and headers in one pass
+    text = BOILERPLATE.sub("", text)
+    text = PAGE_NUMBER_LINE.sub("", text)
+    text = JOIN_LINES.sub(" ", text)
     
     return text.strip()
 
 def split_into_sentences(text: str) -> list[str]:
     """Split text into sentences with better Chinese-Vietnamese handling."""
+    # Cleaned once up front: fragments are slices of the cleaned text, not re-cleaned
     text = clean_text(text)
-    
-    # Split by paragraph first
-    paragraphs = re.split(r"\n\s*\n", text)
-    sentences = []
-    
-    for para in paragraphs:
-        if not para.strip():
-            continue
-            
-        # For each paragraph, split by common sentence delimiters
-        current_sentence = ""
-        i = 0
-        
-        while i < len(para):
-            char = para[i]
-            current_sentence += char
-            
-            # Check for sentence endings
-            if char in [".", "!", "?", "。", "！", "？"]:
-                # Look ahead to see if this is really end of sentence
-                next_char = para[i + 1] if i + 1 < len(para) else ""
-                
-                # Don't split on numbers like "1.2" or "3.14"
-                if char == "." and next_char.isdigit():
-                    i += 1
-                    continue
-                
-                # Don't split Chinese text on period unless followed by space/newline
-                if char == "." and is_chinese(current_sentence) and next_char not in [" ", "\n", "", "\t"]:
-                    i += 1
-                    continue
-                
-                # Add sentence if not empty
-                if current_sentence.strip():
-                    cleaned = clean_text(current_sentence)
-                    if cleaned and len(cleaned) > 5:  # Filter out very short sentences
-                        sentences.append(cleaned)
-                current_sentence = ""
-            
-            i += 1
-        
-        # Add any remaining text
-        if current_sentence.strip():
-            cleaned = clean_text(current_sentence)
-            if cleaned and len(cleaned) > 5:
-                sentences.append(cleaned)
-    
-    return sentences
+    # Filter out very short sentences
+    return split_sentences(text, min_length=5, han_period_needs_space=True)
 
 def detect_sections(pages, known_sections=KNOWN_SECTIONS):
     """Detect sections from table of contents."""
@@ -199,22 +102,19 @@ def detect_sections(pages, known_sections=KNOWN_SECTIONS):
     sections = []
     current = {"name": "TIÊU DIÊU DU", "pages": []}  # Default section
     
+    matcher = section_matcher(tuple(known_sections))
+    
+    # Pages arrive already cleaned by clean_page (iter_pages / page cache)
     for i, txt in enumerate(pages, 1):
-        cleaned_txt = clean_page(txt, known_sections)
-        
         # Look for section titles
-        found_section = False
-        for section_name in known_sections:
-            if section_name in cleaned_txt:
-                if current["pages"]:
-                    sections.append(current)
-                current = {"name": section_name, "pages": [(i, cleaned_txt)]}
-                found_section = True
-                print(f"Found section '{section_name}' on page {i}")
-                break
-        
-        if not found_section:
-            current["pages"].append((i, cleaned_txt))
+        section_name = matcher.first_title(txt)
+        if section_name is not None:
+            if current["pages"]:
+                sections.append(current)
+            current = {"name": section_name, "pages": [(i, txt)]}
+            print(f"Found section '{section_name}' on page {i}")
+        else:
+            current["pages"].append((i, txt))
     
     if current["pages"]:
         sections.append(current)
@@ -227,15 +127,16 @@ def detect_sections(pages, known_sections=KNOWN_SECTIONS):
 
 def pair_chinese_vietnamese_sentences(sentences):
     pairs = []
+    langs = classify_texts(sentences)  # One batched pass over all sentences
     i = 0
     
     while i < len(sentences):
         current_sent = sentences[i]
-        current_lang = classify_text(current_sent)
+        current_lang = langs[i]
         
         if i + 1 < len(sentences):
             next_sent = sentences[i + 1]
-            next_lang = classify_text(next_sent)
+            next_lang = langs[i + 1]
             
             if current_lang == 'Chinese' and next_lang == 'Vietnamese':
                 pairs.append({'chinese': current_sent, 'vietnamese': next_sent})
@@ -258,15 +159,58 @@ def write_pretty_xml(tree, out_path):
     with open(out_path, "w", encoding="utf-8") as f:
         f.write(pretty.toprettyxml(indent="  "))
 
-def build_xml_for_nam_hoa_kinh(pdf_path, output_path="nam_hoa_kinh_parsed.xml", code="PKS_001"):
+def _process_page_range(pdf_path: str, start: int, stop: int, page_cache: str | None = None, boilerplate: list[str] = ()) -> list[tuple[str, list[dict]]]:
+    """
+    Worker for parallel mode: clean -> split -> pair pages ``[start, stop)``.
+
+    Returns ``(cleaned_text, pairs)`` per page. ``boilerplate`` is a learned
+    header/footer strip-list (see ``src.headers``).
+    """
+    clean, rules_version = with_strip_list(clean_page, list(boilerplate), CLEANING_RULES_VERSION)
+    doc = pymupdf.open(pdf_path)
+    cache = PageCache(page_cache) if page_cache else None
+    results = []
+    for page_num in range(start, stop):
+        if cache is not None:
+            page_text = cache.cleaned_text(doc[page_num], clean, rules_version)
+        else:
+            page_text = clean(doc[page_num].get_text())
+        results.append((page_text, pair_chinese_vietnamese_sentences(split_into_sentences(page_text))))
+    doc.close()
+    if cache is not None:
+        cache.close()
+    return results
+
+def build_xml_for_nam_hoa_kinh(pdf_path, output_path="nam_hoa_kinh_parsed.xml", code="PKS_001", workers: int = 1, page_cache: str | None = None, learn_headers: bool = False):
     """
     Parse Nam Hoa Kinh PDF and create XML with 1:1 Chinese-Vietnamese sentence pairs.
+
+    With ``workers > 1`` pages are cleaned, split and paired in separate
+    processes over page ranges; IDs match a serial run. ``page_cache`` is the
+    path of a ``src.page_cache.PageCache`` database for reusing cleaned pages.
+    With ``learn_headers=True`` running headers/footers are learned from the
+    book (``src.headers``) and stripped before ``clean_page``.
     """
     print(f"🔄 Processing PDF: {pdf_path}")
     
+    boilerplate = load_or_learn_boilerplate(pdf_path, protected=KNOWN_SECTIONS) if learn_headers else []
+    
     # Step 1: Read PDF
-    doc = pymupdf.open(pdf_path)
-    pages_text = [clean_page(p.get_text()) for p in doc]
+    if workers > 1:
+        worker = partial(_process_page_range, page_cache=page_cache, boilerplate=boilerplate)
+        page_results = map_page_ranges(pdf_path, worker, workers)
+        pages_text = [page_text for page_text, _ in page_results]
+        pages_pairs = [pairs for _, pairs in page_results]
+    else:
+        clean, rules_version = with_strip_list(clean_page, boilerplate, CLEANING_RULES_VERSION)
+        doc = pymupdf.open(pdf_path)
+        cache = PageCache(page_cache) if page_cache else None
+        pages = iter_pages(doc, clean=clean, cache=cache, rules_version=rules_version)
+        pages_text = [page_text for _, page_text in pages]
+        pages_pairs = None
+        if cache is not None:
+            print(f"🗄️ Page cache: {cache.hits} hits, {cache.misses} misses")
+            cache.close()
     print(f"📄 Extracted {len(pages_text)} pages")
     
     # Step 2: Detect sections
@@ -299,11 +243,14 @@ def build_xml_for_nam_hoa_kinh(pdf_path, output_path="nam_hoa_kinh_parsed.xml",
                 sect_el, "PAGE", ID=f"{code}.{sect_id:03}.{page_num:03}"
             )
             
-            # Extract sentences from page
-            sentences = split_into_sentences(page_text)
-            
-            # Pair Chinese and Vietnamese sentences
-            pairs = pair_chinese_vietnamese_sentences(sentences)
+            if pages_pairs is not None:
+                pairs = pages_pairs[page_num - 1]
+            else:
+                # Extract sentences from page
+                sentences = split_into_sentences(page_text)
+                
+                # Pair Chinese and Vietnamese sentences
+                pairs = pair_chinese_vietnamese_sentences(sentences)
             
             # Create STC elements
             for sent_id, pair in enumerate(pairs, 1):
@@ -3,7 +3,8 @@ import xml.etree.ElementTree as ET
 from xml.dom import minidom
 import re
 import unicodedata
-import html
+import os
+from functools import partial
 
 import pymupdf
 import xml.etree.ElementTree as ET
@@ -11,7 +12,19 @@ from xml.dom import minidom
 import re
 import unicodedata
 
-from underthesea import ner, text_normalize, sent_tokenize
+from src.cleaning import get_profile
+from src.headers import load_or_learn_boilerplate, with_strip_list
+from src.ner.cache import NERCache
+from src.ner.client import NERClient
+from src.ner.entities import EntityTable
+from src.ner.underthesea import NERUnderthesea
+from src.ner.windows import predict_windows
+from src.page_cache import PageCache
+from src.parallel import map_page_ranges
+from src import script_classifier
+from src.script_classifier import classify_texts, is_chinese_batch, is_vietnamese_batch
+from src.sections import compile_boilerplate, section_matcher
+from src.utils import XMLStreamWriter, iter_pages
 
 # ──────────────── CẤU HÌNH ────────────────
 BOOK_METADATA = {
@@ -51,53 +64,14 @@ BASED_ENTITY_GROUPS = [
     "NUM",
 ]
 
-# Import the improved HTML cleaning functions
+CLEANING = get_profile("nam_hoa_kinh_songngu")
 
 def remove_html_entities(text):
     """
     Comprehensive HTML entity removal function that handles all variations of &quot;
     and other HTML entities.
     """
-    # First try html.unescape for standard entities
-    try:
-        text = html.unescape(text)
-    except:
-        pass
-
-    # Aggressive &quot; removal - handle all variations
-    text = text.replace("&quot;", "")
-    text = text.replace("&quot", "")  # Missing semicolon
-    text = text.replace("quot;", "")  # Missing ampersand
-    text = text.replace("&QUOT;", "")  # Uppercase
-    text = text.replace("&Quot;", "")  # Mixed case
-
-    # Handle other common HTML entities
-    html_entities = {
-        "&amp;": "&",
-        "&lt;": "<",
-        "&gt;": ">",
-        "&apos;": "'",
-        "&nbsp;": " ",
-        "&hellip;": "...",
-        "&mdash;": "—",
-        "&ndash;": "–",
-        "&ldquo;": "",
-        "&rdquo;": "",
-        "&lsquo;": "",
-        "&rsquo;": "",
-    }
-
-    for entity, replacement in html_entities.items():
-        text = text.replace(entity, replacement)
-        # Also handle uppercase versions
-        text = text.replace(entity.upper(), replacement)
-
-    # Use regex to catch any remaining HTML entity patterns
-    text = re.sub(r"&[a-zA-Z]+;", "", text)
-    text = re.sub(r"&[a-zA-Z]+", "", text)  # Missing semicolon
-
-    return text
-
+    return CLEANING.remove_html_entities(text)
 
 # KNOWN_SECTIONS = [
 #     "LỜI NÓI ĐẦU", "TIỂU DẪN", "NỘI THIÊN", "NGOẠI THIÊN", "TẠP THIÊN",
@@ -111,141 +85,71 @@ KNOWN_SECTIONS = [
     "ĐỨC SUNG PHÙ", "ĐẠI TÔNG SƯ", "ỨNG ĐẾ VƯƠNG", "DỊCH NGHĨA", "LƯỢC SỬ", "CHÚ"
 ]
 
+# Running headers/footers, removed by clean_page
+BOILERPLATE = compile_boilerplate([
+    r"TRANG TỬ.*NAM HOA KINH.*",  # Existing removal
+    r"Dịch kinh.*",  # "Dịch kinh" sections, any case
+    r"Trang \d+",
+])
+PAGE_NUMBER_LINE = re.compile(r"^\d+\s*$", re.MULTILINE)
+JOIN_LINES = re.compile(r"(?<!\n)\n(?!\n)")
+
+# Bump when clean_page / remove_html_entities / KNOWN_SECTIONS change (invalidates the page cache)
+CLEANING_RULES_VERSION = "parse_namhoakinh_songngu/4"
+
 # ──────────────── UTILITY FUNCTIONS ────────────────
 def normalize(s: str) -> str:
     return unicodedata.normalize("NFC", s.strip())
 
+# Kept for scripts importing them from here; batched versions in src.script_classifier
 def is_chinese(text: str) -> bool:
     """Check if text contains Chinese characters."""
-    chinese_chars = sum(1 for c in text if 0x4E00 <= ord(c) <= 0x9FFF)
-    total_chars = len([c for c in text if c.isalnum()])
-    return chinese_chars > 0 and (chinese_chars / max(total_chars, 1)) > 0.3
+    return script_classifier.is_chinese(text)
 
 def is_vietnamese(text: str) -> bool:
     """Check if text contains Vietnamese characters."""
-    vietnamese_pattern = re.compile(r'[àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđĐ]')
-    return bool(vietnamese_pattern.search(text))
+    return script_classifier.is_vietnamese(text)
 
 def classify_text(text: str) -> str:
     """Classify text as Chinese, Vietnamese, or Mixed."""
-    text = normalize(text)
-    has_chinese = is_chinese(text)
-    has_vietnamese = is_vietnamese(text)
-    
-    if has_chinese and has_vietnamese:
-        return "Mixed"
-    elif has_chinese:
-        return "Chinese"
-    elif has_vietnamese:
-        return "Vietnamese"
-    return "Other"
+    return script_classifier.classify_text(text)
 
 def clean_text(text: str) -> str:
     """Clean text with comprehensive HTML entity removal."""
-    # Remove HTML entities first
-    text = remove_html_entities(text)
-    text = normalize(text)
-    
-    # Remove common OCR artifacts
-    clean_patterns = ["999", "F.F.F", "***", "---", "___"]
-    for pattern in clean_patterns:
-        text = text.replace(pattern, "")
-    
-    # Remove invisible characters
-    text = re.sub(r"[\u200b\u200e\u202a\u202c\ufeff]+", "", text)
-    
-    # Clean up multiple spaces
-    text = re.sub(r"\s+", " ", text)
-    
-    # Remove the specific characters requested by the user
-    text = text.replace('⸈', '')
-    
-    return text.strip()
+    return CLEANING.clean_text(text)
 
 def clean_page(text: str, known_sections: list[str]=KNOWN_SECTIONS) -> str:
     """Clean page OCR text."""
     text = normalize(text)
     text = remove_html_entities(text)
     
-    for section_name in known_sections:  # Detect and preserve titles
-        if section_name in text:
-            preserved_title = section_name
-            text = re.sub(rf'(?i)^{re.escape(section_name)}', preserved_title, text)  # Keep title
-            break  # Only handle the first match
+    # Detect and preserve titles (only the first match is handled)
+    text = section_matcher(tuple(known_sections)).preserve_title(text)
     
-    # Remove unwanted sections and headers
-    text = re.sub(r"TRANG TỬ.*NAM HOA KINH.*", "", text, flags=re.I)  # Existing removal
-    text = re.sub(r"Dịch kinh.*", "", text, flags=re.I)  # Remove "Dịch kinh" sections
-    text = re.sub(r"DỊCH KINH.*", "", text, flags=re.I)  # Remove uppercase variant
-    text = re.sub(r"Trang \d+", "", text, flags=re.I)
-    text = re.sub(r"^\d+\s*$", "", text, flags=re.MULTILINE)
-    text = re.sub(r"(?<!\n)\n(?!\n)", " ", text)
+    # Remove unwanted sections and headers in one pass
+    text = BOILERPLATE.sub("", text)
+    text = PAGE_NUMBER_LINE.sub("", text)
+    text = JOIN_LINES.sub(" ", text)
     
     return text.strip()
 
+# Shared underthesea model; predict_batch tags many sentences per model call.
+# With NER_SERVER_ADDRESS set, a running src.ner.server does the tagging instead.
+# With NER_CACHE_PATH set, results are cached there by sentence and model version,
+# so re-runs and other editions reuse them (the server is not contacted until the
+# first sentence).
+NER_MODEL = NERClient() if os.getenv("NER_SERVER_ADDRESS") else NERUnderthesea(deep=True)
+if os.getenv("NER_CACHE_PATH"):
+    NER_MODEL = NERCache(NER_MODEL, path=os.environ["NER_CACHE_PATH"])
+# With NER_WINDOW_CHARS set (e.g. 1000), a page's sentences are tagged together in
+# windows of that many characters (src.ner.windows) instead of one by one
+NER_WINDOW_CHARS = int(os.getenv("NER_WINDOW_CHARS", "0"))
+
 def ner_underthesea(text: str) -> list[dict]:
     """Extract named entities from Vietnamese text."""
-    result = ner(text, deep=True)
+    result = NER_MODEL.predict(text)
     return result
 
-def merge_adjacent_entities(entities: list[dict], text: str) -> list[dict]:
-    """
-    Merge adjacent entities that are consecutive in the text.
-    
-    Args:
-        entities: List of entity dictionaries with 'start', 'end', 'word', 'entity' keys
-        text: Original text to verify merging
-    
-    Returns:
-        List of merged entities
-    """
-    if not entities or len(entities) < 2:
-        return entities
-    
-    # Sort entities by start position
-    sorted_entities = sorted(entities, key=lambda x: x.get('start', 0))
-    merged_entities = []
-    current_entity = sorted_entities[0].copy()
-    
-    for i in range(1, len(sorted_entities)):
-        next_entity = sorted_entities[i]
-        
-        # Check if entities are adjacent: end_current + 1 = start_next
-        current_end = current_entity.get('end', 0)
-        next_start = next_entity.get('start', 0)
-        
-        # Also check if they have the same entity type (optional - you can remove this condition)
-        current_type = current_entity.get('entity', '').split('-')[-1]
-        next_type = next_entity.get('entity', '').split('-')[-1]
-        
-        if current_end + 1 == next_start and current_type == next_type:
-            # Merge entities
-            print(f"   🔗 Merging adjacent entities: '{current_entity.get('word', '')}' + '{next_entity.get('word', '')}'")
-            
-            # Update current entity with merged information
-            current_entity['end'] = next_entity.get('end', current_end)
-            
-            # Reconstruct the word from the original text
-            merged_start = current_entity.get('start', 0)
-            merged_end = current_entity.get('end', 0)
-            current_entity['word'] = text[merged_start:merged_end]
-            
-            # Keep the entity type of the first entity
-            print(f"   ✅ Merged result: '{current_entity.get('word', '')}' ({current_type})")
-            
-        else:
-            # No merge possible, add current entity to results and move to next
-            merged_entities.append(current_entity)
-            current_entity = next_entity.copy()
-    
-    # Add the last entity
-    merged_entities.append(current_entity)
-    
-    if len(merged_entities) < len(sorted_entities):
-        print(f"   📊 Entity merging: {len(sorted_entities)} -> {len(merged_entities)} entities")
-    
-    return merged_entities
-
 def process_ner_with_merging(text: str) -> list[dict]:
     """
     Extract NER entities and merge adjacent ones.
@@ -256,25 +160,21 @@ def process_ner_with_merging(text: str) -> list[dict]:
     Returns:
         List of processed and merged entities
     """
-    # Get raw NER results
-    raw_entities = ner_underthesea(text)
-    
-    if not raw_entities:
-        return []
-    
-    # Filter for valid entity types first
-    valid_entities = [
-        ent for ent in raw_entities
-        if ent.get("entity", "").split("-")[-1] in BASED_ENTITY_GROUPS
-    ]
-    
-    if not valid_entities:
-        return []
-    
-    # Merge adjacent entities
-    merged_entities = merge_adjacent_entities(valid_entities, text)
-    
-    return merged_entities
+    return process_ner_with_merging_batch([text])[0].to_dicts(text)
+
+def process_ner_with_merging_batch(texts: list[str]) -> EntityTable:
+    """
+    ``process_ner_with_merging`` for many texts, with one batched NER call.
+
+    Keeps ``BASED_ENTITY_GROUPS`` entities and merges adjacent ones of the same
+    type (e.g. a name split into two PER entities). Entities stay in a compact
+    ``EntityTable``; ``table[i]`` holds those of ``texts[i]``.
+    """
+    if NER_WINDOW_CHARS:
+        raw_results = predict_windows(NER_MODEL, texts, NER_WINDOW_CHARS)
+    else:
+        raw_results = NER_MODEL.predict_batch(texts)
+    return EntityTable.from_predictions(raw_results, keep=BASED_ENTITY_GROUPS).merge_adjacent()
 
 def split_into_paragraphs(text: str, min_length: int = 20, max_length: int = 1000) -> list[str]:
     """
@@ -288,6 +188,9 @@ def split_into_paragraphs(text: str, min_length: int = 20, max_length: int = 100
     Returns:
         List of paragraphs
     """
+    # underthesea is imported on first use: importing it takes seconds
+    from underthesea import text_normalize
+
     # First normalize the text
     text = text_normalize(text)
     
@@ -359,6 +262,8 @@ def split_into_sentences(text: str) -> list[str]:
     Returns:
         List of sentences
     """
+    from underthesea import sent_tokenize, text_normalize
+
     # First normalize and clean the text
     text = text_normalize(text)
     text = clean_text(text)
@@ -429,22 +334,19 @@ def detect_sections(pages, known_sections=KNOWN_SECTIONS):
     sections = []
     current = {"name": "TIÊU DIÊU DU", "pages": []}  # Default section
     
+    matcher = section_matcher(tuple(known_sections))
+    
+    # Pages arrive already cleaned by clean_page (iter_pages / page cache)
     for i, txt in enumerate(pages, 1):
-        cleaned_txt = clean_page(txt, known_sections)
-        
         # Look for section titles
-        found_section = False
-        for section_name in known_sections:
-            if section_name in cleaned_txt:
-                if current["pages"]:
-                    sections.append(current)
-                current = {"name": section_name, "pages": [(i, cleaned_txt)]}
-                found_section = True
-                print(f"Found section '{section_name}' on page {i}")
-                break
-        
-        if not found_section:
-            current["pages"].append((i, cleaned_txt))
+        section_name = matcher.first_title(txt)
+        if section_name is not None:
+            if current["pages"]:
+                sections.append(current)
+            current = {"name": section_name, "pages": [(i, txt)]}
+            print(f"Found section '{section_name}' on page {i}")
+        else:
+            current["pages"].append((i, txt))
     
     if current["pages"]:
         sections.append(current)
@@ -455,17 +357,44 @@ def detect_sections(pages, known_sections=KNOWN_SECTIONS):
     
     return sections
 
+def iter_sections(pages, known_sections=KNOWN_SECTIONS):
+    """
+    Streaming counterpart of ``detect_sections``.
+
+    Consumes cleaned ``(page_num, text)`` pairs and yields ``(sect_id, name,
+    page_num, text)`` page by page, with the same section IDs ``detect_sections``
+    would assign.
+    """
+    matcher = section_matcher(tuple(known_sections))
+    sect_id = 0
+    name = "TIÊU DIÊU DU"  # Default section
+    has_pages = False
+    
+    for i, txt in pages:
+        # Look for section titles
+        section_name = matcher.first_title(txt)
+        if section_name is not None:
+            name = section_name
+            has_pages = False
+            print(f"Found section '{section_name}' on page {i}")
+        
+        if not has_pages:
+            sect_id += 1
+            has_pages = True
+        yield sect_id, name, i, txt
+
 def pair_chinese_vietnamese_sentences(sentences):
     pairs = []
+    langs = classify_texts(sentences)  # One batched pass over all sentences
     i = 0
     
     while i < len(sentences):
         current_sent = sentences[i]
-        current_lang = classify_text(current_sent)
+        current_lang = langs[i]
         
         if i + 1 < len(sentences):
             next_sent = sentences[i + 1]
-            next_lang = classify_text(next_sent)
+            next_lang = langs[i + 1]
             
             if current_lang == 'Chinese' and next_lang == 'Vietnamese':
                 pairs.append({'chinese': current_sent, 'vietnamese': next_sent})
@@ -501,6 +430,9 @@ def split_mixed_text_pairs(text: str) -> list[dict]:
     """
     # Split text into chunks by spaces
     chunks = text.split()
+    # Classify every chunk in one batched pass
+    chinese = is_chinese_batch(chunks).tolist()
+    vietnamese = [v or c.isupper() for v, c in zip(is_vietnamese_batch(chunks).tolist(), chunks)]
     pairs = []
     current_chinese = []
     current_vietnamese = []
@@ -515,17 +447,17 @@ def split_mixed_text_pairs(text: str) -> list[dict]:
             continue
             
         # Check if chunk is Chinese
-        if is_chinese(chunk):
+        if chinese[i]:
             current_chinese.append(chunk)
             # Look ahead for more Chinese characters
-            while i + 1 < len(chunks) and is_chinese(chunks[i + 1]):
+            while i + 1 < len(chunks) and chinese[i + 1]:
                 current_chinese.append(chunks[i + 1])
                 i += 1
         # Check if chunk is Vietnamese
-        elif is_vietnamese(chunk) or chunk.isupper():
+        elif vietnamese[i]:
             current_vietnamese.append(chunk)
             # Look ahead for more Vietnamese words in the same phrase
-            while i + 1 < len(chunks) and (is_vietnamese(chunks[i + 1]) or chunks[i + 1].isupper()):
+            while i + 1 < len(chunks) and vietnamese[i + 1]:
                 if chunks[i + 1] in ['Kính', 'dâng', 'hương', 'hồn', 'thân', 'phụ']:
                     break
                 current_vietnamese.append(chunks[i + 1])
@@ -625,15 +557,187 @@ def merge_text_pairs(pairs: list[dict], format_type: str = 'aligned') -> str:
     else:
         raise ValueError(f"Unknown format type: {format_type}")
 
-def build_xml_for_book(pdf_path, metadata: dict, output_path="nam_hoa_kinh_parsed.xml", code="PKS_001"):
+def process_page(page_text: str) -> list[dict]:
+    """
+    Split, pair and run NER on one cleaned page.
+
+    Returns the Chinese-Vietnamese pairs, each with the ``entities`` of its
+    Vietnamese side (``EntitySpans``, or an empty list when the pair has no
+    Vietnamese text).
+    """
+    sentences = split_into_sentences(page_text)
+    pairs = pair_chinese_vietnamese_sentences(sentences)
+    # NER runs once for the whole page
+    tagged = [pair for pair in pairs if pair["vietnamese"]]
+    entities = process_ner_with_merging_batch([pair["vietnamese"] for pair in tagged])
+    for pair in pairs:
+        pair["entities"] = []
+    for pair, pair_entities in zip(tagged, entities):
+        pair["entities"] = pair_entities
+    return pairs
+
+def _ner_counters() -> dict[str, int]:
+    """NER cache counters of this process (summed over the workers in parallel mode)."""
+    return NER_MODEL.counters() if isinstance(NER_MODEL, NERCache) else {}
+
+def _process_page_range(pdf_path: str, start: int, stop: int, page_cache: str | None = None, boilerplate: list[str] = ()) -> list[tuple[str, list[dict]]]:
+    """
+    Worker for parallel mode: clean -> split -> pair -> NER pages ``[start, stop)``.
+
+    Returns ``(cleaned_text, pairs)`` per page. ``boilerplate`` is a learned
+    header/footer strip-list (see ``src.headers``).
+    """
+    clean, rules_version = with_strip_list(clean_page, list(boilerplate), CLEANING_RULES_VERSION)
+    doc = pymupdf.open(pdf_path)
+    cache = PageCache(page_cache) if page_cache else None
+    results = []
+    for page_num in range(start, stop):
+        if cache is not None:
+            page_text = cache.cleaned_text(doc[page_num], clean, rules_version)
+        else:
+            page_text = clean(doc[page_num].get_text())
+        results.append((page_text, process_page(page_text) if page_text else []))
+    doc.close()
+    if cache is not None:
+        cache.close()
+    return results
+
+def add_ner_element(stc_el, entities, text: str):
+    """Append a NER block with one ENTITY per merged entity of ``text``."""
+    if not entities:
+        return
+    ner_el = ET.SubElement(stc_el, "NER")
+    for entity_type, start, end, word in entities.items(text):
+        ET.SubElement(
+            ner_el, "ENTITY",
+            TYPE=entity_type,
+            START=str(start),
+            END=str(end)
+        ).text = word
+
+def add_meta_element(parent, metadata: dict):
+    """Append the book ``meta`` block."""
+    meta = ET.SubElement(parent, "meta")
+    ET.SubElement(meta, "TITLE").text = metadata.get("TITLE", "")
+    ET.SubElement(meta, "VOLUME").text = metadata.get("VOLUME", "")
+    ET.SubElement(meta, "AUTHOR").text = metadata.get("AUTHOR", "")
+    ET.SubElement(meta, "PERIOD").text = metadata.get("PERIOD", "")
+    ET.SubElement(meta, "LANGUAGE").text = metadata.get("LANGUAGE", "")
+    ET.SubElement(meta, "TRANSLATOR").text = metadata.get("TRANSLATOR", "")
+    ET.SubElement(meta, "SOURCE").text = metadata.get("SOURCE", "")
+    return meta
+
+def add_stc_elements(page_el, page_id: str, pairs: list[dict]) -> int:
+    """Append one STC per pair to ``page_el``; returns the number of pairs."""
+    for sent_id, pair in enumerate(pairs, 1):
+        stc_el = ET.SubElement(page_el, "STC", ID=f"{page_id}.{sent_id:02}")
+        
+        if pair["chinese"] and pair["vietnamese"]:
+            # Both Chinese and Vietnamese - use C and V tags
+            ET.SubElement(stc_el, "C").text = pair["chinese"]
+            ET.SubElement(stc_el, "V").text = pair["vietnamese"]
+        elif pair["chinese"]:
+            # Only Chinese - use C tag
+            ET.SubElement(stc_el, "C").text = pair["chinese"]
+        elif pair["vietnamese"]:
+            ET.SubElement(stc_el, "V").text = pair["vietnamese"]
+        
+        # NER block for the Vietnamese side
+        add_ner_element(stc_el, pair["entities"], pair["vietnamese"])
+    
+    return len(pairs)
+
+def stream_xml_for_book(pdf_path, metadata: dict, output_path="nam_hoa_kinh_parsed.xml", code="PKS_001", page_cache: str | None = None, learn_headers: bool = False):
+    """
+    Streaming variant of ``build_xml_for_book``.
+
+    Pages are read from a generator, sections are detected on the fly and each
+    finished PAGE is written to ``output_path`` and dropped, so peak memory is
+    bounded by the largest page rather than the whole book.
+    """
+    print(f"🔄 Streaming PDF: {pdf_path}")
+    
+    boilerplate = load_or_learn_boilerplate(pdf_path, protected=KNOWN_SECTIONS) if learn_headers else []
+    clean, rules_version = with_strip_list(clean_page, boilerplate, CLEANING_RULES_VERSION)
+    doc = pymupdf.open(pdf_path)
+    cache = PageCache(page_cache) if page_cache else None
+    pages = iter_pages(doc, clean=clean, cache=cache, rules_version=rules_version)
+    
+    total_pairs = 0
+    current_sect_id = None
+    
+    with XMLStreamWriter(output_path) as writer:
+        writer.start("root")
+        writer.start("FILE", ID=code)
+        writer.write(add_meta_element(ET.Element("root"), metadata))
+        
+        for sect_id, name, page_num, page_text in iter_sections(pages, known_sections=KNOWN_SECTIONS):
+            if sect_id != current_sect_id:
+                if current_sect_id is not None:
+                    writer.end()
+                writer.start("SECT", ID=f"{code}.{sect_id:03}", NAME=name)
+                current_sect_id = sect_id
+            
+            if not page_text:
+                continue
+            
+            page_id = f"{code}.{sect_id:03}.{page_num:03}"
+            page_el = ET.Element("PAGE", ID=page_id)
+            total_pairs += add_stc_elements(page_el, page_id, process_page(page_text))
+            writer.write(page_el)
+    
+    doc.close()
+    if cache is not None:
+        print(f"🗄️ Page cache: {cache.hits} hits, {cache.misses} misses")
+        cache.close()
+    
+    if isinstance(NER_MODEL, NERCache) and (NER_MODEL.hits or NER_MODEL.misses):
+        print(f"🏷️ NER cache: {NER_MODEL.hits} hits, {NER_MODEL.misses} misses ({NER_MODEL.stats()['hit_rate']:.0%})")
+    print(f"✅ Created XML file: {output_path}")
+    print(f"📊 Total sentence pairs: {total_pairs}")
+    
+    return output_path
+
+def build_xml_for_book(pdf_path, metadata: dict, output_path="nam_hoa_kinh_parsed.xml", code="PKS_001", workers: int = 1, stream: bool = False, page_cache: str | None = None, learn_headers: bool = False):
     """
     Parse Nam Hoa Kinh PDF and create XML with 1:1 Chinese-Vietnamese sentence pairs.
+
+    With ``workers > 1`` the PDF is split into page ranges that are cleaned, split,
+    paired and NER-tagged in separate processes; IDs match a serial run.
+    With ``stream=True`` the book is processed by ``stream_xml_for_book``.
+    ``page_cache`` is the path of a ``src.page_cache.PageCache`` database; when
+    set, extracted and cleaned page text is reused across runs.
+    With ``learn_headers=True`` running headers/footers are learned from the
+    book (``src.headers``) and stripped before ``clean_page``.
     """
+    if stream:
+        if workers > 1:
+            raise ValueError("Streaming mode is serial; use workers=1")
+        return stream_xml_for_book(pdf_path, metadata, output_path=output_path, code=code, page_cache=page_cache, learn_headers=learn_headers)
+    
     print(f"🔄 Processing PDF: {pdf_path}")
     
+    boilerplate = load_or_learn_boilerplate(pdf_path, protected=KNOWN_SECTIONS) if learn_headers else []
+    
     # Step 1: Read PDF
-    doc = pymupdf.open(pdf_path)
-    pages_text = [clean_page(p.get_text()) for p in doc]
+    if workers > 1:
+        worker = partial(_process_page_range, page_cache=page_cache, boilerplate=boilerplate)
+        ner_counters = {}
+        page_results = map_page_ranges(pdf_path, worker, workers, preload=[NER_MODEL], stats=_ner_counters, totals=ner_counters)
+        if isinstance(NER_MODEL, NERCache):
+            NER_MODEL.add_counters(ner_counters)
+        pages_text = [page_text for page_text, _ in page_results]
+        pages_pairs = [pairs for _, pairs in page_results]
+    else:
+        clean, rules_version = with_strip_list(clean_page, boilerplate, CLEANING_RULES_VERSION)
+        doc = pymupdf.open(pdf_path)
+        cache = PageCache(page_cache) if page_cache else None
+        pages = iter_pages(doc, clean=clean, cache=cache, rules_version=rules_version)
+        pages_text = [page_text for _, page_text in pages]
+        pages_pairs = None
+        if cache is not None:
+            print(f"🗄️ Page cache: {cache.hits} hits, {cache.misses} misses")
+            cache.close()
     print(f"📄 Extracted {len(pages_text)} pages")
     
     # Step 2: Detect sections
@@ -644,14 +748,7 @@ def build_xml_for_book(pdf_path, metadata: dict, output_path="nam_hoa_kinh_parse
     file_el = ET.SubElement(root, "FILE", ID=code)
     
     # Metadata
-    meta = ET.SubElement(file_el, "meta")
-    ET.SubElement(meta, "TITLE").text = metadata.get("TITLE", "")
-    ET.SubElement(meta, "VOLUME").text = metadata.get("VOLUME", "")
-    ET.SubElement(meta, "AUTHOR").text = metadata.get("AUTHOR", "")
-    ET.SubElement(meta, "PERIOD").text = metadata.get("PERIOD", "")
-    ET.SubElement(meta, "LANGUAGE").text = metadata.get("LANGUAGE", "")
-    ET.SubElement(meta, "TRANSLATOR").text = metadata.get("TRANSLATOR", "")
-    ET.SubElement(meta, "SOURCE").text = metadata.get("SOURCE", "")
+    add_meta_element(file_el, metadata)
     
     # Step 4: Process sections
     total_pairs = 0
@@ -665,65 +762,24 @@ def build_xml_for_book(pdf_path, metadata: dict, output_path="nam_hoa_kinh_parse
             if not page_text:
                 continue
             
-            page_el = ET.SubElement(
-                sect_el, "PAGE", ID=f"{code}.{sect_id:03}.{page_num:03}"
-            )
-            
-            # Extract sentences from page
-            sentences = split_into_sentences(page_text)
+            page_id = f"{code}.{sect_id:03}.{page_num:03}"
+            page_el = ET.SubElement(sect_el, "PAGE", ID=page_id)
             
-            # Pair Chinese and Vietnamese sentences
-            pairs = pair_chinese_vietnamese_sentences(sentences)
+            # Split, pair and NER (already done by the workers in parallel mode)
+            if pages_pairs is not None:
+                pairs = pages_pairs[page_num - 1]
+            else:
+                pairs = process_page(page_text)
             
             # Create STC elements
-            for sent_id, pair in enumerate(pairs, 1):
-                stc_el = ET.SubElement(
-                    page_el, "STC", ID=f"{code}.{sect_id:03}.{page_num:03}.{sent_id:02}"
-                )
-                
-                if pair["chinese"] and pair["vietnamese"]:
-                    # Both Chinese and Vietnamese - use C and V tags
-                    ET.SubElement(stc_el, "C").text = pair["chinese"]
-                    ET.SubElement(stc_el, "V").text = pair["vietnamese"]
-                    
-                    # Process NER with merging for Vietnamese sentences
-                    merged_entities = process_ner_with_merging(pair["vietnamese"])
-                    if merged_entities:
-                        ner_el = ET.SubElement(stc_el, "NER")
-                        for entity in merged_entities:
-                            entity_type = entity["entity"].split("-")[-1]
-                            ET.SubElement(
-                                ner_el, "ENTITY",
-                                TYPE=entity_type,
-                                START=str(entity.get("start", 0)),
-                                END=str(entity.get("end", 0))
-                            ).text = entity.get("word", "")
-
-                elif pair["chinese"]:
-                    # Only Chinese - use C tag
-                    ET.SubElement(stc_el, "C").text = pair["chinese"]
-                elif pair["vietnamese"]:
-                    ET.SubElement(stc_el, "V").text = pair["vietnamese"]
-                    
-                    # Process NER with merging for Vietnamese sentences
-                    merged_entities = process_ner_with_merging(pair["vietnamese"])
-                    if merged_entities:
-                        ner_el = ET.SubElement(stc_el, "NER")
-                        for entity in merged_entities:
-                            entity_type = entity["entity"].split("-")[-1]
-                            ET.SubElement(
-                                ner_el, "ENTITY",
-                                TYPE=entity_type,
-                                START=str(entity.get("start", 0)),
-                                END=str(entity.get("end", 0))
-                            ).text = entity.get("word", "")
-                
-                total_pairs += 1
+            total_pairs += add_stc_elements(page_el, page_id, pairs)
     
     # Step 5: Write XML
     tree = ET.ElementTree(root)
     write_pretty_xml(tree, output_path)
     
+    if isinstance(NER_MODEL, NERCache) and (NER_MODEL.hits or NER_MODEL.misses):
+        print(f"🏷️ NER cache: {NER_MODEL.hits} hits, {NER_MODEL.misses} misses ({NER_MODEL.stats()['hit_rate']:.0%})")
     print(f"✅ Created XML file: {output_path}")
     print(f"📊 Total sentence pairs: {total_pairs}")
     
@@ -737,6 +793,9 @@ if __name__ == "__main__":
         pdf_path="/home/octoopt/workspace/projects/learn-from-basics/nlp-vietnamese-phd/temp/Nam-hoa-kinh.pdf",
         metadata=BOOK_METADATA["NAM_HOA_KINH"],
         output_path=output_path,
-        code=code
+        code=code,
+        # Serial and uncached unless asked for, e.g. PARSE_WORKERS=8 PAGE_CACHE_PATH=.cache/page_cache.sqlite
+        workers=int(os.getenv("PARSE_WORKERS", "1")),
+        page_cache=os.getenv("PAGE_CACHE_PATH"),
     )
     print("des: ", des)
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Local stub of an OpenAI-compatible chat completions server, for exercising
+``NEROpenAI`` without network access or API quota.
+
+Every request waits ``--latency`` seconds and answers with the capitalized
+words of the user message as PER entities (so results can be checked against
+their sentence). Packed requests (``[ID] sentence`` lines) get an object keyed
+by ID. A ``--garble`` fraction of replies is malformed to exercise the
+retries: packed ones drop one ID, single ones are cut off mid-JSON. A ``--rate-limit`` fraction of requests gets a 429 with
+``retry-after-ms`` and ``x-ratelimit-reset-requests`` headers.
+
+    python -m debug.stub_openai_server serve [--port 8765]
+    python -m debug.stub_openai_server check [--sentences 200] [--concurrency 16] [--pack-tokens 1500] [--garble 0.2] [--in-loop]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.ner.openai import NEROpenAI, estimate_tokens
+
+CAPITALIZED = re.compile(r"\b[A-ZÀ-Ỹ]\w*")
+PACKED_LINE = re.compile(r"^\[(\d+)\] (.*)$", re.MULTILINE)
+
+def stub_entities(text: str) -> list[dict]:
+    return [
+        {"start": m.start(), "end": m.end(), "word": m.group(), "entity_group": "PER"}
+        for m in CAPITALIZED.finditer(text)
+    ]
+
+def stub_reply(text: str, garble: bool) -> str:
+    packed = PACKED_LINE.findall(text)
+    if not packed:
+        reply = "```json\n" + json.dumps(stub_entities(text), ensure_ascii=False) + "\n```"
+        # A reply cut off mid-JSON
+        return reply[: len(reply) // 2] if garble else reply
+    reply = {n: stub_entities(sentence) for n, sentence in packed}
+    if garble:
+        reply.pop(packed[-1][0])
+    return json.dumps(reply, ensure_ascii=False)
+
+def make_handler(latency: float, rate_limit: float, seed: int, garble: float = 0.0):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    counts = {"requests": 0, "rate_limited": 0, "prompt_tokens": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                counts["requests"] += 1
+                limited = rng.random() < rate_limit
+                garbled = rng.random() < garble
+                counts["rate_limited"] += limited
+                counts["prompt_tokens"] += sum(estimate_tokens(m["content"]) for m in body["messages"])
+            time.sleep(latency)
+
+            if limited:
+                payload = {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+                self._reply(429, payload, {"retry-after-ms": "50", "x-ratelimit-reset-requests": "50ms"})
+                return
+
+            content = stub_reply(body["messages"][-1]["content"], garbled)
+            self._reply(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+        def _reply(self, status: int, payload: dict, headers: dict | None = None):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler, counts
+
+def start_server(port: int = 0, latency: float = 0.05, rate_limit: float = 0.1, seed: int = 0, garble: float = 0.0):
+    """Run the stub in a background thread; returns ``(server, base_url, counts)``."""
+    handler, counts = make_handler(latency, rate_limit, seed, garble)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1", counts
+
+def check(args):
+    server, base_url, counts = start_server(0, args.latency, args.rate_limit, args.seed, args.garble)
+    sentences = [f"Câu {i}: Trang Tử gặp Huệ Thi ở nước Lương lần thứ {i}." for i in range(args.sentences)]
+    model = NEROpenAI(api_key="stub", base_url=base_url, max_concurrency=args.concurrency, backoff=0.05, pack_tokens=args.pack_tokens)
+
+    start = time.perf_counter()
+    if args.in_loop:
+        # As from a notebook cell: predict_batch called inside a running event loop
+        async def run():
+            return model.predict_batch(sentences)
+        results = asyncio.run(run())
+    else:
+        results = model.predict_batch(sentences)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    in_order = all(result == stub_entities(sentence) for sentence, result in zip(sentences, results))
+    print(
+        f"📨 {len(sentences)} sentences in {elapsed:.2f}s ({len(sentences) / elapsed:.1f} sent/s, "
+        f"sequential ≈ {len(sentences) * args.latency:.1f}s) | {counts['requests']} requests, "
+        f"{counts['rate_limited']} rate-limited, ≈{counts['prompt_tokens']} prompt tokens | results in order: {in_order}"
+        f" | {sum(not result for result in results)} without entities"
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["serve", "check"])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rate-limit", type=float, default=0.1, help="fraction of requests answered with 429")
+    parser.add_argument("--garble", type=float, default=0.0, help="fraction of malformed replies (packed: a sentence missing, single: cut-off JSON)")
+    parser.add_argument("--pack-tokens", type=int, default=None, help="pack sentences into requests of about this many tokens")
+    parser.add_argument("--sentences", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--in-loop", action="store_true", help="call predict_batch inside a running event loop")
+    args = parser.parse_args()
+
+    if args.command == "check":
+        check(args)
+        return
+    server, base_url, _ = start_server(args.port, args.latency, args.rate_limit, args.seed, args.garble)
+    print(f"🧪 Stub OpenAI server on {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
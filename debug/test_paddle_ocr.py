@@ -1,86 +1,63 @@
 import os
-import cv2
 import numpy as np
-from paddleocr import PaddleOCR
+from functools import lru_cache
 from pathlib import Path
 import re
 import unicodedata
-import html
 from PIL import Image
+import pymupdf
+
+from src.cleaning import get_profile
+from src.ocr import rasterize_page, rgb_to_bgr
+from src.script_classifier import is_vietnamese
+from src.sentences import sentence_spans
 
 def normalize(s: str) -> str:
     return unicodedata.normalize("NFC", s.strip())
 
+CLEANING = get_profile("ocr")
+
 def remove_html_entities(text):
     """Remove HTML entities comprehensively."""
-    try:
-        text = html.unescape(text)
-    except:
-        pass
-    
-    # Remove &quot; and &quote; variations
-    text = text.replace("&quot;", "")
-    text = text.replace("&quot", "")
-    text = text.replace("&quote;", "")
-    text = text.replace("&quote", "")
-    text = text.replace("quot;", "")
-    text = text.replace("quote;", "")
-    
-    # Remove other common entities
-    html_entities = {
-        "&amp;": "&", "&lt;": "<", "&gt;": ">", "&apos;": "'",
-        "&nbsp;": " ", "&hellip;": "...", "&mdash;": "—", "&ndash;": "–"
-    }
-    
-    for entity, replacement in html_entities.items():
-        text = text.replace(entity, replacement)
-    
-    # Clean remaining entities with regex
-    text = re.sub(r"&[a-zA-Z]+;?", "", text)
-    
-    return text
+    return CLEANING.remove_html_entities(text)
 
 def clean_text(text: str) -> str:
     """Clean text comprehensively."""
-    text = normalize(text)
-    text = remove_html_entities(text)
-    
-    clean_patterns = ["***", "---", "___", "..."]
-    for pattern in clean_patterns:
-        text = text.replace(pattern, "")
-    
-    # Remove invisible characters and normalize spaces
-    text = re.sub(r"[\u200b\u200e\u202a\u202c\ufeff]+", "", text)
-    text = re.sub(r"\s+", " ", text)
-    
-    return text.strip()
+    return CLEANING.clean_text(text)
 
-def is_vietnamese(text: str) -> bool:
-    """Check if text contains Vietnamese characters."""
-    vietnamese_pattern = re.compile(r'[àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđĐ]')
-    return bool(vietnamese_pattern.search(text))
+@lru_cache(maxsize=None)
+def get_ocr():
+    """PaddleOCR engine for Vietnamese, created on first use (importing paddle takes seconds)."""
+    from paddleocr import PaddleOCR
 
-# Initialize PaddleOCR with Vietnamese language
-print("🚀 Initializing PaddleOCR for Vietnamese...")
-ocr = PaddleOCR(use_angle_cls=True, lang='vi', show_log=False)
-print("✅ PaddleOCR initialized successfully!")
+    print("🚀 Initializing PaddleOCR for Vietnamese...")
+    ocr = PaddleOCR(use_angle_cls=True, lang='vi', show_log=False)
+    print("✅ PaddleOCR initialized successfully!")
+    return ocr
 
 def ocr_image_with_paddle(image_path, confidence_threshold=0.6):
-    """Extract text from image using PaddleOCR."""
+    """
+    Extract text from image using PaddleOCR.
+
+    ``image_path`` may also be an in-memory BGR array (e.g. a rendered PDF page),
+    which skips the disk read.
+    """
     try:
-        print(f"🔍 Processing: {os.path.basename(image_path)}")
-        
         # Read image
         if isinstance(image_path, str):
+            print(f"🔍 Processing: {os.path.basename(image_path)}")
+            import cv2
+
             img = cv2.imread(image_path)
             if img is None:
                 print(f"❌ Could not read image: {image_path}")
                 return "", []
         else:
+            print(f"🔍 Processing in-memory image {image_path.shape}")
             img = image_path
         
         # Perform OCR
-        result = ocr.ocr(img, cls=True)
+        result = get_ocr().ocr(img, cls=True)
         
         # Extract text and details
         extracted_text = []
@@ -220,30 +197,58 @@ def process_image_directory(image_dir, output_file="paddle_ocr_results.txt", sta
     
     return results
 
-def split_sentences(text: str) -> list[str]:
-    """Split text into Vietnamese sentences."""
-    text = clean_text(text)
+def process_pdf_pages_with_paddle(pdf_path, output_file="paddle_page_ocr_results.txt", start_line=13013,
+                                  scale=3.0, save_images=False, image_dir="page_images"):
+    """
+    OCR PDF pages with PaddleOCR straight from memory.
+
+    Each page is rendered into a pixmap whose samples are passed to PaddleOCR as
+    a NumPy view, so there is no PNG encode/decode; page images are written to
+    ``image_dir`` only when ``save_images`` is set.
+    """
+    if save_images:
+        os.makedirs(image_dir, exist_ok=True)
+    
+    doc = pymupdf.open(pdf_path)
+    results = []
+    line_number = start_line
     
-    # Split by common sentence delimiters
-    sentences = []
-    current_sentence = ""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for page_num in range(len(doc)):
+            pix, img = rasterize_page(doc[page_num], scale=scale)
+            
+            if save_images:
+                pix.save(os.path.join(image_dir, f"page_{page_num+1:03d}.png"))
+            
+            text, details = ocr_image_with_paddle(rgb_to_bgr(img))
+            
+            if text and len(text.strip()) > 5:
+                for sentence in split_sentences(text) or [text]:
+                    if len(sentence.strip()) > 3:
+                        filename = f"page_{page_num+1:03d}"
+                        f.write(f'{line_number}\t"{filename}": "{sentence}",\n')
+                        results.append({
+                            'line_number': line_number,
+                            'filename': filename,
+                            'text': sentence,
+                            'confidence': sum(d['confidence'] for d in details) / len(details) if details else 0
+                        })
+                        line_number += 1
+            
+            img = None
+            pix = None
     
-    for char in text:
-        current_sentence += char
-        if char in [".", "!", "?", "。", ";", ":"]:
-            if current_sentence.strip():
-                cleaned = clean_text(current_sentence)
-                if cleaned and len(cleaned) > 5:
-                    sentences.append(cleaned)
-            current_sentence = ""
+    doc.close()
     
-    # Add remaining text
-    if current_sentence.strip():
-        cleaned = clean_text(current_sentence)
-        if cleaned and len(cleaned) > 5:
-            sentences.append(cleaned)
+    print(f"✅ Page OCR results saved to: {output_file}")
+    print(f"📊 Total processed lines: {len(results)}")
     
-    return sentences
+    return results
+
+def split_sentences(text: str) -> list[str]:
+    """Split text into Vietnamese sentences."""
+    text = clean_text(text)
+    return [text[start:end] for start, end in sentence_spans(text, ".!?。;:") if end - start > 5]
 
 # Example usage functions
 def test_single_image():
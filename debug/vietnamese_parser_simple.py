@@ -2,10 +2,19 @@ import pymupdf
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
 import re
+import os
 import unicodedata
 from pathlib import Path
-import html
-from underthesea import ner
+
+from src.cleaning import get_profile
+from src.ner.cache import NERCache
+from src.ner.client import NERClient
+from src.ner.underthesea import NERUnderthesea
+from src.ner.windows import predict_windows
+from src.parallel import map_page_ranges
+from src.script_classifier import is_vietnamese, is_vietnamese_batch
+from src.sentences import sentence_spans
+from src.utils import XMLStreamWriter
 
 # ──────────────── CONSTANTS ────────────────
 BASED_ENTITY_GROUPS = ["PER", "ORG", "LOC", "MISC"]  # Common NER entity types
@@ -15,111 +24,143 @@ BASED_ENTITY_GROUPS = ["PER", "ORG", "LOC", "MISC"]  # Common NER entity types
 def normalize(s: str) -> str:
     return unicodedata.normalize("NFC", s.strip())
 
+CLEANING = get_profile("vietnamese")
+
 def remove_html_entities(text):
     """Remove HTML entities comprehensively."""
-    try:
-        text = html.unescape(text)
-    except:
-        pass
-    
-    # Remove &quot; and &quote; variations
-    text = text.replace("&quot;", "")
-    text = text.replace("&quot", "")
-    text = text.replace("&quote;", "")
-    text = text.replace("&quote", "")
-    text = text.replace("quot;", "")
-    text = text.replace("quote;", "")
-    
-    # Remove other common entities
-    html_entities = {
-        "&amp;": "&", "&lt;": "<", "&gt;": ">", "&apos;": "'",
-        "&nbsp;": " ", "&hellip;": "...", "&mdash;": "—", "&ndash;": "–"
-    }
-    
-    for entity, replacement in html_entities.items():
-        text = text.replace(entity, replacement)
-    
-    # Clean remaining entities with regex
-    text = re.sub(r"&[a-zA-Z]+;?", "", text)
-    
-    return text
+    return CLEANING.remove_html_entities(text)
 
 def clean_text(text: str) -> str:
     """Clean text comprehensively."""
-    text = normalize(text)
-    text = remove_html_entities(text)
-    
-    clean_patterns = ["***", "---", "___"]
-    for pattern in clean_patterns:
-        text = text.replace(pattern, "")
-    
-    # Remove invisible characters and normalize spaces
-    text = re.sub(r"[\u200b\u200e\u202a\u202c\ufeff]+", "", text)
-    text = re.sub(r"\s+", " ", text)
-    
-    return text.strip()
-
-def is_vietnamese(text: str) -> bool:
-    """Check if text contains Vietnamese characters."""
-    vietnamese_pattern = re.compile(r'[àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđĐ]')
-    return bool(vietnamese_pattern.search(text))
+    return CLEANING.clean_text(text)
 
 def split_sentences(text: str) -> list[str]:
     """Split text into Vietnamese sentences."""
     text = clean_text(text)
-    
-    # Split by common sentence delimiters
-    sentences = []
-    current_sentence = ""
-    
-    for char in text:
-        current_sentence += char
-        if char in [".", "!", "?", "。"]:
-            if current_sentence.strip():
-                cleaned = clean_text(current_sentence)
-                # Only keep Vietnamese sentences
-                if cleaned and len(cleaned) > 10 and is_vietnamese(cleaned):
-                    sentences.append(cleaned)
-            current_sentence = ""
-    
-    # Add remaining text if it's Vietnamese
-    if current_sentence.strip():
-        cleaned = clean_text(current_sentence)
-        if cleaned and len(cleaned) > 10 and is_vietnamese(cleaned):
-            sentences.append(cleaned)
-    
-    return sentences
+    candidates = [text[start:end] for start, end in sentence_spans(text, ".!?。") if end - start > 10]
+    # Only keep Vietnamese sentences
+    return [sent for sent, vietnamese in zip(candidates, is_vietnamese_batch(candidates)) if vietnamese]
 
-def ner_underthesea(text: str) -> list[dict]:
-    """Extract named entities from Vietnamese text."""
+# Shared underthesea CRF model (or a running src.ner.server when NER_SERVER_ADDRESS
+# is set), with results cached on disk by sentence when NER_CACHE_PATH is set
+NER_MODEL = NERClient() if os.getenv("NER_SERVER_ADDRESS") else NERUnderthesea(deep=False)
+if os.getenv("NER_CACHE_PATH"):
+    NER_MODEL = NERCache(NER_MODEL, path=os.environ["NER_CACHE_PATH"])
+# Tag a page's sentences together in windows of this many characters (0: one by one)
+NER_WINDOW_CHARS = int(os.getenv("NER_WINDOW_CHARS", "0"))
+
+def valid_entities(result) -> list[dict]:
+    """Filter for important entity types."""
     try:
-        result = ner(text)
-        # Filter for important entity types
-        valid_entities = [
+        return [
             ent for ent in result
             if ent.get("entity", "").split("-")[-1] in BASED_ENTITY_GROUPS
         ]
-        return valid_entities
     except:
         return []
 
+def ner_underthesea(text: str) -> list[dict]:
+    """Extract named entities from Vietnamese text."""
+    try:
+        return valid_entities(NER_MODEL.predict(text))
+    except:
+        return []
+
+def ner_underthesea_batch(texts: list[str]) -> list[list[dict]]:
+    """``ner_underthesea`` for many texts with one batched call."""
+    try:
+        if NER_WINDOW_CHARS:
+            results = predict_windows(NER_MODEL, texts, NER_WINDOW_CHARS)
+        else:
+            results = NER_MODEL.predict_batch(texts)
+    except:
+        # Fall back to one call per text so a single bad sentence only loses its own entities
+        return [ner_underthesea(text) for text in texts]
+    return [valid_entities(result) for result in results]
+
+def process_page(page_text: str) -> list[tuple[str, list[dict]]]:
+    """Split one page into Vietnamese sentences and tag them with NER in one batch."""
+    sentences = split_sentences(page_text)
+    for sentence in sentences:
+        print(sentence)
+    return list(zip(sentences, ner_underthesea_batch(sentences)))
+
+def _ner_counters() -> dict[str, int]:
+    """NER cache counters of this process (summed over the workers in parallel mode)."""
+    return NER_MODEL.counters() if isinstance(NER_MODEL, NERCache) else {}
+
+def _process_page_range(pdf_path: str, start: int, stop: int) -> list[list[tuple[str, list[dict]]]]:
+    """Worker for parallel mode: split and NER pages ``[start, stop)``."""
+    doc = pymupdf.open(pdf_path)
+    results = [process_page(doc[page_num].get_text()) for page_num in range(start, stop)]
+    doc.close()
+    return results
+
+def _iter_page_results(pdf_path: str):
+    """Split and NER each page in turn (serial and streaming modes); the PDF is closed once exhausted."""
+    doc = pymupdf.open(pdf_path)
+    try:
+        for page in doc:
+            yield process_page(page.get_text())
+    finally:
+        doc.close()
+
+def build_page_element(code: str, page_num: int, page_results: list[tuple[str, list[dict]]]) -> ET.Element:
+    """Build one PAGE element with its STC and NER children."""
+    page_el = ET.Element("PAGE", ID=f"{code}.{page_num:03}")
+    
+    # Create sentence elements
+    for sent_id, (sentence, entities) in enumerate(page_results, 1):
+        stc_el = ET.SubElement(
+            page_el, "STC", ID=f"{code}.{page_num:03}.{sent_id:02}"
+        )
+        stc_el.text = sentence
+        
+        # Add NER if entities found
+        if entities:
+            ner_el = ET.SubElement(stc_el, "NER")
+            for entity in entities:
+                entity_type = entity["entity"].split("-")[-1]
+                ET.SubElement(
+                    ner_el, "ENTITY",
+                    TYPE=entity_type,
+                    START=str(entity.get("start", 0)),
+                    END=str(entity.get("end", 0))
+                ).text = entity.get("word", "")
+    
+    return page_el
+
 # ──────────────── MAIN FUNCTION ────────────────
 
-def build_xml_for_book(pdf_path, metadata: dict, output_path="vietnamese_parsed.xml", code="VIE_001"):
-    """Parse Vietnamese text from PDF and create XML with NER."""
-    print(f"🔄 Processing PDF: {pdf_path}")
+def build_xml_for_book(pdf_path, metadata: dict, output_path="vietnamese_parsed.xml", code="VIE_001", workers: int = 1, stream: bool = False):
+    """
+    Parse Vietnamese text from PDF and create XML with NER.
+
+    With ``workers > 1`` pages are split and tagged in separate processes over
+    page ranges; IDs match a serial run. With ``stream=True`` pages are read
+    from a generator and each finished PAGE is written out and freed right
+    away, so memory is bounded by the largest page instead of the book.
+    """
+    if stream and workers > 1:
+        raise ValueError("Streaming mode is serial; use workers=1")
     
-    # Read PDF
-    doc = pymupdf.open(pdf_path)
-    pages_text = [p.get_text() for p in doc]
-    print(f"📄 Extracted {len(pages_text)} pages")
+    print(f"🔄 Processing PDF: {pdf_path}")
     
-    # Create XML structure
-    root = ET.Element("root")
-    file_el = ET.SubElement(root, "FILE", ID=code)
+    # Read PDF, split sentences and run NER
+    if workers > 1:
+        ner_counters = {}
+        pages_results = map_page_ranges(pdf_path, _process_page_range, workers, preload=[NER_MODEL], stats=_ner_counters, totals=ner_counters)
+        if isinstance(NER_MODEL, NERCache):
+            NER_MODEL.add_counters(ner_counters)
+        print(f"📄 Extracted {len(pages_results)} pages")
+    else:
+        pages_results = _iter_page_results(pdf_path)
+        if not stream:
+            pages_results = list(pages_results)
+            print(f"📄 Extracted {len(pages_results)} pages")
     
     # Metadata
-    meta = ET.SubElement(file_el, "meta")
+    meta = ET.Element("meta")
     ET.SubElement(meta, "TITLE").text = metadata.get("TITLE", "")
     ET.SubElement(meta, "VOLUME").text = metadata.get("VOLUME", "")
     ET.SubElement(meta, "AUTHOR").text = metadata.get("AUTHOR", "")
@@ -130,45 +171,39 @@ def build_xml_for_book(pdf_path, metadata: dict, output_path="vietnamese_parsed.
     
     total_sentences = 0
     
-    # Process each page
-    for page_num, page_text in enumerate(pages_text, 1):
-        sentences = split_sentences(page_text)
+    if stream:
+        # Write each page as soon as it is finished
+        with XMLStreamWriter(output_path) as writer:
+            writer.start("root")
+            writer.start("FILE", ID=code)
+            writer.write(meta)
+            for page_num, page_results in enumerate(pages_results, 1):
+                if not page_results:  # Skip empty pages
+                    continue
+                writer.write(build_page_element(code, page_num, page_results))
+                total_sentences += len(page_results)
+    else:
+        # Create XML structure
+        root = ET.Element("root")
+        file_el = ET.SubElement(root, "FILE", ID=code)
+        file_el.append(meta)
         
-        if not sentences:  # Skip empty pages
-            continue
-            
-        page_el = ET.SubElement(file_el, "PAGE", ID=f"{code}.{page_num:03}")
+        # Process each page
+        for page_num, page_results in enumerate(pages_results, 1):
+            if not page_results:  # Skip empty pages
+                continue
+            file_el.append(build_page_element(code, page_num, page_results))
+            total_sentences += len(page_results)
         
-        # Create sentence elements
-        for sent_id, sentence in enumerate(sentences, 1):
-            stc_el = ET.SubElement(
-                page_el, "STC", ID=f"{code}.{page_num:03}.{sent_id:02}"
-            )
-            stc_el.text = sentence
-            
-            # Add NER if entities found
-            entities = ner_underthesea(sentence)
-            print(sentence)
-            if entities:
-                ner_el = ET.SubElement(stc_el, "NER")
-                for entity in entities:
-                    entity_type = entity["entity"].split("-")[-1]
-                    ET.SubElement(
-                        ner_el, "ENTITY",
-                        TYPE=entity_type,
-                        START=str(entity.get("start", 0)),
-                        END=str(entity.get("end", 0))
-                    ).text = entity.get("word", "")
-            
-            total_sentences += 1
-    
-    # Write XML
-    tree = ET.ElementTree(root)
-    pretty = minidom.parseString(ET.tostring(tree.getroot(), encoding="utf-8"))
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(pretty.toprettyxml(indent="  "))
-    
+        # Write XML
+        tree = ET.ElementTree(root)
+        pretty = minidom.parseString(ET.tostring(tree.getroot(), encoding="utf-8"))
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(pretty.toprettyxml(indent="  "))
+    
+    if isinstance(NER_MODEL, NERCache) and (NER_MODEL.hits or NER_MODEL.misses):
+        print(f"🏷️ NER cache: {NER_MODEL.hits} hits, {NER_MODEL.misses} misses ({NER_MODEL.stats()['hit_rate']:.0%})")
     print(f"✅ Created XML file: {output_path}")
     print(f"📊 Total Vietnamese sentences: {total_sentences}")
     
-    return output_path
\ No newline at end of file
+    return output_path
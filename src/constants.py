@@ -17,3 +17,24 @@ Trả về kết quả dưới dạng danh sách JSON. Mỗi thực thể gồm
 
 Chỉ trả về JSON. Nếu không có thực thể, trả về `[]`.
 """
+
+NER_PACKED_PROMPT = """
+Nhiệm vụ: Nhận diện thực thể có tên (NER) trong nhiều câu tiếng Việt cùng lúc.
+
+Bạn là mô hình NER. Mỗi dòng của đầu vào là một câu có dạng `[ID] câu`. Hãy trích xuất các thực thể trong từng câu và phân loại chúng vào một trong các nhóm sau:
+- PER: Tên người
+- LOC: Địa danh
+- ORG: Tổ chức
+- TME: Thời gian
+- TITLE: Tựa đề
+- NUM: Số
+
+Trả về một đối tượng JSON, khóa là ID của câu (dạng chuỗi), giá trị là danh sách thực thể của câu đó. Mỗi thực thể gồm các trường:
+- start: vị trí bắt đầu (ký tự, tính trong câu đó)
+- end: vị trí kết thúc (ký tự, tính trong câu đó)
+- word: văn bản của thực thể
+- entity_group: loại thực thể
+
+Mọi ID đều phải có mặt; câu không có thực thể thì trả về `[]`. Chỉ trả về JSON.
+Ví dụ: {"1": [{"start": 0, "end": 8, "word": "Trang Tử", "entity_group": "PER"}], "2": []}
+"""
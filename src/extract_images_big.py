@@ -1,10 +1,62 @@
 import pymupdf
+import hashlib
+import io
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+from src.ocr import adaptive_scale
 from pathlib import Path
 from PIL import Image
 
-def extract_images_from_pdf(pdf_path, output_dir="extracted_images_big", target_count=20, min_size=(800, 600)):
-    """Extract images from PDF with size filtering and upscaling options."""
+# Formats written as-is from the PDF stream when no resize/conversion is needed
+PASSTHROUGH_EXTS = {"jpeg": "jpg", "jpg": "jpg", "jpx": "jp2"}
+
+def _save_png(img, img_path, min_size):
+    """Convert/upscale ``img`` if needed and save it as PNG; returns the final size."""
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    
+    if min_size and (img.width < min_size[0] or img.height < min_size[1]):
+        # Calculate new size maintaining aspect ratio, upscale using LANCZOS (high quality)
+        ratio = max(min_size[0]/img.width, min_size[1]/img.height)
+        img = img.resize((int(img.width * ratio), int(img.height * ratio)), Image.Resampling.LANCZOS)
+    
+    img.save(img_path, "PNG")
+    return img.width, img.height
+
+def _encode_image(job):
+    """
+    Worker: decode image bytes, convert/upscale if needed and save as PNG.
+
+    Returns the final ``(width, height)``, or an error message when Pillow
+    cannot decode the stream (e.g. JBIG2), so one bad image does not stop the pool.
+    """
+    data, img_path, min_size = job
+    try:
+        return _save_png(Image.open(io.BytesIO(data)), img_path, min_size)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+def _render_image(doc, xref, img_path, min_size):
+    """Fallback for streams Pillow cannot read: let MuPDF decode the image."""
+    pix = pymupdf.Pixmap(doc, xref)
+    if pix.alpha or pix.n - pix.alpha > 3:
+        pix = pymupdf.Pixmap(pymupdf.csRGB, pix)
+    mode = "L" if pix.n == 1 else "RGB"
+    return _save_png(Image.frombytes(mode, (pix.width, pix.height), pix.samples), img_path, min_size)
+
+def extract_images_from_pdf(pdf_path, output_dir="extracted_images_big", target_count=20, min_size=(800, 600),
+                            workers=None, filename_template="page_{page:03d}_img_{index:03d}_big.{ext}",
+                            manifest_name="manifest.json"):
+    """
+    Extract unique images from PDF with size filtering and upscaling options.
+    
+    Images are deduplicated by xref and by content hash, so a logo repeated on
+    every page is extracted once. JPEG/JPX streams that need no resize or colour
+    conversion are written as-is; the rest are decoded, upscaled and PNG-encoded
+    in a worker pool. ``manifest_name`` (in ``output_dir``) maps every page to
+    the unique images it shows.
+    """
     
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
@@ -19,90 +71,116 @@ def extract_images_from_pdf(pdf_path, output_dir="extracted_images_big", target_
     doc = pymupdf.open(pdf_path)
     
     extracted_images = []
-    image_count = 0
+    by_xref = {}   # xref -> img_info (None for skipped images)
+    by_hash = {}   # content hash -> img_info
+    pages = {}     # page number -> filenames of the unique images on that page
+    jobs = []
     
     # Go through each page
     for page_num in range(len(doc)):
         page = doc[page_num]
-        image_list = page.get_images()
+        image_list = page.get_images(full=True)
+        pages[page_num + 1] = []
         
         print(f"📄 Page {page_num+1}: Found {len(image_list)} images")
         
-        # Extract each image from the page
         for img_index, img in enumerate(image_list):
-            if image_count >= target_count:
-                print(f"✅ Target of {target_count} images reached!")
-                break
-                
-            try:
-                # Get image data
-                xref = img[0]
-                pix = pymupdf.Pixmap(doc, xref)
-                
-                # Only process RGB or GRAY images
-                if pix.n - pix.alpha < 4:
-                    original_size = (pix.width, pix.height)
-                    
-                    # Create filename
-                    img_filename = f"page_{page_num+1:03d}_img_{img_index+1:03d}_big.png"
-                    img_path = os.path.join(output_dir, img_filename)
+            xref = img[0]
+            if xref not in by_xref:
+                if len(extracted_images) >= target_count:
+                    continue
+                try:
+                    by_xref[xref] = img_info = None
+                    raw = doc.extract_image(xref)
+                    digest = hashlib.sha1(raw["image"]).hexdigest()
                     
-                    # Save at original resolution first
-                    pix.save(img_path)
-                    
-                    # Check if image is too small, upscale if needed
-                    if pix.width < min_size[0] or pix.height < min_size[1]:
-                        print(f"🔍 Upscaling small image: {original_size} -> target {min_size}")
+                    if digest in by_hash:
+                        by_xref[xref] = img_info = by_hash[digest]
+                    else:
+                        original_size = (raw["width"], raw["height"])
+                        too_small = bool(min_size) and (original_size[0] < min_size[0] or original_size[1] < min_size[1])
+                        passthrough = raw["ext"] in PASSTHROUGH_EXTS and raw.get("colorspace", 3) < 4 and not too_small
+                        ext = PASSTHROUGH_EXTS[raw["ext"]] if passthrough else "png"
                         
-                        # Load with PIL and upscale
-                        pil_img = Image.open(img_path)
+                        # Create filename
+                        img_filename = filename_template.format(page=page_num+1, index=img_index+1, ext=ext)
+                        img_path = os.path.join(output_dir, img_filename)
                         
-                        # Calculate new size maintaining aspect ratio
-                        ratio = max(min_size[0]/pil_img.width, min_size[1]/pil_img.height)
-                        new_size = (int(pil_img.width * ratio), int(pil_img.height * ratio))
+                        img_info = {
+                            'filename': img_filename,
+                            'path': img_path,
+                            'page': page_num + 1,
+                            'index': img_index + 1,
+                            'xref': xref,
+                            'hash': digest,
+                            'passthrough': passthrough,
+                            'original_size': f"{original_size[0]}x{original_size[1]}",
+                            'final_size': f"{original_size[0]}x{original_size[1]}",
+                        }
                         
-                        # Upscale using LANCZOS (high quality)
-                        upscaled_img = pil_img.resize(new_size, Image.Resampling.LANCZOS)
-                        upscaled_img.save(img_path, 'PNG', quality=100)
+                        if passthrough:
+                            # Original stream bytes, no decode/re-encode
+                            with open(img_path, "wb") as f:
+                                f.write(raw["image"])
+                        else:
+                            jobs.append((img_info, (raw["image"], img_path, min_size)))
                         
-                        final_size = new_size
-                    else:
-                        final_size = original_size
-                    
-                    # Get image info
-                    img_info = {
-                        'filename': img_filename,
-                        'path': img_path,
-                        'page': page_num + 1,
-                        'index': img_index + 1,
-                        'original_size': f"{original_size[0]}x{original_size[1]}",
-                        'final_size': f"{final_size[0]}x{final_size[1]}",
-                        'file_size': os.path.getsize(img_path)
-                    }
-                    
-                    extracted_images.append(img_info)
-                    image_count += 1
-                    
-                    print(f"💾 Saved: {img_filename}")
-                    print(f"   📏 Size: {img_info['original_size']} -> {img_info['final_size']}")
-                    print(f"   💾 File size: {img_info['file_size']} bytes")
-                
-                pix = None
+                        by_hash[digest] = by_xref[xref] = img_info
+                        extracted_images.append(img_info)
                 
-            except Exception as e:
-                print(f"⚠️ Error processing image {img_index+1} on page {page_num+1}: {e}")
-        
-        # Break if we have enough images
-        if image_count >= target_count:
-            break
+                except Exception as e:
+                    print(f"⚠️ Error processing image {img_index+1} on page {page_num+1}: {e}")
+            
+            img_info = by_xref.get(xref)
+            if img_info and img_info['filename'] not in pages[page_num + 1]:
+                pages[page_num + 1].append(img_info['filename'])
     
     doc.close()
     
+    # Decode, upscale and encode in parallel
+    if jobs:
+        print(f"⚙️ Encoding {len(jobs)} images ({len(extracted_images) - len(jobs)} written as-is)")
+        if workers == 1:
+            sizes = [_encode_image(job) for _, job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                sizes = list(pool.map(_encode_image, [job for _, job in jobs]))
+        
+        failed = []
+        doc = None
+        for (img_info, (_, img_path, _)), size in zip(jobs, sizes):
+            if isinstance(size, str):
+                # Pillow could not decode it: re-render through MuPDF, else skip the image
+                doc = doc or pymupdf.open(pdf_path)
+                try:
+                    size = _render_image(doc, img_info['xref'], img_path, min_size)
+                except Exception as e:
+                    print(f"⚠️ Skipping image {img_info['filename']}: {size}; re-render failed: {e}")
+                    failed.append(img_info)
+                    continue
+            img_info['final_size'] = f"{size[0]}x{size[1]}"
+        if doc is not None:
+            doc.close()
+        
+        if failed:
+            skipped = {img_info['filename'] for img_info in failed}
+            extracted_images = [img_info for img_info in extracted_images if img_info['filename'] not in skipped]
+            pages = {page: [name for name in names if name not in skipped] for page, names in pages.items()}
+    
+    for img_info in extracted_images:
+        img_info['file_size'] = os.path.getsize(img_info['path'])
+    
+    # Manifest: unique images + which of them each page shows
+    manifest_path = os.path.join(output_dir, manifest_name)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"images": extracted_images, "pages": pages}, f, ensure_ascii=False, indent=2)
+    
     # Summary
     print(f"\n📊 SUMMARY:")
     print(f"   📁 Output directory: {output_dir}")
-    print(f"   🖼️ Total images extracted: {len(extracted_images)}")
-    print(f"   📄 Pages processed: {page_num+1}")
+    print(f"   🖼️ Unique images extracted: {len(extracted_images)}")
+    print(f"   📄 Pages processed: {len(pages)}")
+    print(f"   🗂️ Manifest: {manifest_path}")
     
     if len(extracted_images) < target_count:
         print(f"   ⚠️ Only found {len(extracted_images)} images (target was {target_count})")
@@ -111,14 +189,25 @@ def extract_images_from_pdf(pdf_path, output_dir="extracted_images_big", target_
     
     return extracted_images
 
-def convert_pages_to_images(pdf_path, output_dir="page_images_big", target_count=20, resolution_scale=4.0):
-    """Convert PDF pages to high-resolution images."""
+def convert_pages_to_images(pdf_path, output_dir="page_images_big", target_count=20, resolution_scale=4.0, target_xheight=None, small_text_share=None):
+    """
+    Convert PDF pages to high-resolution images.
+    
+    With ``target_xheight`` (pixels) each page gets its own scale: the lowest one
+    at which its body text (the dominant font size) reaches that x-height,
+    capped at ``resolution_scale`` (see ``src.ocr.adaptive_scale``). Smaller
+    footnotes then get fewer pixels; ``small_text_share`` (e.g. 0.05) sizes for
+    the smallest font holding that share of the page's characters instead.
+    """
     
     os.makedirs(output_dir, exist_ok=True)
     
     pdf_path = Path(pdf_path)
     print(f"🔄 Converting PDF pages to HIGH-RES images: {pdf_path.name}")
-    print(f"🎯 Resolution scale: {resolution_scale}x")
+    if target_xheight:
+        print(f"🎯 Adaptive resolution: target x-height {target_xheight}px (max {resolution_scale}x)")
+    else:
+        print(f"🎯 Resolution scale: {resolution_scale}x")
     
     doc = pymupdf.open(pdf_path)
     converted_images = []
@@ -130,7 +219,11 @@ def convert_pages_to_images(pdf_path, output_dir="page_images_big", target_count
             page = doc[page_num]
             
             # Convert page to very high-resolution image
-            mat = pymupdf.Matrix(resolution_scale, resolution_scale)
+            if target_xheight:
+                page_scale = adaptive_scale(page, target_xheight=target_xheight, max_scale=resolution_scale, small_text_share=small_text_share)
+            else:
+                page_scale = resolution_scale
+            mat = pymupdf.Matrix(page_scale, page_scale)
             pix = page.get_pixmap(matrix=mat)
             
             # Save as high-quality PNG
@@ -143,7 +236,7 @@ def convert_pages_to_images(pdf_path, output_dir="page_images_big", target_count
                 'path': img_path,
                 'page': page_num + 1,
                 'size': f"{pix.width}x{pix.height}",
-                'resolution_scale': f"{resolution_scale}x",
+                'resolution_scale': f"{page_scale:g}x",
                 'file_size': os.path.getsize(img_path)
             }
             
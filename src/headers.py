@@ -0,0 +1,152 @@
+"""
+Running header/footer learning.
+
+Instead of hand-written, book-specific regexes, one linear pre-pass over the
+raw page texts collects the first and last lines of every page, keyed by a
+digit-insensitive signature ("Trang 12" and "Trang 13" share one), and keeps
+the lines that repeat on many pages. They are emitted as an anchored,
+line-level strip-list, cached as JSON next to the PDF:
+
+    book.pdf -> book.pdf.headers.json
+"""
+
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Callable, Iterable
+
+from src.sections import compile_boilerplate
+
+DIGITS = re.compile(r"\d+")
+SPACES = re.compile(r"\s+")
+# Bump when the learning rules change (invalidates cached strip-lists)
+HEADERS_VERSION = 2
+
+
+def line_signature(line: str) -> tuple[str, ...]:
+    """
+    Normalized line split around its digit runs (page numbers vary per page).
+
+    A tuple rather than a string with a placeholder character, since no code
+    point is safe from legacy PDF fonts (they do emit private-use ones).
+    """
+    line = SPACES.sub(" ", unicodedata.normalize("NFC", line)).strip()
+    return tuple(DIGITS.split(line))
+
+
+def signature_pattern(signature: tuple[str, ...]) -> str:
+    """Line-anchored regex for a signature: digit runs match any number, spaces any whitespace."""
+    parts = [re.escape(part).replace(r"\ ", " ") for part in signature]
+    body = r"\d+".join(parts).replace(" ", r"[ \t]+")
+    return rf"^[ \t]*{body}[ \t]*$"
+
+
+def edge_lines(text: str, n_lines: int = 2) -> list[str]:
+    """The first and last ``n_lines`` non-empty lines of a page."""
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(lines) <= 2 * n_lines:
+        return lines
+    return lines[:n_lines] + lines[-n_lines:]
+
+
+def learn_boilerplate(
+    pages: Iterable[str],
+    n_lines: int = 2,
+    min_ratio: float = 0.2,
+    min_pages: int = 3,
+    max_chars: int = 80,
+    protected: Iterable[str] = (),
+) -> list[str]:
+    """
+    Learn running headers/footers from raw page texts in one pass.
+
+    A line signature is boilerplate when it is among the edge lines of at least
+    ``min_ratio`` of the pages (and of ``min_pages`` pages). ``min_ratio`` is
+    kept low because many books alternate headers between odd and even pages.
+    Lines longer than ``max_chars`` are taken to be body text. Lines equal to a ``protected`` string (e.g. section titles) are never
+    stripped. Returns regex patterns, most frequent first.
+    """
+    counts = Counter()
+    n_pages = 0
+    for text in pages:
+        n_pages += 1
+        # A line counts once per page, even if it is both first and last
+        counts.update({line_signature(line) for line in edge_lines(text, n_lines)})
+
+    keep = {line_signature(text) for text in protected}
+    threshold = max(min_pages, min_ratio * n_pages)
+    return [
+        signature_pattern(signature)
+        for signature, count in counts.most_common()
+        if count >= threshold and 0 < len("0".join(signature)) <= max_chars and signature not in keep
+    ]
+
+
+def compile_strip_list(patterns: list[str]) -> re.Pattern | None:
+    """One multiline regex for a learned strip-list (``None`` when it is empty)."""
+    if not patterns:
+        return None
+    # Drop the line break too, so a stripped header does not become a paragraph break
+    return compile_boilerplate([rf"{pattern}\n?" for pattern in patterns], flags=re.MULTILINE)
+
+
+def with_strip_list(
+    clean: Callable[[str], str],
+    patterns: list[str],
+    rules_version: str = "1",
+) -> tuple[Callable[[str], str], str]:
+    """
+    Wrap a page cleaner so learned header/footer lines are removed from the raw text first.
+
+    The text is NFC-normalized before stripping, since the patterns are learned
+    from NFC signatures; decomposed (NFD) pages would otherwise never match a
+    header with diacritics. Returns ``(clean, rules_version)``; the version gets a hash of the strip-list
+    appended, so page-cache entries cleaned with another strip-list are not reused.
+    """
+    strip_re = compile_strip_list(patterns)
+    if strip_re is None:
+        return clean, rules_version
+
+    def clean_without_boilerplate(text: str) -> str:
+        return clean(strip_re.sub("", unicodedata.normalize("NFC", text)))
+
+    digest = hashlib.sha256("\n".join([str(HEADERS_VERSION), *patterns]).encode("utf-8")).hexdigest()[:12]
+    return clean_without_boilerplate, f"{rules_version}+headers:{digest}"
+
+
+def load_or_learn_boilerplate(pdf_path: str, protected: Iterable[str] = (), **params) -> list[str]:
+    """
+    Strip-list for ``pdf_path``, from ``<pdf_path>.headers.json`` when it is still valid.
+
+    The cache is keyed by the PDF's size and modification time plus the learning
+    parameters; otherwise the pages are read once and the result is saved.
+    """
+    protected = sorted(protected)
+    stat = os.stat(pdf_path)
+    key = {
+        "version": HEADERS_VERSION,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "params": params,
+        "protected": protected,
+    }
+    cache_path = f"{pdf_path}.headers.json"
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            return cached["patterns"]
+
+    import pymupdf
+
+    doc = pymupdf.open(pdf_path)
+    patterns = learn_boilerplate((page.get_text() for page in doc), protected=protected, **params)
+    doc.close()
+
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"key": key, "patterns": patterns}, f, ensure_ascii=False, indent=2)
+    print(f"🧹 Learned {len(patterns)} header/footer lines -> {cache_path}")
+    return patterns
@@ -1,7 +1,48 @@
 from abc import abstractmethod, ABC
 
 
+def package_versions(*names: str) -> str:
+    """``name==version`` of each installed distribution (``name==?`` when missing), for ``NERBase.version``."""
+    from importlib.metadata import PackageNotFoundError, version
+
+    found = []
+    for name in names:
+        try:
+            found.append(f"{name}=={version(name)}")
+        except PackageNotFoundError:
+            found.append(f"{name}==?")
+    return ",".join(found)
+
+
 class NERBase(ABC):
     @abstractmethod
     def predict(self, text: str) -> list[dict]:
         pass
+
+    def predict_batch(self, texts: list[str], batch_size: int = 32) -> list[list[dict]]:
+        """
+        Entities for each of ``texts``, in order.
+
+        The default calls ``predict`` once per text; backends that can run
+        several texts per model call override it.
+        """
+        results = []
+        for start in range(0, len(texts), batch_size):
+            results.extend(self.predict(text) for text in texts[start : start + batch_size])
+        return results
+
+    @property
+    def version(self) -> str:
+        """
+        Library and model versions behind the results, part of the ``NERCache``
+        key so an upgrade does not serve entities of the old model. The
+        default is empty.
+        """
+        return ""
+
+    def warm_up(self):
+        """
+        Load what would otherwise be loaded on first use (libraries, model
+        weights, HTTP clients), e.g. before timing or serving. The default
+        does nothing.
+        """
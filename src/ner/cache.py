@@ -0,0 +1,251 @@
+"""
+Persistent NER result cache shared by every ``NERBase`` backend.
+
+Results are keyed by backend class, model name, backend version
+(``NERBase.version``: library versions, model revision, prompts) and the
+normalized sentence (NFC, surrounding whitespace stripped), so the same
+``STC`` is tagged once across editions and re-runs, and again after an
+upgrade. An in-memory LRU sits in front of a SQLite database that the worker
+processes of ``src.parallel`` can share:
+
+    python -m src.ner.cache stats
+    python -m src.ner.cache clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+
+from src.ner.base import NERBase
+
+DEFAULT_CACHE_PATH = os.getenv("NER_CACHE_PATH", ".cache/ner_cache.sqlite")
+CREATE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS entities ("
+    "key TEXT PRIMARY KEY, result TEXT NOT NULL, created REAL NOT NULL)"
+)
+# SQLite's default limit on host parameters is 999
+LOOKUP_CHUNK = 500
+
+
+def normalize_sentence(text: str) -> str:
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def json_default(value):
+    """``json.dumps`` fallback for NumPy scalars (e.g. scores from transformers pipelines)."""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _shift_offsets(entities: list, shift: int) -> list:
+    if shift:
+        for ent in entities:
+            if isinstance(ent, dict) and "start" in ent and "end" in ent:
+                ent["start"] += shift
+                ent["end"] += shift
+    return entities
+
+
+class NERCache(NERBase):
+    """
+    Caching wrapper around any ``NERBase``.
+
+    The wrapped model tags the normalized sentence, and entity offsets are
+    shifted back onto the original text, so a hit returns exactly what a miss
+    would. Texts that are not already NFC cannot be mapped that way and go
+    straight to the model. Results round-trip through JSON, so tuples come
+    back as lists, on hits and misses alike.
+
+    The database is opened lazily in each process (a forked worker never
+    reuses its parent's connection); SQLite serializes the writes. The key
+    namespace is also resolved on first use, since asking an ``NERClient``
+    for its model name is a request to the server.
+    """
+
+    def __init__(
+        self,
+        model: NERBase,
+        path: str = DEFAULT_CACHE_PATH,
+        model_name: str | None = None,
+        memory_items: int = 10_000,
+    ):
+        self.model = model
+        self.path = path
+        self._model_name = model_name
+        self._namespace = None
+        self.memory_items = memory_items
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._conn = None
+        self._pid = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def namespace(self) -> str:
+        if self._namespace is None:
+            name = self._model_name or getattr(self.model, "model_name", "")
+            self._namespace = f"{type(self.model).__name__}:{name}:{self.model.version}"
+        return self._namespace
+
+    @property
+    def version(self) -> str:
+        return self.model.version
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(CREATE_TABLE)
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    def make_key(self, sentence: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{sentence}".encode("utf-8")).hexdigest()
+
+    def warm_up(self):
+        self.model.warm_up()
+        self.conn  # opens the database
+
+    def predict(self, text: str) -> list:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: list[str], batch_size: int = 32) -> list[list]:
+        results = [None] * len(texts)
+        keys = {}  # key -> (normalized sentence, [(index, offset shift)])
+        direct = []
+        for i, text in enumerate(texts):
+            sentence = normalize_sentence(text)
+            if sentence not in text:
+                direct.append(i)
+                continue
+            key = self.make_key(sentence)
+            keys.setdefault(key, (sentence, []))[1].append((i, text.index(sentence)))
+
+        found = self._lookup(list(keys))
+        missing = [key for key in keys if key not in found]
+        if missing:
+            outputs = self.model.predict_batch([keys[key][0] for key in missing], batch_size)
+            stored = {key: json.dumps(output, ensure_ascii=False, default=json_default) for key, output in zip(missing, outputs)}
+            self._store(stored)
+            found.update(stored)
+        self.misses += len(missing)
+
+        for key, (_, targets) in keys.items():
+            for i, shift in targets:
+                results[i] = _shift_offsets(json.loads(found[key]), shift)
+
+        if direct:
+            self.bypassed += len(direct)
+            outputs = self.model.predict_batch([texts[i] for i in direct], batch_size)
+            for i, output in zip(direct, outputs):
+                results[i] = json.loads(json.dumps(output, ensure_ascii=False, default=json_default))
+        return results
+
+    def _lookup(self, keys: list[str]) -> dict[str, str]:
+        """Cached JSON per key, from memory first, then from disk in chunked queries."""
+        found = {}
+        on_disk = []
+        for key in keys:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                found[key] = self._memory[key]
+            else:
+                on_disk.append(key)
+        self.memory_hits += len(found)
+
+        for start in range(0, len(on_disk), LOOKUP_CHUNK):
+            chunk = on_disk[start : start + LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(f"SELECT key, result FROM entities WHERE key IN ({placeholders})", chunk).fetchall()
+            for key, result in rows:
+                found[key] = result
+                self._remember(key, result)
+            self.disk_hits += len(rows)
+        return found
+
+    def _store(self, results: dict[str, str]):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO entities (key, result, created) VALUES (?, ?, ?)",
+            [(key, result, now) for key, result in results.items()],
+        )
+        self.conn.commit()
+        for key, result in results.items():
+            self._remember(key, result)
+
+    def _remember(self, key: str, result: str):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def counters(self) -> dict[str, int]:
+        """Raw lookup counters, e.g. for ``src.parallel.map_page_ranges(stats=...)``."""
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+        }
+
+    def add_counters(self, counters: dict[str, int]):
+        """Add lookups counted elsewhere (worker processes) to this cache's stats."""
+        for name, value in counters.items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the NER result cache.")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--path", default=DEFAULT_CACHE_PATH)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.path, timeout=30)
+    conn.execute(CREATE_TABLE)
+    if args.command == "clear":
+        conn.execute("DELETE FROM entities")
+        conn.commit()
+        conn.execute("VACUUM")
+        print(f"🗑️ Cleared NER cache: {args.path}")
+    else:
+        count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(result)), 0) FROM entities").fetchone()
+        print(f"path: {args.path}")
+        print(f"entries: {count}")
+        print(f"bytes: {size}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Cost-aware NER cascade: the cheapest model tags everything, more expensive
+models only see the texts it is unsure about.
+
+    NERCascade([NERUnderthesea(deep=False), NERHugginFace(mode="local"), NEROpenAI(...)], min_score=0.8)
+
+Each tier runs one ``predict_batch`` over the texts still in doubt. A text
+moves on to the next tier when its current entities
+
+- include one scoring below ``min_score`` (entities without a score, as from
+  the CRF model or an LLM, count as confident),
+- look fragmented (``check_fragments``): same-type entities separated only by
+  whitespace where the second is not an ``I-`` continuation, as when ``NAM``,
+  ``HOA`` and ``KINH`` come back as three PER entities,
+- or, from the second tier on, disagree with the previous tier
+  (``check_agreement``): an entity the previous tier was confident about is
+  missing or has another type.
+
+The last tier's answer is final. ``stats()`` reports texts, calls,
+escalations and time per tier.
+"""
+
+import time
+
+from src.ner.base import NERBase
+
+# Long label names of the HF models -> underthesea's short ones
+LABEL_ALIASES = {
+    "PERSON": "PER",
+    "ORGANIZATION": "ORG",
+    "LOCATION": "LOC",
+    "MISCELLANEOUS": "MISC",
+}
+
+
+def entity_label(entity: dict) -> str:
+    """Canonical type of an entity, from ``entity_group`` or a ``B-``/``I-`` tag."""
+    label = entity.get("entity_group") or entity.get("entity", "").split("-")[-1]
+    return LABEL_ALIASES.get(label, label)
+
+
+def normalize_entities(entities: list[dict]) -> list[dict]:
+    """
+    Entities of any backend in one form: ``entity_group`` holds the canonical
+    type and ``entity`` the tag (its ``B-``/``I-`` prefix kept), so parsers that
+    read either key work with every tier.
+    """
+    normalized = []
+    for entity in entities:
+        label = entity_label(entity)
+        tag = entity.get("entity") or ""
+        prefix = tag[:2] if tag[:2] in ("B-", "I-") else ""
+        normalized.append({**entity, "entity_group": label, "entity": prefix + label})
+    return normalized
+
+
+def fragments(text: str, entities: list[dict]) -> set[int]:
+    """Indices of entities that are part of a whitespace-separated run of same-type, non-continuation entities."""
+    order = sorted(range(len(entities)), key=lambda i: entities[i].get("start", 0))
+    found = set()
+    for a, b in zip(order, order[1:]):
+        first, second = entities[a], entities[b]
+        if (
+            first["entity_group"] == second["entity_group"]
+            and not second["entity"].startswith("I-")
+            and not text[first.get("end", 0) : second.get("start", 0)].strip()
+        ):
+            found.update((a, b))
+    return found
+
+
+def span(entity: dict) -> tuple:
+    return entity["entity_group"], entity.get("start", 0), entity.get("end", 0)
+
+
+class NERCascade(NERBase):
+    def __init__(
+        self,
+        tiers: list[NERBase],
+        min_score: float = 0.8,
+        check_fragments: bool = True,
+        check_agreement: bool = True,
+        names: list[str] | None = None,
+    ):
+        """
+        ``tiers`` go from cheapest to most expensive. ``names`` label the tiers
+        in ``stats()`` and in ``model_name`` (default: class and model name).
+        """
+        if not tiers:
+            raise ValueError("NERCascade needs at least one tier")
+        self.tiers = list(tiers)
+        self.min_score = min_score
+        self.check_fragments = check_fragments
+        self.check_agreement = check_agreement
+        self.names = names or [f"{type(tier).__name__}:{getattr(tier, 'model_name', '')}" for tier in self.tiers]
+        self.counters = [{"texts": 0, "calls": 0, "escalated": 0, "seconds": 0.0} for _ in self.tiers]
+
+    @property
+    def model_name(self) -> str:
+        """Every tier and threshold, so ``NERCache`` keys change with the configuration."""
+        return (
+            f"cascade[{' > '.join(self.names)}]"
+            f"(score={self.min_score},fragments={self.check_fragments},agreement={self.check_agreement})"
+        )
+
+    @property
+    def version(self) -> str:
+        return " > ".join(tier.version for tier in self.tiers)
+
+    def predict(self, text: str) -> list[dict]:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: list[str], batch_size: int | None = None) -> list[list[dict]]:
+        results = [[] for _ in texts]
+        todo = list(range(len(texts)))
+        for level, (tier, counter) in enumerate(zip(self.tiers, self.counters)):
+            if not todo:
+                break
+            start = time.perf_counter()
+            outputs = tier.predict_batch([texts[i] for i in todo])
+            counter["seconds"] += time.perf_counter() - start
+            counter["calls"] += 1
+            counter["texts"] += len(todo)
+
+            last = level == len(self.tiers) - 1
+            escalate = []
+            for i, output in zip(todo, outputs):
+                entities = normalize_entities(output)
+                if not last and self.in_doubt(texts[i], entities, results[i] if level else None):
+                    escalate.append(i)
+                results[i] = entities
+            counter["escalated"] += len(escalate)
+            todo = escalate
+        return results
+
+    def in_doubt(self, text: str, entities: list[dict], previous: list[dict] | None = None) -> bool:
+        """Whether ``entities`` should be checked by the next tier (``previous``: the last tier's answer)."""
+        if any(entity.get("score", 1.0) < self.min_score for entity in entities):
+            return True
+        if self.check_fragments and fragments(text, entities):
+            return True
+        if self.check_agreement and previous is not None:
+            # Only what the previous tier was sure of has to be confirmed
+            unsure = fragments(text, previous) if self.check_fragments else set()
+            confident = {
+                span(entity)
+                for i, entity in enumerate(previous)
+                if i not in unsure and entity.get("score", 1.0) >= self.min_score
+            }
+            return not confident <= {span(entity) for entity in entities}
+        return False
+
+    def warm_up(self):
+        for tier in self.tiers:
+            tier.warm_up()
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "tier": name,
+                **counter,
+                "ms_per_text": 1000 * counter["seconds"] / counter["texts"] if counter["texts"] else 0.0,
+            }
+            for name, counter in zip(self.names, self.counters)
+        ]
+
+    def report(self) -> str:
+        """One line per tier, as printed by the parsers and benchmarks."""
+        return "\n".join(
+            f"   {i}. {s['tier']}: {s['texts']} texts in {s['calls']} calls, {s['seconds']:.2f}s "
+            f"({s['ms_per_text']:.1f} ms/text), {s['escalated']} escalated"
+            for i, s in enumerate(self.stats(), 1)
+        )
@@ -0,0 +1,118 @@
+"""
+Thin ``NERBase`` client for ``src.ner.server``.
+
+No model is loaded in the calling process; texts are sent to the shared
+server, which batches them with other clients' requests.
+"""
+
+import http.client
+import json
+import os
+import socket
+import threading
+from urllib.parse import urlparse
+
+from src.ner.base import NERBase
+
+DEFAULT_ADDRESS = os.getenv("NER_SERVER_ADDRESS", "http://127.0.0.1:8767")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float | None = None):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class TCPHTTPConnection(http.client.HTTPConnection):
+    def connect(self):
+        super().connect()
+        # Small request/response pairs: do not wait for Nagle's algorithm
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class NERClient(NERBase):
+    """
+    Entities from a running ``src.ner.server`` at ``address`` (``unix:<path>``
+    or ``http://host:port``). Each thread keeps one keep-alive connection,
+    reopened after a fork or a dropped connection.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float = 300.0):
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+        self._server = None
+
+    @property
+    def model_name(self) -> str:
+        """The server's model, so ``NERCache`` keys differ per served model."""
+        return self._server_info()["model"]
+
+    @property
+    def version(self) -> str:
+        return self._server_info().get("version", "")
+
+    def _server_info(self) -> dict:
+        """``/health`` of the server, asked once (on first use, not in ``__init__``)."""
+        if self._server is None:
+            self._server = self.health()
+        return self._server
+
+    def predict(self, text: str) -> list[dict]:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: list[str], batch_size: int | None = None) -> list[list[dict]]:
+        # The server does the batching; send everything in one request
+        if not texts:
+            return []
+        return self._request("POST", "/predict", {"texts": list(texts)})["entities"]
+
+    def warm_up(self):
+        self.health()
+
+    def health(self) -> dict:
+        return self._request("GET", "/health")
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            if self.address.startswith("unix:"):
+                conn = UnixHTTPConnection(self.address[len("unix:") :], timeout=self.timeout)
+            else:
+                url = urlparse(self.address)
+                conn = TCPHTTPConnection(url.hostname or "127.0.0.1", url.port or 8767, timeout=self.timeout)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _request(self, method: str, path: str, payload: dict | None = None) -> dict:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = json.loads(response.read())
+                break
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.CannotSendRequest):
+                # Kept-alive connection closed by the server: reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        if response.status != 200:
+            raise RuntimeError(f"NER server error ({response.status}): {data.get('error')}")
+        return data
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
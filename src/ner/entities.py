@@ -0,0 +1,147 @@
+"""
+Compact storage for NER output.
+
+Backends return one dict per entity. At corpus scale, filtering and merging
+those dicts (a copy and a ``split("-")`` per entity, re-sliced words) costs
+more than the bookkeeping it does. ``EntityTable`` keeps the entities of a
+batch of texts as parallel NumPy columns (text index, start, end, label id),
+filters and merges them with array operations, and only yields words or dicts
+when the result is written out.
+"""
+
+from typing import Iterable, Iterator
+
+import numpy as np
+
+# Entity types seen in this process; tables keep a snapshot, so ids stay
+# meaningful when a table is pickled back from a worker process
+LABELS: list[str] = []
+LABEL_IDS: dict[str, int] = {}
+# Tag as emitted by the model ("B-PER", "I-PER", "PER") -> label id
+_TAG_IDS: dict[str, int] = {}
+
+
+def label_id(tag: str) -> int:
+    """Id of the entity type of ``tag``; ``B-``/``I-`` variants share the id of the bare type."""
+    try:
+        return _TAG_IDS[tag]
+    except KeyError:
+        label = tag.split("-")[-1]
+        if label not in LABEL_IDS:
+            LABEL_IDS[label] = len(LABELS)
+            LABELS.append(label)
+        _TAG_IDS[tag] = LABEL_IDS[label]
+        return _TAG_IDS[tag]
+
+
+class EntityTable:
+    """
+    Entities of ``n_texts`` texts, sorted by text. ``table[i]`` is a view of
+    the entities of text ``i``.
+
+    ``words`` holds the backend's word for each entity, or ``None`` for merged
+    entities, whose word is sliced from the text when it is written.
+    """
+
+    __slots__ = ("n_texts", "text_index", "start", "end", "label", "words", "labels", "_bounds")
+
+    def __init__(
+        self,
+        n_texts: int,
+        text_index: np.ndarray,
+        start: np.ndarray,
+        end: np.ndarray,
+        label: np.ndarray,
+        words: list[str | None],
+        labels: tuple[str, ...],
+    ):
+        self.n_texts = n_texts
+        self.text_index = text_index
+        self.start = start
+        self.end = end
+        self.label = label
+        self.words = words
+        self.labels = labels
+        self._bounds = None
+
+    @classmethod
+    def from_predictions(cls, results: list[list[dict]], keep: Iterable[str] | None = None) -> "EntityTable":
+        """
+        Table from ``predict_batch`` output (``entity``/``start``/``end``/``word``
+        dicts), keeping only the entity types in ``keep`` when given.
+        """
+        keep_ids = None if keep is None else {label_id(label) for label in keep}
+        rows, words = [], []
+        for i, entities in enumerate(results):
+            for entity in entities or ():
+                tag = entity.get("entity", "")
+                entity_label = _TAG_IDS.get(tag)
+                if entity_label is None:
+                    entity_label = label_id(tag)
+                if keep_ids is not None and entity_label not in keep_ids:
+                    continue
+                rows.append((i, entity.get("start", 0), entity.get("end", 0), entity_label))
+                words.append(entity.get("word", ""))
+        text_index, start, end, label = np.array(rows, dtype=np.int32).reshape(-1, 4).T.copy()
+        return cls(len(results), text_index, start, end, label, words, tuple(LABELS))
+
+    def merge_adjacent(self) -> "EntityTable":
+        """
+        Merge runs of same-type entities of one text where each starts one
+        character after the previous one ends (words split by a space).
+        """
+        if len(self) < 2:
+            return self
+        # Stable, so entities with equal starts keep their model order
+        order = np.lexsort((self.start, self.text_index))
+        text_index, start, end, label = (column[order] for column in (self.text_index, self.start, self.end, self.label))
+
+        joined = (text_index[1:] == text_index[:-1]) & (end[:-1] + 1 == start[1:]) & (label[1:] == label[:-1])
+        first = np.flatnonzero(np.concatenate(([True], ~joined)))
+        last = np.append(first[1:], len(order)) - 1
+        words = [
+            self.words[order[first_row]] if first_row == last_row else None
+            for first_row, last_row in zip(first.tolist(), last.tolist())
+        ]
+        return EntityTable(self.n_texts, text_index[first], start[first], end[last], label[first], words, self.labels)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __getitem__(self, i: int) -> "EntitySpans":
+        if self._bounds is None:
+            self._bounds = np.searchsorted(self.text_index, np.arange(self.n_texts + 1)).tolist()
+        return EntitySpans(self, self._bounds[i], self._bounds[i + 1])
+
+    def __iter__(self) -> Iterator["EntitySpans"]:
+        return (self[i] for i in range(self.n_texts))
+
+
+class EntitySpans:
+    """The entities of one text in an ``EntityTable``; empty views are falsy."""
+
+    __slots__ = ("table", "lo", "hi")
+
+    def __init__(self, table: EntityTable, lo: int, hi: int):
+        self.table = table
+        self.lo = lo
+        self.hi = hi
+
+    def __len__(self) -> int:
+        return self.hi - self.lo
+
+    def items(self, text: str) -> Iterator[tuple[str, int, int, str]]:
+        """``(label, start, end, word)`` per entity of ``text``."""
+        table = self.table
+        rows = slice(self.lo, self.hi)
+        for start, end, label, word in zip(
+            table.start[rows].tolist(), table.end[rows].tolist(), table.label[rows].tolist(), table.words[rows]
+        ):
+            yield table.labels[label], start, end, text[start:end] if word is None else word
+
+    def to_dicts(self, text: str) -> list[dict]:
+        """The entities in the backends' dict form."""
+        return [
+            {"entity": label, "start": start, "end": end, "word": word}
+            for label, start, end, word in self.items(text)
+        ]
@@ -1,9 +1,22 @@
 import os
-from typing import Callable
-from huggingface_hub import InferenceClient
-from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
-from src.ner.base import NERBase
+from src.ner.base import NERBase, package_versions
+from src.ner.retry import backoff_delay, retry_after_headers
+from src.ner.tokens import aggregate_entities, cpu_threads, length_batches, truncation_length
+
+HF_INFERENCE_URL = "https://router.huggingface.co/hf-inference/models/{model_name}"
+# Rate limits, model still loading (503) and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# httpx, huggingface_hub, transformers and torch are imported where they are
+# first needed: each mode uses only some of them, and torch alone takes seconds.
+if TYPE_CHECKING:
+    import httpx
+    from huggingface_hub import InferenceClient
+    from transformers import AutoTokenizer, AutoModelForTokenClassification
 
 
 class NERHugginFace(NERBase):
@@ -12,16 +25,59 @@ class NERHugginFace(NERBase):
         api_key: str = None,
         model_name: str = "NlpHUST/ner-vietnamese-electra-base",
         mode: str = "client",
+        batch_size: int = 32,
+        max_length: int | None = None,
+        num_threads: int | None = None,
+        endpoint_url: str | None = None,
+        max_concurrency: int = 8,
+        texts_per_request: int = 1,
+        timeout: float = 60.0,
+        max_retries: int = 6,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
     ):
+        """
+        ``mode="client"`` calls the HF Inference API (needs ``HF_TOKEN``); any
+        other mode runs the model locally with length-bucketed batches of
+        ``batch_size`` sentences, truncated to ``max_length`` tokens (default:
+        the tokenizer's limit, or 512 when it has none), on ``num_threads`` CPU
+        threads (default: ``cpu_threads()``).
+
+        In client mode ``predict_batch`` posts to ``endpoint_url`` (default:
+        the HF Inference API for ``model_name``) over a persistent connection
+        pool with at most ``max_concurrency`` requests in flight, each limited
+        to ``timeout`` seconds. ``texts_per_request > 1`` sends list payloads,
+        falling back to one text per request if the endpoint does not accept
+        lists. 429/5xx responses and connection errors are retried up to
+        ``max_retries`` times, as in ``NEROpenAI``.
+        """
         api_key = api_key or os.getenv("HF_TOKEN")
-        if not api_key:
+        if mode == "client" and not api_key:
             raise ValueError("HF_TOKEN not found")
         self.model_name = model_name
         self.mode = mode
+        self.batch_size = batch_size
         if self.mode == "client":
-            self.model = self._init_inference(api_key)
+            self.model = None  # InferenceClient, created on first predict
+            self.api_key = api_key
+            self.endpoint_url = endpoint_url or HF_INFERENCE_URL.format(model_name=model_name)
+            self.max_concurrency = max_concurrency
+            self.texts_per_request = texts_per_request
+            self.timeout = timeout
+            self.max_retries = max_retries
+            self.backoff = backoff
+            self.max_backoff = max_backoff
+            self.lists_supported = texts_per_request > 1
+            self._http = None
+            self._pool = None
+            self._pid = None
         else:
-            self.model = self._init_model(model_name)
+            import torch
+
+            torch.set_num_threads(num_threads or cpu_threads())
+            self.tokenizer, self.model = self._init_model(model_name)
+            self.max_length = truncation_length(self.tokenizer, max_length)
+            self.id2label = self.model.config.id2label
 
     def predict(self, text: str) -> list[dict]:
         """
@@ -33,23 +89,164 @@ class NERHugginFace(NERBase):
         ]
         """
         if self.mode == "client":
+            if self.model is None:
+                self.model = self._init_inference(self.api_key)
             result = self.model.token_classification(
                 text,
                 model=self.model_name,
             )
         else:
-            result = self.model(text)
+            result = self.predict_batch([text])[0]
         return result
 
-    def _init_inference(self, api_key: str) -> InferenceClient:
+    @property
+    def version(self) -> str:
+        """Library versions, plus the weights' hub revision in local mode (the API serves its current one)."""
+        if self.mode == "client":
+            return f"client:{self.endpoint_url}"
+        revision = getattr(self.model.config, "_commit_hash", None) or "?"
+        return f"{package_versions('transformers', 'torch')},revision={revision}"
+
+    def warm_up(self):
+        # Local mode loads the model in __init__
+        if self.mode == "client":
+            if self.model is None:
+                self.model = self._init_inference(self.api_key)
+            self._get_http()
+
+    def predict_batch(self, texts: list[str], batch_size: int | None = None) -> list[list[dict]]:
+        batch_size = batch_size or self.batch_size
+        if self.mode == "client":
+            return self._predict_remote(texts)
+        return self._predict_local(texts, batch_size)
+
+    def _predict_remote(self, texts: list[str]) -> list[list[dict]]:
+        """Entity dicts per text from the inference endpoint, requests fanned out over the pool."""
+        _, pool = self._get_http()
+        size = self.texts_per_request if self.lists_supported else 1
+        chunks = [list(texts[start : start + size]) for start in range(0, len(texts), size)]
+        results = []
+        for chunk_results in pool.map(self._request_chunk, chunks):
+            results.extend(chunk_results)
+        return results
+
+    def _request_chunk(self, texts: list[str]) -> list[list[dict]]:
+        import httpx
+
+        if len(texts) == 1:
+            return [self._post(texts[0])]
+        if self.lists_supported:
+            try:
+                output = self._post(texts)
+            except httpx.HTTPStatusError as error:
+                if error.response.status_code not in (400, 422):
+                    raise
+                output = None
+            if isinstance(output, list) and len(output) == len(texts) and all(isinstance(item, list) for item in output):
+                return output
+            # The endpoint rejected or flattened the list: one text per request from now on
+            self.lists_supported = False
+        return [self._post(text) for text in texts]
+
+    def _post(self, inputs: str | list[str]) -> list:
+        """POST one payload, retrying rate limits, model loading and transient errors."""
+        import httpx
+
+        http, _ = self._get_http()
+        payload = {"inputs": inputs, "parameters": {"aggregation_strategy": "simple"}}
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = http.post(self.endpoint_url, json=payload)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                hint = None
+            else:
+                if response.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response.json()
+                hint = retry_after_headers(response.headers)
+                if hint is None and response.status_code == 503:
+                    hint = self._loading_time(response)
+            time.sleep(backoff_delay(attempt, self.backoff, self.max_backoff, hint))
+
+    @staticmethod
+    def _loading_time(response: "httpx.Response") -> float | None:
+        # {"error": "Model ... is currently loading", "estimated_time": 20.0}
+        try:
+            return float(response.json()["estimated_time"])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def _get_http(self) -> tuple["httpx.Client", ThreadPoolExecutor]:
+        """Connection pool and request threads, created on first use in each process."""
+        if self._http is None or self._pid != os.getpid():
+            import httpx
+
+            self._http = httpx.Client(
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+            )
+            self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency)
+            self._pid = os.getpid()
+        return self._http, self._pool
+
+    def close(self):
+        if self.mode == "client" and self._http is not None and self._pid == os.getpid():
+            self._pool.shutdown()
+            self._http.close()
+            self._http = None
+
+    def _predict_local(self, texts: list[str], batch_size: int) -> list[list[dict]]:
+        """
+        Tokenize once, sort sentences by token count and run padded batches of
+        similar length, so little compute is spent on padding.
+        """
+        import torch
+
+        encodings = self.tokenizer(
+            list(texts),
+            truncation=True,
+            max_length=self.max_length,
+            return_offsets_mapping=True,
+        )
+        offsets = encodings.pop("offset_mapping")
+        lengths = [len(ids) for ids in encodings["input_ids"]]
+
+        results = [[] for _ in texts]
+        for idx in length_batches(lengths, batch_size):
+            batch = self.tokenizer.pad(
+                {key: [values[i] for i in idx] for key, values in encodings.items()},
+                padding="longest",
+                return_tensors="pt",
+            )
+            with torch.inference_mode():
+                logits = self.model(**batch).logits
+            scores, labels = logits.softmax(dim=-1).max(dim=-1)
+            scores, labels = scores.tolist(), labels.tolist()
+
+            for row, i in enumerate(idx):
+                n = lengths[i]  # Padding is on the right
+                tags = [self.id2label[label] for label in labels[row][:n]]
+                results[i] = aggregate_entities(texts[i], offsets[i], tags, scores[row][:n])
+        return results
+
+    def _init_inference(self, api_key: str) -> "InferenceClient":
+        from huggingface_hub import InferenceClient
+
         client = InferenceClient(
             provider="hf-inference",
             api_key=api_key,
         )
         return client
 
-    def _init_model(self, model_name: str) -> Callable[[str], list[dict]]:
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        _model = AutoModelForTokenClassification.from_pretrained(model_name)
-        model = pipeline("ner", model=_model, tokenizer=tokenizer)
-        return model
+    def _init_model(self, model_name: str) -> tuple["AutoTokenizer", "AutoModelForTokenClassification"]:
+        from transformers import AutoTokenizer, AutoModelForTokenClassification
+
+        # A fast tokenizer is needed for offset mappings
+        tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+        tokenizer.padding_side = "right"
+        model = AutoModelForTokenClassification.from_pretrained(model_name)
+        model.eval()
+        return tokenizer, model
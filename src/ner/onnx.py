@@ -0,0 +1,192 @@
+"""
+ONNX Runtime CPU backend for the Vietnamese token-classification NER model.
+
+The Hugging Face model is exported once to a directory that holds everything
+inference needs, so production boxes only need ``onnxruntime`` and a tokenizer
+(no PyTorch):
+
+    models/ner-vietnamese-electra-base-onnx/
+        model.onnx          fp32 graph
+        model.int8.onnx     dynamically int8-quantized weights (--quantize)
+        config.json         id2label
+        tokenizer files
+
+    python -m src.ner.onnx --model NlpHUST/ner-vietnamese-electra-base --output models/ner-vietnamese-electra-base-onnx --quantize
+"""
+
+import argparse
+import json
+import os
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from src.ner.base import NERBase, package_versions
+from src.ner.tokens import aggregate_entities, cpu_threads, length_batches, truncation_length
+
+DEFAULT_MODEL_NAME = "NlpHUST/ner-vietnamese-electra-base"
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+OPSET_VERSION = 17
+
+# onnxruntime and the tokenizer are imported when a model is loaded
+if TYPE_CHECKING:
+    import onnxruntime as ort
+
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = False) -> str:
+    """
+    Export ``model_name`` to ``output_dir`` (graph, config and tokenizer) with
+    dynamic batch and sequence axes; with ``quantize`` also write an int8 copy.
+
+    Returns the path of the graph ``NEROnnx`` will load by default.
+    """
+    # Export-time only dependencies
+    import torch
+    from transformers import AutoModelForTokenClassification, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    model = AutoModelForTokenClassification.from_pretrained(model_name)
+    model.eval()
+
+    inputs = dict(tokenizer(["Trang Tử quê ở đất Mông nước Tống."], return_tensors="pt"))
+    fp32_path = os.path.join(output_dir, FP32_FILE)
+    # no_grad, not inference_mode: tracing for export does not support inference tensors
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (),
+            fp32_path,
+            kwargs=inputs,
+            input_names=list(inputs),
+            output_names=["logits"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in [*inputs, "logits"]},
+            opset_version=OPSET_VERSION,
+        )
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+    print(f"📦 Exported {model_name} -> {fp32_path}")
+
+    if not quantize:
+        return fp32_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = os.path.join(output_dir, INT8_FILE)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"📦 Quantized (dynamic int8) -> {int8_path}")
+    return int8_path
+
+
+class NEROnnx(NERBase):
+    def __init__(
+        self,
+        model_dir: str,
+        quantized: bool | None = None,
+        batch_size: int = 32,
+        max_length: int | None = None,
+        num_threads: int | None = None,
+    ):
+        """
+        Run a model exported by ``export_onnx`` with ONNX Runtime on CPU.
+
+        ``quantized=None`` picks the int8 graph when it exists. Batching,
+        truncation and threads work as in ``NERHugginFace`` local mode, and
+        ``predict`` returns the same entity dicts.
+        """
+        if quantized is None:
+            quantized = os.path.exists(os.path.join(model_dir, INT8_FILE))
+        self.model_path = os.path.join(model_dir, INT8_FILE if quantized else FP32_FILE)
+        self.model_name = self.model_path
+        self.batch_size = batch_size
+
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir, use_fast=True)
+        self.tokenizer.padding_side = "right"
+        self.max_length = truncation_length(self.tokenizer, max_length)
+        with open(os.path.join(model_dir, "config.json"), encoding="utf-8") as f:
+            self.id2label = {int(i): label for i, label in json.load(f)["id2label"].items()}
+
+        self.num_threads = num_threads
+        self._session = None
+        self._session_pid = None
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    @property
+    def version(self) -> str:
+        """The runtime and the exported graph (size and mtime change with every export)."""
+        stat = os.stat(self.model_path)
+        return f"{package_versions('onnxruntime')},graph={stat.st_size}:{int(stat.st_mtime)}"
+
+    @property
+    def session(self) -> "ort.InferenceSession":
+        """The ONNX Runtime session, rebuilt in forked workers (its thread pool does not survive a fork)."""
+        if self._session is None or self._session_pid != os.getpid():
+            self._session = self._init_session(self.model_path, self.num_threads or cpu_threads())
+            self._session_pid = os.getpid()
+        return self._session
+
+    def predict(self, text: str) -> list[dict]:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: list[str], batch_size: int | None = None) -> list[list[dict]]:
+        encodings = self.tokenizer(
+            list(texts),
+            truncation=True,
+            max_length=self.max_length,
+            return_offsets_mapping=True,
+        )
+        offsets = encodings.pop("offset_mapping")
+        lengths = [len(ids) for ids in encodings["input_ids"]]
+
+        results = [[] for _ in texts]
+        for idx in length_batches(lengths, batch_size or self.batch_size):
+            batch = self.tokenizer.pad(
+                {name: [encodings[name][i] for i in idx] for name in self.input_names},
+                padding="longest",
+                return_tensors="np",
+            )
+            feed = {name: batch[name].astype(np.int64) for name in self.input_names}
+            (logits,) = self.session.run(["logits"], feed)
+            scores, labels = softmax_max(logits)
+
+            for row, i in enumerate(idx):
+                n = lengths[i]  # Padding is on the right
+                tags = [self.id2label[label] for label in labels[row, :n].tolist()]
+                results[i] = aggregate_entities(texts[i], offsets[i], tags, scores[row, :n].tolist())
+        return results
+
+    def _init_session(self, model_path: str, num_threads: int) -> "ort.InferenceSession":
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+
+def softmax_max(logits: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Best label and its softmax probability per token, from ``(batch, seq, labels)`` logits."""
+    labels = logits.argmax(axis=-1)
+    best = np.take_along_axis(logits, labels[..., None], axis=-1)[..., 0]
+    # max softmax = 1 / sum(exp(logit - max logit))
+    scores = 1.0 / np.exp(logits - best[..., None]).sum(axis=-1)
+    return scores, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the NER model to ONNX.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--quantize", action="store_true", help="also write a dynamic int8 graph")
+    args = parser.parse_args()
+
+    export_onnx(args.model, args.output, quantize=args.quantize)
+
+
+if __name__ == "__main__":
+    main()
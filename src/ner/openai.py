@@ -1,26 +1,217 @@
-import re
+import asyncio
+import hashlib
 import json
-from openai import OpenAI
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
 from src.ner.base import NERBase
-from src.constants import NER_PROMPT
+from src.constants import NER_PACKED_PROMPT, NER_PROMPT
+from src.ner.retry import backoff_delay, retry_after_headers
+
+# The openai SDK takes most of a second to import; it is loaded on first request
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+# Rough size of a token for Vietnamese text in LLM tokenizers (no tokenizer needed)
+CHARS_PER_TOKEN = 3
+
+
+@lru_cache(maxsize=None)
+def retryable_errors() -> tuple[type[Exception], ...]:
+    """Errors worth retrying; anything else (bad request, auth) fails at once."""
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+
+
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def parse_entities(content: str) -> list[dict]:
+    """Entities from a model reply, with an optional ```json fence; trailing commas are tolerated."""
+    json_string = re.sub(r"^```json\n|\n```$", "", content.strip())
+    try:
+        return json.loads(json_string)
+    except json.JSONDecodeError:
+        return json.loads(TRAILING_COMMA.sub(r"\1", json_string))
+
+
+def parse_reply(content: str | None) -> list[dict] | None:
+    """The entity dicts of a single-sentence reply, or ``None`` when it is not a JSON list."""
+    try:
+        entities = parse_entities(content or "")
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(entities, list):
+        return None
+    return [entity for entity in entities if isinstance(entity, dict)]
+
+
+def retry_after(error: Exception) -> float | None:
+    """Seconds the server asked us to wait before retrying ``error``; ``None`` when there is no hint."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    return retry_after_headers(response.headers)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def pack_sentences(texts: list[str], token_budget: int, max_sentences: int = 50) -> list[list[int]]:
+    """
+    Group consecutive ``texts`` into packs of at most ``token_budget``
+    estimated tokens and ``max_sentences`` sentences (a longer sentence gets
+    a pack of its own). Returns index lists.
+    """
+    packs, current, used = [], [], 0
+    for i, text in enumerate(texts):
+        # "[ID] " prefix and line break
+        cost = estimate_tokens(text) + 4
+        if current and (used + cost > token_budget or len(current) == max_sentences):
+            packs.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        packs.append(current)
+    return packs
+
+
+def packed_user_message(sentences: list[str]) -> str:
+    """Numbered sentences, one per line (IDs start at 1); line breaks inside a sentence become spaces."""
+    return "\n".join(f"[{n}] {sentence.replace(chr(10), ' ')}" for n, sentence in enumerate(sentences, 1))
+
+
+def align_entity(entity: dict, sentence: str) -> dict | None:
+    """
+    Check an entity against its sentence: keep the model's offsets when they
+    point at ``word``, else use the occurrence of ``word`` nearest to them.
+    ``None`` when ``word`` is not in the sentence.
+    """
+    word = entity.get("word")
+    if not isinstance(word, str) or not word or not isinstance(entity.get("entity_group"), str):
+        return None
+    start = entity.get("start")
+    if not isinstance(start, int) or sentence[start : start + len(word)] != word:
+        hint = start if isinstance(start, int) else 0
+        positions = [m.start() for m in re.finditer(re.escape(word), sentence)]
+        if not positions:
+            return None
+        start = min(positions, key=lambda position: abs(position - hint))
+    return {**entity, "start": start, "end": start + len(word)}
+
+
+def split_packed_response(content: str, sentences: list[str]) -> dict[int, list[dict]]:
+    """
+    Entities per sentence position from a packed reply. Sentences whose entry
+    is missing or malformed are left out, so only they are asked again;
+    entities whose word is not in the sentence are dropped.
+    """
+    try:
+        data = parse_entities(content)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    results = {}
+    for n, sentence in enumerate(sentences, 1):
+        entities = data.get(str(n))
+        if not isinstance(entities, list) or not all(isinstance(ent, dict) for ent in entities):
+            continue
+        aligned = (align_entity(ent, sentence) for ent in entities)
+        results[n - 1] = [ent for ent in aligned if ent is not None]
+    return results
 
 
 class NEROpenAI(NERBase):
-    def __init__(self, api_key: str, base_url: str):
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        model_name: str = "gemma2-9b-it",
+        max_concurrency: int = 8,
+        timeout: float = 60.0,
+        max_retries: int = 6,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        pack_tokens: int | None = None,
+        pack_max_sentences: int = 50,
+        pack_retries: int = 2,
+        parse_retries: int = 1,
+    ):
+        """
+        ``predict`` sends one blocking request. ``predict_batch`` (and the
+        awaitable ``apredict_batch``) keeps at most ``max_concurrency``
+        requests in flight, each limited to ``timeout`` seconds. Rate limits,
+        timeouts and server errors are retried up to ``max_retries`` times,
+        waiting as long as the rate-limit headers ask, else with exponential
+        backoff from ``backoff`` seconds (capped at ``max_backoff``) and jitter.
 
-    def predict(self, text: str) -> list[dict]:
-        completion = self.client.chat.completions.create(
-            model="gemma2-9b-it",
-            messages=[
-                {"role": "system", "content": NER_PROMPT},
-                {"role": "user", "content": text},
-            ],
-            # response_format=NERResponse,
-        )
-        result = completion.choices[0].message.content
+        With ``pack_tokens`` set, ``predict_batch`` packs up to ``pack_max_sentences``
+        numbered sentences (about ``pack_tokens`` tokens) into each request, so
+        ``NER_PACKED_PROMPT`` is sent once per pack instead of once per sentence.
+        Sentences whose part of the reply fails validation are re-packed up to
+        ``pack_retries`` times, then sent one by one.
+
+        A reply that is not valid JSON is asked again up to ``parse_retries``
+        times; after that the sentence gets no entities, so one bad reply
+        never costs the rest of the batch.
         """
-        ```json
+        self.client = None  # OpenAI, created on first predict
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pack_tokens = pack_tokens
+        self.pack_max_sentences = pack_max_sentences
+        self.pack_retries = pack_retries
+        self.parse_retries = parse_retries
+
+    @property
+    def version(self) -> str:
+        """Endpoint and prompts: the same model name can serve other weights elsewhere, and prompt edits change the answers."""
+        prompts = NER_PROMPT + (NER_PACKED_PROMPT if self.pack_tokens else "")
+        return f"{self.base_url},prompt={hashlib.sha256(prompts.encode('utf-8')).hexdigest()[:12]}"
+
+    def _messages(self, text: str) -> list[dict]:
+        return [
+            {"role": "system", "content": NER_PROMPT},
+            {"role": "user", "content": text},
+        ]
+
+    def warm_up(self):
+        self._get_client()
+
+    def _get_client(self) -> "OpenAI":
+        if self.client is None:
+            from openai import OpenAI
+
+            self.client = OpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout)
+        return self.client
+
+    def predict(self, text: str) -> list[dict]:
+        for _ in range(self.parse_retries + 1):
+            completion = self._get_client().chat.completions.create(
+                model=self.model_name,
+                messages=self._messages(text),
+                # response_format=NERResponse,
+            )
+            result = completion.choices[0].message.content
+            """
+            ```json
 [
   {
     "start": 2,
@@ -42,7 +233,91 @@ class NEROpenAI(NERBase):
   }
 ]
 ```
+            """
+            entities = parse_reply(result)
+            if entities is not None:
+                return entities
+        print(f"⚠️ Unparseable NER reply, no entities for: {text[:60]!r}")
+        return []
+
+    def predict_batch(self, texts: list[str], batch_size: int | None = None) -> list[list[dict]]:
         """
-        json_string = re.sub(r"^```json\n|\n```$", "", result.strip())
-        entities = json.loads(json_string)
-        return entities
+        Entities for each of ``texts``, in order, with at most ``max_concurrency``
+        requests in flight. ``batch_size`` is ignored: generic callers (e.g.
+        ``NERCache``) pass the local-model batch size, which must not raise the
+        rate-limited concurrency. Inside a running event loop (e.g. Jupyter)
+        the requests run on a loop in a worker thread; ``await
+        apredict_batch(texts)`` avoids that thread.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.apredict_batch(texts))
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, self.apredict_batch(texts)).result()
+
+    async def apredict_batch(self, texts: list[str], max_concurrency: int | None = None) -> list[list[dict]]:
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        from openai import AsyncOpenAI
+
+        # One client per event loop; retries are handled here, not by the SDK
+        async with AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout, max_retries=0) as client:
+            if self.pack_tokens:
+                return await self._apredict_packed(client, semaphore, texts)
+            return await asyncio.gather(*(self._apredict(client, semaphore, text) for text in texts))
+
+    async def _apredict(self, client: "AsyncOpenAI", semaphore: asyncio.Semaphore, text: str) -> list[dict]:
+        for _ in range(self.parse_retries + 1):
+            entities = parse_reply(await self._acomplete(client, semaphore, self._messages(text)))
+            if entities is not None:
+                return entities
+        print(f"⚠️ Unparseable NER reply, no entities for: {text[:60]!r}")
+        return []
+
+    async def _apredict_packed(self, client: "AsyncOpenAI", semaphore: asyncio.Semaphore, texts: list[str]) -> list[list[dict]]:
+        results = [[] if not text.strip() else None for text in texts]
+        todo = [i for i, result in enumerate(results) if result is None]
+        for _ in range(self.pack_retries + 1):
+            if not todo:
+                break
+            packs = [
+                [todo[k] for k in pack]
+                for pack in pack_sentences([texts[i] for i in todo], self.pack_tokens, self.pack_max_sentences)
+            ]
+            replies = await asyncio.gather(*(self._apredict_pack(client, semaphore, [texts[i] for i in pack]) for pack in packs))
+            for pack, reply in zip(packs, replies):
+                for k, entities in reply.items():
+                    results[pack[k]] = entities
+            todo = [i for i in todo if results[i] is None]
+
+        # Whatever still fails validation falls back to the single-sentence prompt;
+        # each of those is parsed on its own, so a bad reply only empties its sentence
+        singles = await asyncio.gather(*(self._apredict(client, semaphore, texts[i]) for i in todo))
+        for i, entities in zip(todo, singles):
+            results[i] = entities
+        return results
+
+    async def _apredict_pack(self, client: "AsyncOpenAI", semaphore: asyncio.Semaphore, sentences: list[str]) -> dict[int, list[dict]]:
+        messages = [
+            {"role": "system", "content": NER_PACKED_PROMPT},
+            {"role": "user", "content": packed_user_message(sentences)},
+        ]
+        content = await self._acomplete(client, semaphore, messages)
+        return split_packed_response(content, sentences)
+
+    async def _acomplete(self, client: "AsyncOpenAI", semaphore: asyncio.Semaphore, messages: list[dict]) -> str:
+        """Reply text for ``messages``, retrying rate limits and transient errors."""
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                try:
+                    completion = await client.chat.completions.create(
+                        model=self.model_name,
+                        messages=messages,
+                    )
+                    return completion.choices[0].message.content
+                except retryable_errors() as error:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = retry_after(error)
+            # Wait outside the semaphore so other requests can use the slot
+            await asyncio.sleep(backoff_delay(attempt, self.backoff, self.max_backoff, delay))
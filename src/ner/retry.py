@@ -0,0 +1,46 @@
+"""
+Retry timing shared by the HTTP-based NER backends.
+
+Servers say how long to wait in several ways (``retry-after-ms``,
+``retry-after`` in seconds or as an HTTP date, OpenAI-style
+``x-ratelimit-reset-*`` durations); without a hint we back off exponentially
+with jitter.
+"""
+
+import email.utils
+import random
+import re
+import time
+from typing import Mapping
+
+# "6m0s", "1.5s", "250ms" as in x-ratelimit-reset-* headers
+RESET_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+RESET_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def retry_after_headers(headers: Mapping[str, str]) -> float | None:
+    """Seconds the server asked us to wait, or ``None`` when the headers give no hint."""
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        pass
+    resets = [
+        sum(float(amount) * RESET_UNITS[unit] for amount, unit in RESET_DURATION.findall(headers[name]))
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if name in headers
+    ]
+    return max(resets) if resets else None
+
+
+def backoff_delay(attempt: int, backoff: float, max_backoff: float, hint: float | None = None) -> float:
+    """Seconds to wait before retry ``attempt + 1``: the server's ``hint``, else capped exponential backoff with jitter."""
+    if hint is None:
+        hint = min(backoff * 2**attempt, max_backoff) * random.uniform(0.5, 1.0)
+    return max(0.0, min(hint, max_backoff))
@@ -0,0 +1,232 @@
+"""
+Long-lived local NER server with dynamic micro-batching.
+
+One process loads the model once and serves every pipeline through
+``src.ner.client.NERClient``. Concurrent requests are queued and grouped into
+micro-batches: a batch closes when it holds ``--max-batch`` texts or
+``--max-delay-ms`` after its first request, and runs as one ``predict_batch``
+call on a single inference thread.
+
+    python -m src.ner.server --backend underthesea --address unix:.cache/ner.sock
+    python -m src.ner.server --backend huggingface --model NlpHUST/ner-vietnamese-electra-base --address http://127.0.0.1:8767
+
+Protocol (JSON over HTTP/1.1, on TCP or a Unix socket):
+
+    POST /predict  {"texts": [...]}  ->  {"entities": [[...], ...]}
+    GET  /health                     ->  {"model": ..., "version": ..., "requests": ..., "batches": ...}
+"""
+
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from src.ner.base import NERBase
+from src.ner.cache import json_default
+from src.ner.client import DEFAULT_ADDRESS
+
+BACKENDS = ["underthesea", "underthesea-crf", "huggingface", "onnx"]
+
+
+class MicroBatcher:
+    """
+    Queue ``predict_batch`` requests from many threads and run them together.
+
+    Only the batcher thread touches the model, so backends that are not
+    thread-safe (PyTorch, underthesea) can still serve concurrent clients.
+    """
+
+    def __init__(self, model: NERBase, max_batch: int = 64, max_delay: float = 0.01):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="ner-batcher", daemon=True)
+        self._thread.start()
+
+    def predict_batch(self, texts: list[str]) -> list[list]:
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "texts": self.texts,
+            "batches": self.batches,
+            "mean_batch": self.texts / self.batches if self.batches else 0.0,
+        }
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            items = [first]
+            size = len(first[0])
+            deadline = time.monotonic() + self.max_delay
+            stop = False
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                items.append(item)
+                size += len(item[0])
+
+            self._run_batch(items)
+            if stop:
+                return
+
+    def _run_batch(self, items: list[tuple[list[str], Future]]):
+        texts = [text for item_texts, _ in items for text in item_texts]
+        self.requests += len(items)
+        self.texts += len(texts)
+        self.batches += 1
+        try:
+            outputs = self.model.predict_batch(texts)
+        except Exception as error:
+            for _, future in items:
+                future.set_exception(error)
+            return
+        position = 0
+        for item_texts, future in items:
+            future.set_result(outputs[position : position + len(item_texts)])
+            position += len(item_texts)
+
+
+def make_handler(batcher: MicroBatcher, model_name: str, version: str = ""):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, so clients reuse one connection per thread
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path != "/health":
+                self._reply(404, {"error": f"unknown path {self.path}"})
+                return
+            self._reply(200, {"model": model_name, "version": version, **batcher.stats()})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._reply(404, {"error": f"unknown path {self.path}"})
+                return
+            try:
+                texts = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["texts"]
+                if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                    raise ValueError("texts must be a list of strings")
+            except (ValueError, KeyError, TypeError) as error:
+                self._reply(400, {"error": str(error)})
+                return
+            try:
+                entities = batcher.predict_batch(texts)
+            except Exception as error:
+                self._reply(500, {"error": f"{type(error).__name__}: {error}"})
+                return
+            self._reply(200, {"entities": entities})
+
+        def _reply(self, status: int, payload: dict):
+            data = json.dumps(payload, ensure_ascii=False, default=json_default).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(address: str, handler) -> socketserver.BaseServer:
+    """HTTP server on ``unix:<path>`` or ``http://host:port``."""
+    if address.startswith("unix:"):
+        path = address[len("unix:") :]
+        if os.path.exists(path):
+            os.remove(path)  # stale socket from a previous run
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return ThreadingUnixHTTPServer(path, handler)
+    url = urlparse(address)
+    return ThreadingHTTPServer((url.hostname or "127.0.0.1", url.port or 8767), handler)
+
+
+def load_model(backend: str, model_name: str | None = None) -> NERBase:
+    """Build a backend by name; imports happen here so only the chosen one is loaded."""
+    if backend == "underthesea":
+        from src.ner.underthesea import NERUnderthesea
+
+        return NERUnderthesea(deep=True)
+    if backend == "underthesea-crf":
+        from src.ner.underthesea import NERUnderthesea
+
+        return NERUnderthesea(deep=False)
+    if backend == "huggingface":
+        from src.ner.huggingface import NERHugginFace
+
+        return NERHugginFace(model_name=model_name or "NlpHUST/ner-vietnamese-electra-base", mode="local")
+    if backend == "onnx":
+        from src.ner.onnx import NEROnnx
+
+        if not model_name:
+            raise ValueError("--model must be the directory written by src.ner.onnx")
+        return NEROnnx(model_name)
+    raise ValueError(f"Unknown NER backend: {backend}")
+
+
+def serve(model: NERBase, address: str = DEFAULT_ADDRESS, max_batch: int = 64, max_delay: float = 0.01, model_name: str | None = None):
+    """Serve ``model`` on ``address`` until interrupted."""
+    name = model_name or f"{type(model).__name__}:{getattr(model, 'model_name', '')}"
+    batcher = MicroBatcher(model, max_batch=max_batch, max_delay=max_delay)
+    server = make_server(address, make_handler(batcher, name, model.version))
+    print(f"🏷️ NER server ({name}) on {address}, batches of ≤{max_batch} texts / {max_delay * 1000:.0f} ms")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+        if address.startswith("unix:") and os.path.exists(address[len("unix:") :]):
+            os.remove(address[len("unix:") :])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve one warm NER model to many pipelines.")
+    parser.add_argument("--backend", choices=BACKENDS, default="underthesea")
+    parser.add_argument("--model", default=None, help="HF model name, or ONNX export directory")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="unix:<path> or http://host:port")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-delay-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    model = load_model(args.backend, args.model)
+    # Load weights now rather than on the first request
+    model.warm_up()
+    serve(model, args.address, args.max_batch, args.max_delay_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Backend-independent helpers for local token-classification NER.
+
+Shared by the PyTorch (``src.ner.huggingface``) and ONNX Runtime
+(``src.ner.onnx``) backends; nothing here imports a deep-learning framework.
+"""
+
+import os
+from typing import Iterator
+
+# Tokenizers without a configured limit report int(1e30) as model_max_length
+DEFAULT_MAX_LENGTH = 512
+
+
+def truncation_length(tokenizer, max_length: int | None = None) -> int:
+    """``max_length``, else the tokenizer's limit, else ``DEFAULT_MAX_LENGTH`` when that limit is a placeholder."""
+    if max_length:
+        return max_length
+    limit = getattr(tokenizer, "model_max_length", None)
+    if not limit or limit > 100_000:
+        return DEFAULT_MAX_LENGTH
+    return limit
+
+
+def cpu_threads(limit: int = 8) -> int:
+    """
+    CPUs available to this process (respects affinity/cgroup pinning), capped
+    at ``limit`` and at ``OMP_NUM_THREADS`` when set (e.g. by
+    ``src.parallel.limit_threads`` in pool workers).
+    """
+    try:
+        available = len(os.sched_getaffinity(0))
+    except AttributeError:
+        available = os.cpu_count() or 1
+    if os.getenv("OMP_NUM_THREADS", "").isdigit():
+        available = min(available, int(os.environ["OMP_NUM_THREADS"]))
+    return max(1, min(available, limit))
+
+
+def length_batches(lengths: list[int], batch_size: int) -> Iterator[list[int]]:
+    """Indices grouped into batches of similar ``lengths`` (shortest first), to keep padding small."""
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    for start in range(0, len(order), batch_size):
+        yield order[start : start + batch_size]
+
+
+def aggregate_entities(text: str, offsets: list[tuple[int, int]], tags: list[str], scores: list[float]) -> list[dict]:
+    """
+    Group per-token BIO tags into entity spans over ``text``.
+
+    Consecutive tokens of one type are joined when tagged ``I-`` or when they
+    continue the same word (no gap between offsets); special tokens have empty
+    offsets and are skipped. Output matches the HF ``entity_group`` format.
+    """
+    entities = []
+    current = None
+    for (start, end), tag, score in zip(offsets, tags, scores):
+        if start == end:
+            continue
+        if tag == "O":
+            current = None
+            continue
+        if tag[:2] in ("B-", "I-"):
+            prefix, label = tag[0], tag[2:]
+        else:
+            prefix, label = "I", tag
+        if current is not None and label == current["entity_group"] and (prefix == "I" or start == current["end"]):
+            current["end"] = end
+            current["scores"].append(score)
+        else:
+            current = {"entity_group": label, "start": start, "end": end, "scores": [score]}
+            entities.append(current)
+
+    return [
+        {
+            "entity_group": ent["entity_group"],
+            "score": sum(ent["scores"]) / len(ent["scores"]),
+            "word": text[ent["start"] : ent["end"]],
+            "start": ent["start"],
+            "end": ent["end"],
+        }
+        for ent in entities
+    ]
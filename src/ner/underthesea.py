@@ -0,0 +1,100 @@
+from src.ner.base import NERBase, package_versions
+
+
+def merge_subwords(output: list[dict]) -> list[dict]:
+    """Join ``##`` word pieces into the preceding entity, as ``underthesea.ner(deep=True)`` does."""
+    entities = []
+    for item in output:
+        if entities and item["word"].startswith("##"):
+            entities[-1]["word"] += item["word"][2:]
+            entities[-1]["end"] = item["end"]
+        else:
+            entities.append(dict(item))
+    return entities
+
+
+def crf_entities(text: str, tagged: list[tuple]) -> list[dict]:
+    """
+    Entity dicts with offsets into ``text`` from the ``(word, pos, chunk, ner)``
+    tuples of ``underthesea.ner(deep=False)``; ``B-``/``I-`` runs become one
+    entity. Words that cannot be found in ``text`` are skipped.
+    """
+    entities = []
+    current = None
+    position = 0
+    for word, *_, tag in tagged:
+        start = text.find(word, position)
+        if start < 0:
+            current = None
+            continue
+        position = start + len(word)
+        if tag == "O":
+            current = None
+        elif tag.startswith("I-") and current is not None and current["entity"][2:] == tag[2:]:
+            current["end"] = position
+            current["word"] = text[current["start"] : position]
+        else:
+            current = {"entity": f"B-{tag[2:]}", "start": start, "end": position, "word": word}
+            entities.append(current)
+    return entities
+
+
+class NERUnderthesea(NERBase):
+    """
+    underthesea NER with batched inference.
+
+    With ``deep=True`` (transformer model) ``predict_batch`` sends whole batches
+    through underthesea's token-classification pipeline instead of one call per
+    sentence; results match ``underthesea.ner(text, deep=True)``. The CRF model
+    (``deep=False``) tags one sentence at a time, so batching only saves the
+    per-call dispatch there; its ``(word, pos, chunk, ner)`` tuples are turned
+    into entity dicts with offsets (``crf_entities``), as every backend returns.
+    """
+
+    def __init__(self, deep: bool = True, batch_size: int = 32):
+        self.deep = deep
+        self.model_name = "transformers" if deep else "crf"
+        self.batch_size = batch_size
+        self._pipeline = None
+
+    @property
+    def version(self) -> str:
+        # CRF results used to be cached as raw tuples
+        return package_versions("underthesea") + ("" if self.deep else ",crf=dicts")
+
+    def predict(self, text: str) -> list[dict]:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: list[str], batch_size: int | None = None) -> list[list[dict]]:
+        if not self.deep:
+            # underthesea imports its whole toolkit; only pay for it on first use
+            from underthesea import ner
+
+            return [crf_entities(text, ner(text)) for text in texts]
+
+        results = [[] for _ in texts]
+        # The pipeline rejects empty input; those texts simply have no entities
+        todo = [i for i, text in enumerate(texts) if text.strip()]
+        if not todo:
+            return results
+        outputs = self._get_pipeline()([texts[i] for i in todo], batch_size=batch_size or self.batch_size)
+        for i, output in zip(todo, outputs):
+            results[i] = merge_subwords(output)
+        return results
+
+    def warm_up(self):
+        if self.deep:
+            self._get_pipeline()
+        else:
+            from underthesea import ner
+
+            # The CRF model is loaded by the first call
+            ner("Trang Tử")
+
+    def _get_pipeline(self):
+        if self._pipeline is None:
+            # Loads the model weights on import, so only done on first use
+            from underthesea.pipeline.ner.model_transformers import nlp
+
+            self._pipeline = nlp
+        return self._pipeline
@@ -0,0 +1,89 @@
+"""
+Page-level NER projected onto sentences.
+
+Tagging every sentence as its own text costs one model sequence (or call, or
+request) per sentence and hides the neighbouring sentences from the model.
+``predict_windows`` joins consecutive sentences of a page into windows of at
+most ``max_chars`` characters, tags the windows with one ``predict_batch``
+call and maps each entity back onto its sentence with sentence-relative
+offsets. Any ``NERBase`` whose entities carry character ``start``/``end``
+offsets works.
+
+``max_chars`` should keep a window within the model's maximum length: about
+1000 characters of Vietnamese is 250-300 subword tokens.
+"""
+
+from bisect import bisect_right
+
+from src.ner.base import NERBase
+
+DEFAULT_WINDOW_CHARS = 1000
+
+
+def sentence_windows(sentences: list[str], max_chars: int = DEFAULT_WINDOW_CHARS, separator: str = " ") -> list[tuple[int, int]]:
+    """
+    ``(first, stop)`` sentence index ranges, each joined into one window of at
+    most ``max_chars`` characters; a longer sentence gets a window of its own.
+    """
+    windows = []
+    first = 0
+    length = 0
+    for i, sentence in enumerate(sentences):
+        added = len(sentence) + (len(separator) if i > first else 0)
+        if i > first and length + added > max_chars:
+            windows.append((first, i))
+            first = i
+            added = len(sentence)
+            length = 0
+        length += added
+    if first < len(sentences):
+        windows.append((first, len(sentences)))
+    return windows
+
+
+def project_entities(entities: list[dict], starts: list[int], sentences: list[str]) -> list[list[dict]]:
+    """
+    Entities of a window split per sentence, with offsets relative to the
+    sentence that holds their start (``starts`` are the sentences' offsets in
+    the window). An entity running past its sentence is cut at the sentence
+    end; one starting in a separator is dropped.
+    """
+    projected = [[] for _ in sentences]
+    for entity in entities:
+        start = entity.get("start", 0)
+        i = bisect_right(starts, start) - 1
+        if i < 0 or start >= starts[i] + len(sentences[i]):
+            continue
+        sentence_start = starts[i]
+        end = min(entity.get("end", start), sentence_start + len(sentences[i]))
+        word = entity.get("word", "") if end == entity.get("end") else sentences[i][start - sentence_start : end - sentence_start]
+        projected[i].append({**entity, "start": start - sentence_start, "end": end - sentence_start, "word": word})
+    return projected
+
+
+def predict_windows(
+    model: NERBase,
+    sentences: list[str],
+    max_chars: int = DEFAULT_WINDOW_CHARS,
+    separator: str = " ",
+) -> list[list[dict]]:
+    """
+    Entities of each of ``sentences`` (in order, as from ``predict_batch``),
+    tagged in windows of consecutive sentences joined by ``separator``.
+    """
+    windows = sentence_windows(sentences, max_chars, separator)
+    texts = []
+    offsets = []
+    for first, stop in windows:
+        starts = []
+        position = 0
+        for sentence in sentences[first:stop]:
+            starts.append(position)
+            position += len(sentence) + len(separator)
+        texts.append(separator.join(sentences[first:stop]))
+        offsets.append(starts)
+
+    results = []
+    for (first, stop), starts, entities in zip(windows, offsets, model.predict_batch(texts)):
+        results.extend(project_entities(entities, starts, sentences[first:stop]))
+    return results
@@ -0,0 +1,135 @@
+"""
+In-memory page rasterization for OCR.
+
+Pages are rendered straight into a pixmap and handed to the OCR engines as a
+NumPy view over the pixmap samples, instead of a PNG written to disk and
+decoded again. Saving the page image is an optional side output.
+"""
+
+import numpy as np
+import pymupdf
+
+
+def pixmap_to_array(pix: pymupdf.Pixmap) -> np.ndarray:
+    """
+    Zero-copy uint8 view over the pixmap samples.
+
+    Shape is ``(height, width, n)``, or ``(height, width)`` for single-channel
+    pixmaps. The view does not own the memory: keep ``pix`` alive while it is used.
+    """
+    buf = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+    rows = buf.reshape(pix.height, pix.stride)[:, : pix.width * pix.n]
+    if pix.n == 1:
+        return rows
+    return rows.reshape(pix.height, pix.width, pix.n)
+
+
+def rasterize_page(
+    page: pymupdf.Page,
+    scale: float = 3.0,
+    gray: bool = False,
+) -> tuple[pymupdf.Pixmap, np.ndarray]:
+    """
+    Render ``page`` at ``scale`` and return ``(pixmap, array)``.
+
+    ``array`` is RGB (or single-channel when ``gray``) and shares memory with
+    ``pixmap``; call ``pixmap.save(path)`` to also keep the image on disk.
+    """
+    colorspace = pymupdf.csGRAY if gray else pymupdf.csRGB
+    pix = page.get_pixmap(matrix=pymupdf.Matrix(scale, scale), colorspace=colorspace, alpha=False)
+    return pix, pixmap_to_array(pix)
+
+
+def rgb_to_bgr(img: np.ndarray) -> np.ndarray:
+    """Channel-reversed view for OpenCV/PaddleOCR, which expect BGR (no copy)."""
+    if img.ndim == 2:
+        return img
+    return img[:, :, ::-1]
+
+
+def text_layer_xheight(page, ratio: float = 0.5, small_text_share: float | None = None) -> float | None:
+    """
+    Estimate the x-height (in PDF points) of the body text from font sizes.
+
+    The dominant size (the one with the most characters, rounded to half a
+    point) is taken, so body text drives the estimate rather than footnotes or
+    headings. With ``small_text_share`` (e.g. 0.05) the smallest size holding
+    at least that share of the characters is taken instead, so significant
+    small print (footnotes, glosses) sets the scale. ``ratio`` converts font
+    size to x-height. Returns ``None`` when the page has no text layer.
+    """
+    chars = {}
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                n = len(span["text"].strip())
+                if n:
+                    size = round(span["size"] * 2) / 2
+                    chars[size] = chars.get(size, 0) + n
+    if not chars:
+        return None
+    if small_text_share is not None:
+        total = sum(chars.values())
+        significant = [size for size, n in chars.items() if n >= small_text_share * total]
+        return min(significant) * ratio
+    return max(chars, key=chars.get) * ratio
+
+
+def raster_xheight(page, probe_scale: float = 1.0, ink_threshold: int = 128, ratio: float = 0.85) -> float | None:
+    """
+    Estimate the x-height (in PDF points) of a scanned page from a cheap render.
+
+    The page is rendered in grayscale at ``probe_scale``; rows containing ink are
+    grouped into text lines and the median line height, times ``ratio``, is the
+    x-height estimate. Sparse ascender/descender rows fall under the ink
+    threshold, so a line measures 0.6-0.75 of the font size; the default
+    ``ratio`` maps the low end onto ``text_layer_xheight``'s half the font
+    size, so scanned body text is not rendered larger than born-digital text.
+    Returns ``None`` when no text lines are found.
+    """
+    pix, img = rasterize_page(page, scale=probe_scale, gray=True)
+    ink_rows = (img < ink_threshold).mean(axis=1) > 0.01
+    # Run lengths of consecutive ink rows = text line heights
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], ink_rows.astype(np.int8), [0]))))
+    heights = edges[1::2] - edges[::2]
+    heights = heights[heights >= 2]
+    if not len(heights):
+        return None
+    return float(np.median(heights)) / probe_scale * ratio
+
+
+def adaptive_scale(
+    page,
+    target_xheight: float = 15.0,
+    min_scale: float = 1.0,
+    max_scale: float = 4.0,
+    default_scale: float = 3.0,
+    small_text_share: float | None = None,
+) -> float:
+    """
+    Lowest render scale at which the page's body text reaches ``target_xheight`` pixels.
+
+    Uses the text-layer font sizes when available, else a low-resolution probe
+    render; falls back to ``default_scale`` when neither gives an estimate. The
+    default target puts 10 pt body text at the former fixed 3.0x and larger
+    type below it; only pages set in smaller type go up to ``max_scale``.
+    Footnotes and glosses smaller than the body are not considered unless
+    ``small_text_share`` is set (see ``text_layer_xheight``; the probe render
+    of scanned pages always measures the typical line).
+    """
+    xheight = text_layer_xheight(page, small_text_share=small_text_share) or raster_xheight(page)
+    if not xheight:
+        return default_scale
+    return float(min(max(target_xheight / xheight, min_scale), max_scale))
+
+
+def rasterize_page_adaptive(
+    page,
+    target_xheight: float = 15.0,
+    gray: bool = False,
+    **scale_limits,
+) -> tuple[pymupdf.Pixmap, np.ndarray, float]:
+    """``rasterize_page`` at ``adaptive_scale``; returns ``(pixmap, array, scale)``."""
+    scale = adaptive_scale(page, target_xheight=target_xheight, **scale_limits)
+    pix, img = rasterize_page(page, scale=scale, gray=gray)
+    return pix, img, scale
@@ -0,0 +1,183 @@
+"""
+Content-addressed on-disk cache for cleaned page text.
+
+Entries are keyed by a hash of the PDF page content (content streams, Form
+XObjects and fonts, with everything they reference) and the cleaning rules (cleaner name + ``rules_version``), so warm re-runs skip
+both ``page.get_text()`` and ``clean_page``. ``rules_version`` should name the
+module that owns the cleaner (e.g. ``"parse_namhoakinh_songngu/1"``) and be
+bumped whenever its rules change; the cache can also be invalidated from the
+command line:
+
+    python -m src.page_cache stats
+    python -m src.page_cache clear
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from typing import Callable
+
+DEFAULT_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", ".cache/page_cache.sqlite")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Indirect references ("12 0 R") inside a PDF object's source
+OBJECT_REF = re.compile(r"\b(\d+) \d+ R\b")
+IMAGE_OBJECT = re.compile(r"/Subtype\s*/Image\b")
+
+
+def page_content_hash(page) -> str:
+    """
+    Hash what determines a page's extracted text: its content streams, and
+    the Form XObjects and fonts it uses, resolved down to every object they
+    reference (nested forms, ToUnicode maps, font programs).
+
+    Pages that only draw ``q /fzFrm0 Do Q`` (MuPDF-rewritten files and many
+    producers) have identical content streams, so the forms have to be hashed
+    too. Image streams are skipped: they do not change the text layer.
+    """
+    doc = page.parent
+    digest = hashlib.sha256(page.read_contents())
+    roots = [(name, xref) for xref, name, *_ in page.get_xobjects()]
+    roots += [(font[3], font[0]) for font in page.get_fonts(full=True)]
+    seen = set()
+    pending = [xref for _, xref in roots]
+    for name, xref in roots:
+        digest.update(f"\0{name}:{xref}".encode("utf-8"))
+    while pending:
+        xref = pending.pop()
+        if xref in seen or xref <= 0:
+            continue
+        seen.add(xref)
+        source = doc.xref_object(xref, compressed=True)
+        digest.update(f"\0{xref}\0{source}".encode("utf-8"))
+        if doc.xref_is_stream(xref) and not IMAGE_OBJECT.search(source):
+            digest.update(doc.xref_stream_raw(xref))
+        pending.extend(int(ref) for ref in OBJECT_REF.findall(source))
+    return digest.hexdigest()
+
+
+class PageCache:
+    """
+    SQLite-backed page text cache with a size cap and LRU eviction.
+
+    Safe to share between the worker processes of ``src.parallel``: every
+    process opens its own connection and SQLite serializes the writes.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        evict_every: int = 64,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, text TEXT NOT NULL, "
+            "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages(last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(page_hash: str, clean: Callable[[str], str], rules_version: str) -> str:
+        rules = f"{clean.__qualname__}:{rules_version}"
+        return hashlib.sha256(f"{page_hash}\0{rules}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT text FROM pages WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute("UPDATE pages SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        return row[0]
+
+    def put(self, key: str, text: str):
+        size = len(text.encode("utf-8"))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (key, text, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, text, size, time.time()),
+        )
+        self.conn.commit()
+        self._puts += 1
+        if self._puts % self.evict_every == 0:
+            self.evict()
+
+    def cleaned_text(self, page, clean: Callable[[str], str], rules_version: str = "1") -> str:
+        """Return ``clean(page.get_text())``, from the cache when possible."""
+        key = self.make_key(page_content_hash(page), clean, rules_version)
+        text = self.get(key)
+        if text is None:
+            text = clean(page.get_text())
+            self.put(key, text)
+        return text
+
+    def size(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache is under 90% of ``max_bytes``."""
+        total = self.size()
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        rows = self.conn.execute("SELECT key, size FROM pages ORDER BY last_used").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= target:
+                break
+            stale.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM pages WHERE key = ?", stale)
+        self.conn.commit()
+
+    def clear(self):
+        self.conn.execute("DELETE FROM pages")
+        self.conn.commit()
+        self.conn.execute("VACUUM")
+
+    def stats(self) -> dict:
+        count = self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {
+            "path": self.path,
+            "entries": count,
+            "bytes": self.size(),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the cleaned page text cache.")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--path", default=DEFAULT_CACHE_PATH)
+    args = parser.parse_args()
+
+    cache = PageCache(args.path)
+    if args.command == "clear":
+        cache.clear()
+        print(f"🗑️ Cleared page cache: {args.path}")
+    else:
+        for name, value in cache.stats().items():
+            print(f"{name}: {value}")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import gc
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, TypeVar
+
+from src.ner.tokens import cpu_threads
+
+T = TypeVar("T")
+
+# Read by OpenMP, BLAS, numexpr and paddle when they start their thread pools
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "FLAGS_paddle_num_threads",
+]
+
+
+def limit_threads(threads: int):
+    """
+    Cap every CPU thread pool of this process at ``threads``.
+
+    Environment variables cover libraries that start their pools later (lazy
+    imports, ONNX Runtime sessions via ``cpu_threads``); pools that already
+    exist are resized through ``torch.set_num_threads`` and, when installed,
+    ``threadpoolctl``.
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(threads)
+
+
+class SharedModelPool(ProcessPoolExecutor):
+    """``ProcessPoolExecutor`` that undoes the parent's ``gc.freeze()`` when it shuts down."""
+
+    def __init__(self, *args, frozen: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.frozen = frozen
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+        if self.frozen:
+            # The workers keep their frozen copy; the parent collects those objects again
+            gc.unfreeze()
+            self.frozen = False
+
+
+def worker_pool(
+    workers: int | None = None,
+    preload: Iterable = (),
+    threads_per_worker: int | None = None,
+) -> SharedModelPool:
+    """
+    Process pool whose workers share models loaded once in the parent.
+
+    Each item of ``preload`` is a model with ``warm_up()`` (e.g. ``NER_MODEL``)
+    or a zero-argument loader such as an ``lru_cache``d factory; all are loaded
+    here, then workers are forked so the weights are shared copy-on-write
+    instead of loaded again per process. ``gc.freeze()`` keeps the collector
+    from touching (and so copying) those objects in the children; the parent
+    unfreezes them when the pool shuts down (``with`` exit). Backends
+    reopen per-process state (HTTP pools, SQLite, ONNX Runtime sessions) after
+    the fork by themselves.
+
+    Each worker is limited to ``threads_per_worker`` threads (default: the
+    available CPUs divided among the workers) so that N workers running torch,
+    BLAS or paddle do not oversubscribe the cores. Where ``fork`` is not
+    available the pool uses the default start method and every worker loads
+    its own models on first use.
+    """
+    workers = workers or os.cpu_count() or 1
+    threads_per_worker = threads_per_worker or max(1, cpu_threads(limit=os.cpu_count() or 1) // workers)
+
+    context = None
+    frozen = False
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        for model in preload:
+            if hasattr(model, "warm_up"):
+                model.warm_up()
+            else:
+                model()
+        gc.collect()
+        gc.freeze()
+        frozen = True
+
+    return SharedModelPool(
+        max_workers=workers,
+        mp_context=context,
+        initializer=limit_threads,
+        initargs=(threads_per_worker,),
+        frozen=frozen,
+    )
+
+
+def shard_pages(n_pages: int, n_shards: int) -> list[tuple[int, int]]:
+    """Split ``range(n_pages)`` into at most ``n_shards`` contiguous ``(start, stop)`` ranges."""
+    n_shards = max(1, min(n_shards, n_pages))
+    size, extra = divmod(n_pages, n_shards)
+    ranges = []
+    start = 0
+    for i in range(n_shards):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _counted_shard(
+    worker: Callable[[str, int, int], list[T]],
+    stats: Callable[[], dict[str, int]],
+    pdf_path: str,
+    start: int,
+    stop: int,
+) -> tuple[list[T], dict[str, int]]:
+    """``worker``'s results for one shard and how much ``stats()`` grew in this process meanwhile."""
+    before = stats()
+    results = worker(pdf_path, start, stop)
+    return results, {name: value - before.get(name, 0) for name, value in stats().items()}
+
+
+def map_page_ranges(
+    pdf_path: str,
+    worker: Callable[[str, int, int], list[T]],
+    workers: int | None = None,
+    shards_per_worker: int = 4,
+    preload: Iterable = (),
+    threads_per_worker: int | None = None,
+    stats: Callable[[], dict[str, int]] | None = None,
+    totals: dict[str, int] | None = None,
+) -> list[T]:
+    """
+    Run ``worker(pdf_path, start, stop)`` over page ranges in a process pool.
+
+    ``worker`` must be a module-level function that opens its own ``pymupdf``
+    handle (documents cannot be shared between processes) and returns one
+    result per page of ``range(start, stop)``. Results are concatenated back in
+    page order, so callers can number pages exactly as a serial run would.
+    Using several shards per worker keeps the pool busy when some page ranges
+    (e.g. dense body text vs. front matter) are much slower than others.
+    ``preload`` and ``threads_per_worker`` are passed to ``worker_pool``, so
+    models the worker uses are loaded once and shared by all processes.
+
+    Counters kept in the workers (e.g. ``NERCache`` hits) never reach the
+    parent's objects. With ``stats``, a module-level function returning this
+    process's counters, each shard's increase is summed into ``totals``.
+    """
+    import pymupdf
+
+    workers = workers or os.cpu_count() or 1
+    with pymupdf.open(pdf_path) as doc:
+        n_pages = len(doc)
+    ranges = shard_pages(n_pages, workers * shards_per_worker)
+
+    print(f"⚙️ Processing {n_pages} pages in {len(ranges)} shards on {workers} workers")
+    results: list[T] = []
+    with worker_pool(workers, preload, threads_per_worker) as pool:
+        if stats is None:
+            futures = [pool.submit(worker, pdf_path, start, stop) for start, stop in ranges]
+        else:
+            futures = [pool.submit(_counted_shard, worker, stats, pdf_path, start, stop) for start, stop in ranges]
+        for future in futures:
+            if stats is None:
+                results.extend(future.result())
+                continue
+            shard, counters = future.result()
+            results.extend(shard)
+            if totals is not None:
+                for name, value in counters.items():
+                    totals[name] = totals.get(name, 0) + value
+    return results
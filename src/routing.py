@@ -0,0 +1,144 @@
+"""
+Per-page routing between the PDF text layer and OCR.
+
+Each page's text layer is scored (character count, share of garbled glyphs,
+image coverage) and only pages without usable text are sent to OCR: a page
+image with next to no text over it, or a text layer full of glyphs the PDF
+could not map to Unicode (replacement characters, private-use code points,
+control characters). Clean text in any language stays on the text layer.
+
+Text in a legacy 8-bit Vietnamese font encoding (TCVN3, VNI) maps to valid but
+meaningless Latin characters instead; for books known to be Vietnamese, the
+share of valid Vietnamese or Han syllables can be checked as well
+(``min_syllable_ratio``). Every decision is kept so a run can be audited
+afterwards.
+"""
+
+import json
+import re
+import unicodedata
+from typing import Callable, Iterator
+
+ONSETS = "ngh|ng|nh|ch|gh|gi|kh|ph|qu|th|tr|b|c|d|đ|g|h|k|l|m|n|p|r|s|t|v|x"
+VOWELS = "aàáảãạăằắẳẵặâầấẩẫậeèéẻẽẹêềếểễệiìíỉĩịoòóỏõọôồốổỗộơờớởỡợuùúủũụưừứửữựyỳýỷỹỵ"
+CODAS = "ch|nh|ng|c|m|n|p|t"
+
+VIETNAMESE_SYLLABLE = re.compile(rf"(?:{ONSETS})?[{VOWELS}]{{1,3}}(?:{CODAS})?")
+TOKEN = re.compile(r"[^\W\d_]+")
+HAN = re.compile(r"[一-鿿]")
+# Unmapped glyphs: replacement character, private-use areas, C0 controls other than whitespace
+GARBLED = re.compile(r"[\ufffd\ue000-\uf8ff\U000f0000-\U0010ffff\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def syllable_ratio(text: str) -> float:
+    """Share of word tokens that are valid Vietnamese syllables or Han characters."""
+    tokens = TOKEN.findall(unicodedata.normalize("NFC", text).lower())
+    if not tokens:
+        return 0.0
+    valid = 0
+    for token in tokens:
+        if HAN.match(token) or VIETNAMESE_SYLLABLE.fullmatch(token):
+            valid += 1
+    return valid / len(tokens)
+
+
+def garbled_ratio(text: str) -> float:
+    """Share of non-whitespace characters that are unmapped glyphs."""
+    chars = sum(1 for c in text if not c.isspace())
+    if not chars:
+        return 0.0
+    return len(GARBLED.findall(text)) / chars
+
+
+def image_coverage(page) -> float:
+    """Fraction of the page area covered by images (overlaps counted once per image)."""
+    page_rect = page.rect
+    page_area = page_rect.width * page_rect.height
+    if not page_area:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        w = min(x1, page_rect.x1) - max(x0, page_rect.x0)
+        h = min(y1, page_rect.y1) - max(y0, page_rect.y0)
+        if w > 0 and h > 0:
+            covered += w * h
+    return min(covered / page_area, 1.0)
+
+
+def route_page(
+    page,
+    text: str | None = None,
+    min_chars: int = 50,
+    max_garbled_ratio: float = 0.05,
+    min_image_coverage: float = 0.3,
+    min_syllable_ratio: float | None = None,
+) -> dict:
+    """
+    Decide whether ``page`` should be read from its text layer or OCR'd.
+
+    ``min_syllable_ratio`` (e.g. 0.75) also sends pages whose text is mostly
+    not Vietnamese or Han to OCR; off by default, since that would OCR clean
+    English or Chinese born-digital pages too.
+
+    Returns a decision dict: ``page`` (1-based), ``route`` (``"text"`` or
+    ``"ocr"``), ``reason`` and the scores it was based on.
+    """
+    if text is None:
+        text = page.get_text()
+    chars = sum(1 for c in text if not c.isspace())
+    garbled = garbled_ratio(text)
+    ratio = syllable_ratio(text)
+    coverage = image_coverage(page)
+
+    if chars < min_chars and coverage >= min_image_coverage:
+        route, reason = "ocr", "no text layer over page image"
+    elif chars >= min_chars and garbled > max_garbled_ratio:
+        route, reason = "ocr", "text layer has unmapped glyphs"
+    elif chars >= min_chars and min_syllable_ratio is not None and ratio < min_syllable_ratio:
+        route, reason = "ocr", "text layer is not valid Vietnamese"
+    elif chars < min_chars:
+        route, reason = "text", "near-empty page without images"
+    else:
+        route, reason = "text", "usable text layer"
+
+    return {
+        "page": page.number + 1,
+        "route": route,
+        "reason": reason,
+        "chars": chars,
+        "garbled_ratio": round(garbled, 3),
+        "syllable_ratio": round(ratio, 3),
+        "image_coverage": round(coverage, 3),
+    }
+
+
+def iter_routed_pages(
+    doc,
+    ocr: Callable[[object], str],
+    decisions: list[dict] | None = None,
+    **thresholds,
+) -> Iterator[tuple[int, str]]:
+    """
+    Yield ``(page_num, raw_text)``, taking each page from the text layer or ``ocr(page)``.
+
+    Routing decisions are appended to ``decisions`` when given.
+    """
+    for i, page in enumerate(doc, 1):
+        text = page.get_text()
+        decision = route_page(page, text=text, **thresholds)
+        if decision["route"] == "ocr":
+            text = ocr(page)
+        if decisions is not None:
+            decisions.append(decision)
+        yield i, text
+
+
+def write_routing_log(decisions: list[dict], out_path: str):
+    """Write routing decisions as JSON lines for auditing."""
+    with open(out_path, "w", encoding="utf-8") as f:
+        for decision in decisions:
+            f.write(json.dumps(decision, ensure_ascii=False) + "\n")
+
+    n_ocr = sum(1 for d in decisions if d["route"] == "ocr")
+    print(f"🧭 Routing: {len(decisions) - n_ocr} text-layer pages, {n_ocr} OCR pages -> {out_path}")
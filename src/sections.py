@@ -0,0 +1,103 @@
+"""
+One-scan section-title and boilerplate matching.
+
+Known section titles are compiled once per book into a trie-shaped regex, so a
+page is scanned a single time however many titles there are (the regex
+branches on one character at a time instead of trying every title in turn).
+Header/footer patterns are likewise joined into one alternation.
+"""
+
+import re
+from functools import lru_cache
+
+
+def _trie_pattern(words: list[str]) -> str:
+    """Regex matching any of ``words`` (longest first), factored as a character trie."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: dict) -> str:
+        is_end = "" in node
+        branches = [re.escape(char) + render(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if is_end:
+            return f"(?:{body})?"
+        return body
+
+    return render(trie)
+
+
+class SectionMatcher:
+    """
+    Find known section titles in page text with one regex scan.
+
+    Matching is case-sensitive substring search, like ``title in text``.
+    ``first_title`` reproduces the old "first entry of ``titles`` that occurs
+    in the page" loop.
+    """
+
+    def __init__(self, titles: list[str]):
+        self.titles = [title for title in dict.fromkeys(titles) if title]
+        self._rank = {title: i for i, title in enumerate(self.titles)}
+        # The lookahead reports a match at every start position, so titles that
+        # overlap each other are all seen; titles contained in a longer match
+        # at the same position are added from this table.
+        self._contained = {
+            title: [other for other in self.titles if other != title and other in title]
+            for title in self.titles
+        }
+        self._regex = None
+        if self.titles:
+            first_chars = "".join(sorted({re.escape(title[0]) for title in self.titles}))
+            self._regex = re.compile(f"(?=[{first_chars}])(?=({_trie_pattern(self.titles)}))")
+
+    def titles_in(self, text: str) -> set[str]:
+        """Every known title occurring in ``text``."""
+        found = set()
+        if self._regex is None:
+            return found
+        for match in self._regex.finditer(text):
+            title = match.group(1)
+            if title not in found:
+                found.add(title)
+                found.update(self._contained[title])
+        return found
+
+    def first_title(self, text: str) -> str | None:
+        """The earliest entry of ``titles`` that occurs in ``text``, or ``None``."""
+        found = self.titles_in(text)
+        return min(found, key=self._rank.__getitem__) if found else None
+
+    def preserve_title(self, text: str) -> str:
+        """Restore the canonical spelling of a title that opens the page in another case."""
+        title = self.first_title(text)
+        if title is None:
+            return text
+        return _title_at_start(title).sub(title, text, count=1)
+
+
+@lru_cache(maxsize=None)
+def _title_at_start(title: str) -> re.Pattern:
+    return re.compile(rf"(?i)^{re.escape(title)}")
+
+
+@lru_cache(maxsize=None)
+def section_matcher(titles: tuple[str, ...]) -> SectionMatcher:
+    """Cached ``SectionMatcher`` per title list (pass a tuple)."""
+    return SectionMatcher(list(titles))
+
+
+def compile_boilerplate(patterns: list[str], flags=re.IGNORECASE) -> re.Pattern:
+    """
+    Join header/footer regexes into one alternation for a single ``sub`` pass.
+
+    Patterns are tried in order at each position; patterns that extend to the
+    end of the line (``.*``) remove the same text as separate passes would.
+    """
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), flags)
@@ -0,0 +1,75 @@
+"""
+Linear-time sentence splitting into ``(start, end)`` spans.
+
+The text is scanned once with a compiled boundary regex; sentences are
+returned as half-open spans into the original string (surrounding whitespace
+excluded), so callers only slice the sentences they keep and the offsets can
+be reused, e.g. to place NER entities in the page text.
+"""
+
+import re
+from functools import lru_cache
+
+SENTENCE_TERMINATORS = ".!?。！？"
+# Closing quotes/brackets that belong to the sentence they follow
+CLOSERS = "\"'”’)]」』》"
+HAN = re.compile(r"[一-鿿]")
+NON_SPACE = re.compile(r"\S")
+
+
+@lru_cache(maxsize=None)
+def _boundary_re(terminators: str) -> re.Pattern:
+    # A run of terminators ("?!", "...", "。」") ends one sentence, not several
+    return re.compile(f"[{re.escape(terminators)}…]+[{re.escape(CLOSERS)}]*")
+
+
+def _is_boundary(text: str, match: re.Match, han_period_needs_space: bool) -> bool:
+    if match.group(0) != ".":
+        return True
+    end = match.end()
+    next_char = text[end] if end < len(text) else ""
+    # Decimals and numbered headings: "3.14", "Chương 1.2"
+    if next_char.isdigit():
+        return False
+    # A "." glued between Han characters is an OCR artifact, not a full stop
+    if han_period_needs_space and next_char and not next_char.isspace():
+        start = match.start()
+        return not (start and HAN.match(text[start - 1]))
+    return True
+
+
+def sentence_spans(
+    text: str,
+    terminators: str = SENTENCE_TERMINATORS,
+    han_period_needs_space: bool = False,
+) -> list[tuple[int, int]]:
+    """
+    Return ``(start, end)`` spans of the sentences in ``text``.
+
+    A sentence ends after a run of ``terminators`` (ellipses included) and any
+    closing quotes. A "." followed by a digit never ends a sentence; with
+    ``han_period_needs_space``, neither does a "." after a Han character unless
+    whitespace follows. Empty sentences are skipped.
+    """
+    spans = []
+    start = 0
+    for match in _boundary_re(terminators).finditer(text):
+        if not _is_boundary(text, match, han_period_needs_space):
+            continue
+        first = NON_SPACE.search(text, start, match.end())
+        if first:
+            spans.append((first.start(), match.end()))
+        start = match.end()
+
+    first = NON_SPACE.search(text, start)
+    if first:
+        end = len(text)
+        while text[end - 1].isspace():
+            end -= 1
+        spans.append((first.start(), end))
+    return spans
+
+
+def split_sentences(text: str, min_length: int = 0, **options) -> list[str]:
+    """Materialize ``sentence_spans`` as strings, keeping those longer than ``min_length``."""
+    return [text[s:e] for s, e in sentence_spans(text, **options) if e - s > min_length]
@@ -1,7 +1,11 @@
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
+from xml.sax.saxutils import quoteattr
 import re
 import unicodedata
+from typing import Callable, Iterable, Iterator
+
+from src.sentences import sentence_spans
 
 
 def normalize(s: str) -> str:
@@ -22,21 +26,15 @@ def split_paragraphs(text: str) -> list[str]:
 def split_sentences(text: str) -> list[str]:
     # Split by Vietnamese sentence delimiters
     # Vietnamese sentences typically end with ., !, or ?
-    delimiters = [".", "!", "?"]
-    sentences = []
-    current_sentence = ""
-
-    for char in text:
-        current_sentence += char
-        if char in delimiters:
-            if current_sentence.strip():
-                sentences.append(normalize(current_sentence.strip()))
-            current_sentence = ""
+    return [normalize(text[start:end]) for start, end in sentence_spans(text, ".!?")]
 
-    if current_sentence.strip():  # Add any remaining text
-        sentences.append(normalize(current_sentence.strip()))
 
-    return sentences
+def _findall_item(match: re.Match):
+    """What ``findall`` would return for ``match``: the match, its group, or its groups."""
+    groups = match.groups()
+    if not groups:
+        return match.group(0)
+    return groups[0] if len(groups) == 1 else groups
 
 
 def detect_sections(
@@ -50,18 +48,123 @@ def detect_sections(
     current = {"name": current_section, "pages": []}
 
     for i, txt in enumerate(pages, 1):
-        matches = section_pattern.findall(txt)
-        if matches:
+        match = section_pattern.search(txt)
+        if match:
             if current["pages"]:
                 sections.append(current)
-            title = re.findall(section_pattern, txt)[0]
-            current = {"name": normalize(title), "pages": [(i, txt)]}
+            current = {"name": normalize(_findall_item(match)), "pages": [(i, txt)]}
         else:
             current["pages"].append((i, txt))
     sections.append(current)
     return sections
 
 
+def iter_pages(
+    doc,
+    clean: Callable[[str], str] = clean_page,
+    cache=None,
+    rules_version: str = "utils/1",
+) -> Iterator[tuple[int, str]]:
+    """
+    Yield ``(page_num, cleaned_text)`` one page at a time (1-based page numbers).
+
+    With a ``src.page_cache.PageCache``, cleaned text is read from and stored in the cache.
+    """
+    for i, page in enumerate(doc, 1):
+        if cache is not None:
+            yield i, cache.cleaned_text(page, clean, rules_version)
+        else:
+            yield i, clean(page.get_text())
+
+
+def iter_sections(
+    pages: Iterable[tuple[int, str]],
+    current_section: str = "Giới thiệu",
+    pattern: str = r"^(PHẦN|CHƯƠNG)\s+[IVXLCDM\d]+\.*\s+.+$",
+    flags=re.MULTILINE,
+) -> Iterator[tuple[int, str, int, str]]:
+    """
+    Streaming counterpart of ``detect_sections``.
+
+    Consumes ``(page_num, text)`` pairs and yields ``(sect_id, name, page_num, text)``
+    as soon as each page is seen, so no page has to be kept in memory.
+    """
+    section_pattern = re.compile(pattern, flags)
+    sect_id = 0
+    name = current_section
+    has_pages = False
+
+    for i, txt in pages:
+        match = section_pattern.search(txt)
+        if match:
+            name = normalize(_findall_item(match))
+            has_pages = False
+        if not has_pages:
+            sect_id += 1
+            has_pages = True
+        yield sect_id, name, i, txt
+
+
+class XMLStreamWriter:
+    """
+    Write XML incrementally with the same layout as ``write_pretty_xml``.
+
+    Container elements are opened and closed with ``start``/``end``; finished
+    subtrees (e.g. a ``PAGE``) are written with ``write`` and can be freed
+    right away, so memory depends on the largest subtree, not the document.
+    A start tag is only written once the element gets a child, so a container
+    left empty (e.g. a SECT whose pages were all skipped) comes out as
+    ``<SECT .../>``, as ``write_pretty_xml`` writes it.
+    """
+
+    def __init__(self, out_path: str, indent: str = "  "):
+        self.out_path = out_path
+        self.indent = indent
+        self._stack: list[str] = []
+        self._pending: str | None = None  # start tag not written yet
+        self._file = None
+
+    def __enter__(self) -> "XMLStreamWriter":
+        self._file = open(self.out_path, "w", encoding="utf-8")
+        self._file.write('<?xml version="1.0" ?>\n')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        while self._stack:
+            self.end()
+        self._file.close()
+
+    def start(self, tag: str, **attrib: str):
+        self._open_pending()
+        attrs = "".join(f" {key}={quoteattr(value)}" for key, value in attrib.items())
+        self._pending = f"{self.indent * len(self._stack)}<{tag}{attrs}"
+        self._stack.append(tag)
+
+    def end(self):
+        tag = self._stack.pop()
+        if self._pending is not None:
+            self._file.write(f"{self._pending}/>\n")
+            self._pending = None
+            return
+        self._file.write(f"{self.indent * len(self._stack)}</{tag}>\n")
+
+    def _open_pending(self):
+        if self._pending is not None:
+            self._file.write(f"{self._pending}>\n")
+            self._pending = None
+
+    def write(self, element: ET.Element):
+        self._open_pending()
+        node = minidom.parseString(ET.tostring(element, encoding="utf-8")).documentElement
+        node.writexml(
+            self._file,
+            indent=self.indent * len(self._stack),
+            addindent=self.indent,
+            newl="\n",
+        )
+        self._file.flush()
+
+
 def write_pretty_xml(tree: ET.ElementTree, out_path: str):
     pretty = minidom.parseString(ET.tostring(tree.getroot(), encoding="utf-8"))
     with open(out_path, "w", encoding="utf-8") as f: